@@ -4,28 +4,103 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 import os
+import time
+import sys
 from pathlib import Path
+from power_storage import load_power_frame, iter_power_chunks, default_power_source
+from power_query import load_sorted_power
+from streaming_stats import DatasetSummary, FrameSummary
+from cadence_analysis import format_cadence
 
 class DataAnalyzer:
-    def __init__(self, csv_file_path):
+    def __init__(self, csv_file_path, streaming=False, chunksize=500_000, quantile_error=None,
+                 duplicate_key=None, spill_dir=None, building_type=None, start=None, end=None):
         self.csv_file = csv_file_path
         self.df = None
+        self._summary = None
+        self.report_timings = {}
+        
+        # Streaming mode reads bounded chunks into mergeable accumulators instead of one frame
+        self.streaming = streaming
+        self.chunksize = chunksize
+        
+        # Rank error for approximate quantiles; None means exact (streaming always sketches)
+        self.quantile_error = quantile_error
+        
+        # Columns that define an exact duplicate (None = all); spill_dir bounds streaming memory
+        self.duplicate_key = duplicate_key
+        self.spill_dir = spill_dir
+        
+        # Optional window of the data to analyse: building type(s) and start <= Time < end
+        self.building_type = building_type
+        self.start = start
+        self.end = end
         self.output_dir = Path("outputs")
         self.output_dir.mkdir(exist_ok=True)
         
         # Create timestamp for this analysis session
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
+    @property
+    def df(self):
+        return self._df
+    
+    @df.setter
+    def df(self, value):
+        # Replacing the data invalidates every cached aggregate
+        self._df = value
+        self._summary = None
+    
+    @property
+    def summary(self):
+        """Statistics shared by all report writers, computed lazily once per dataset"""
+        if self._summary is None and self._df is not None:
+            self._summary = FrameSummary(self._df, epsilon=self.quantile_error,
+                                         duplicate_key=self.duplicate_key)
+        return self._summary
+    
+    def invalidate_statistics(self):
+        """Drop cached aggregates after modifying self.df in place"""
+        self._summary = None
+    
     def load_data(self):
-        print("Loading data from CSV")
+        print(f"Loading data from {self.csv_file}")
         try:
-            self.df = pd.read_csv(self.csv_file)
-            print(f"Data loaded successfully: {len(self.df)} rows, {len(self.df.columns)} columns")
+            if self.windowed:
+                # A window is small enough to load directly, even in streaming mode
+                self.df = self.load_window()
+            elif self.streaming:
+                self.df = None
+                self._summary = DatasetSummary.from_chunks(iter_power_chunks(self.csv_file, self.chunksize),
+                                                           epsilon=self.quantile_error or 0.001,
+                                                           duplicate_key=self.duplicate_key,
+                                                           spill_dir=self.spill_dir)
+            else:
+                self.df = load_power_frame(self.csv_file)
+            print(f"Data loaded successfully: {self.summary.rows} rows, {len(self.summary.columns)} columns")
             return True
         except Exception as e:
             print(f"Error loading data: {e}")
             return False
     
+    @property
+    def windowed(self):
+        return any(value is not None for value in (self.building_type, self.start, self.end))
+    
+    def load_window(self):
+        """Rows of the requested window, binary-searched from the sorted store when it is current"""
+        building_types = [self.building_type] if isinstance(self.building_type, str) else self.building_type
+        store = load_sorted_power(self.csv_file)
+        if store is not None:
+            return store.query(building_types, self.start, self.end)
+        df = load_power_frame(self.csv_file, building_types=building_types)
+        keep = np.ones(len(df), dtype=bool)
+        if self.start is not None:
+            keep &= (df['Time'] >= pd.Timestamp(self.start)).to_numpy()
+        if self.end is not None:
+            keep &= (df['Time'] < pd.Timestamp(self.end)).to_numpy()
+        return df[keep].reset_index(drop=True)
+    
     def generate_basic_report(self):
         report_file = self.output_dir / f"01_basic_report_{self.timestamp}.txt"
         
@@ -37,44 +112,50 @@ class DataAnalyzer:
             # Dataset Overview
             f.write("DATASET OVERVIEW\n")
             f.write("-" * 30 + "\n")
-            f.write(f"Total Records: {len(self.df):,}\n")
-            f.write(f"Total Columns: {len(self.df.columns)}\n")
-            f.write(f"Memory Usage: {self.df.memory_usage(deep=True).sum() / 1024**2:.2f} MB\n\n")
+            summary = self.summary
+            f.write(f"Total Records: {summary.rows:,}\n")
+            f.write(f"Total Columns: {len(summary.columns)}\n")
+            f.write(f"Memory Usage: {summary.memory_bytes / 1024**2:.2f} MB\n")
+            if isinstance(summary, DatasetSummary):
+                f.write(f"Streamed in chunks of {self.chunksize:,} rows; duplicate hashes spilled to {summary.spill_dir}\n")
+                if summary.max_distinct is not None:
+                    f.write(f"Value counts kept for at most {summary.max_distinct:,} distinct values per column\n")
+            f.write("\n")
             
             # Column Information
             f.write("COLUMN INFORMATION\n")
             f.write("-" * 30 + "\n")
-            for i, col in enumerate(self.df.columns, 1):
-                dtype = str(self.df[col].dtype)
-                non_null = self.df[col].count()
-                null_count = self.df[col].isnull().sum()
-                null_pct = (null_count / len(self.df)) * 100
+            for i, col in enumerate(summary.columns, 1):
+                dtype = str(summary.dtypes[col])
+                null_count = summary.null_counts[col]
+                non_null = summary.rows - null_count
+                null_pct = (null_count / summary.rows) * 100
                 
                 f.write(f"{i:2d}. {col:<30} | Type: {dtype:<10} | "
                        f"Non-null: {non_null:>8,} | Missing: {null_count:>6,} ({null_pct:5.1f}%)\n")
             
 
             # Data by Year
-            if 'year' in self.df.columns:
+            if 'year' in summary.value_counts:
                 
                 f.write(f"\nDATA BY YEAR\n")
                 f.write("-" * 30 + "\n")
-                year_counts = self.df['year'].value_counts().sort_index()
+                year_counts = summary.value_counts['year'].counts.sort_index()
                 for year, count in year_counts.items():
                     f.write(f"{year}: {count:,} records\n")
             
             # Data by Building Type
-            if 'building_type' in self.df.columns:
+            if 'building_type' in summary.value_counts:
                 f.write(f"\nDATA BY BUILDING TYPE\n")
                 f.write("-" * 30 + "\n")
-                building_counts = self.df['building_type'].value_counts()
+                building_counts = summary.value_counts['building_type'].most_common()
                 for building, count in building_counts.items():
                     f.write(f"{building}: {count:,} records\n")
             
             # Sample Data
             f.write(f"\nSAMPLE DATA (First 10 rows)\n")
             f.write("-" * 50 + "\n")
-            f.write(self.df.head(10).to_string(index=False))
+            f.write(summary.head.to_string(index=False))
             f.write("\n\n")
             
         print(f"Basic report saved to: {report_file}")
@@ -88,8 +169,10 @@ class DataAnalyzer:
             f.write("=" * 60 + "\n")
             f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
             
+            summary = self.summary
+            
             # Numeric columns analysis
-            numeric_cols = self.df.select_dtypes(include=[np.number]).columns.tolist()
+            numeric_cols = list(summary.numeric)
             
             if numeric_cols:
                 f.write("NUMERIC COLUMNS STATISTICAL SUMMARY\n")
@@ -100,30 +183,38 @@ class DataAnalyzer:
                         f.write(f"\nColumn: {col}\n")
                         f.write("~" * 20 + "\n")
                         
-                        series = self.df[col].dropna()
-                        if len(series) > 0:
-                            f.write(f"Count: {len(series):,}\n")
-                            f.write(f"Mean: {series.mean():.4f}\n")
-                            f.write(f"Median: {series.median():.4f}\n")
-                            f.write(f"Std Dev: {series.std():.4f}\n")
-                            f.write(f"Min: {series.min():.4f}\n")
-                            f.write(f"Max: {series.max():.4f}\n")
-                            f.write(f"25th Percentile: {series.quantile(0.25):.4f}\n")
-                            f.write(f"75th Percentile: {series.quantile(0.75):.4f}\n")
+                        acc = summary.numeric[col]
+                        if acc.count > 0:
+                            # Quantiles and the IQR outlier count come from one pass
+                            result = acc.quantile_summary([0.25, 0.5, 0.75])
+                            Q1, median, Q3 = (result['quantiles'][q] for q in (0.25, 0.5, 0.75))
+                            note = "" if result['exact'] else f" (approx., ±{acc.epsilon*100:.1f}% rank)"
+                            f.write(f"Count: {acc.count:,}\n")
+                            f.write(f"Mean: {acc.mean:.4f}\n")
+                            f.write(f"Median: {median:.4f}{note}\n")
+                            f.write(f"Std Dev: {acc.std:.4f}\n")
+                            f.write(f"Min: {acc.min:.4f}\n")
+                            f.write(f"Max: {acc.max:.4f}\n")
+                            f.write(f"25th Percentile: {Q1:.4f}{note}\n")
+                            f.write(f"75th Percentile: {Q3:.4f}{note}\n")
                             
                             # Outlier detection (IQR method)
-                            Q1 = series.quantile(0.25)
-                            Q3 = series.quantile(0.75)
-                            IQR = Q3 - Q1
-                            lower_bound = Q1 - 1.5 * IQR
-                            upper_bound = Q3 + 1.5 * IQR
-                            outliers = series[(series < lower_bound) | (series > upper_bound)]
-                            f.write(f"Outliers (IQR method): {len(outliers):,} ({len(outliers)/len(series)*100:.2f}%)\n")
+                            outliers = result['outliers']
+                            f.write(f"Outliers (IQR method): {outliers:,} ({outliers/acc.count*100:.2f}%){note}\n")
                         else:
                             f.write("No valid numeric data found\n")
+                
+                # Percentiles by year x building type
+                for col, table in summary.group_quantiles.items():
+                    if col in ['year'] or table.empty:
+                        continue
+                    f.write(f"\nPERCENTILES BY YEAR AND BUILDING TYPE: {col}\n")
+                    f.write("-" * 40 + "\n")
+                    f.write(table.to_string(float_format=lambda v: f"{v:.2f}"))
+                    f.write("\n")
             
             # Categorical columns analysis
-            categorical_cols = self.df.select_dtypes(include=['object']).columns.tolist()
+            categorical_cols = list(summary.value_counts)
             
             if categorical_cols:
                 f.write(f"\n\nCATEGORICAL COLUMNS ANALYSIS\n")
@@ -133,16 +224,18 @@ class DataAnalyzer:
                     f.write(f"\nColumn: {col}\n")
                     f.write("~" * 20 + "\n")
                     
-                    value_counts = self.df[col].value_counts()
-                    f.write(f"Unique values: {len(value_counts)}\n")
+                    counter = summary.value_counts[col]
+                    value_counts = counter.most_common()
+                    at_least = ">= " if counter.truncated else ""
+                    f.write(f"Unique values: {at_least}{len(value_counts)}\n")
                     f.write(f"Most common values:\n")
                     
                     for value, count in value_counts.head(10).items():
-                        pct = (count / len(self.df)) * 100
+                        pct = (count / summary.rows) * 100
                         f.write(f"  {str(value)[:30]:<30}: {count:>8,} ({pct:5.1f}%)\n")
                     
                     if len(value_counts) > 10:
-                        f.write(f"  and {len(value_counts) - 10} more unique values\n")
+                        f.write(f"  and {at_least}{len(value_counts) - 10} more unique values\n")
         
         print(f" Statistical report saved to: {report_file}")
         return report_file
@@ -159,45 +252,52 @@ class DataAnalyzer:
             f.write("MISSING DATA ANALYSIS\n")
             f.write("-" * 30 + "\n")
             
-            missing_data = self.df.isnull().sum()
-            missing_pct = (missing_data / len(self.df)) * 100
+            summary = self.summary
+            missing_data = summary.null_counts
+            missing_pct = (missing_data / summary.rows) * 100
             
             f.write(f"{'Column':<30} | {'Missing Count':<15} | {'Missing %':<10}\n")
             f.write("-" * 60 + "\n")
             
-            for col in self.df.columns:
+            for col in summary.columns:
                 f.write(f"{col:<30} | {missing_data[col]:>13,} | {missing_pct[col]:>8.2f}%\n")
             
             # Data Completeness Score
-            overall_completeness = (1 - missing_data.sum() / (len(self.df) * len(self.df.columns))) * 100
+            overall_completeness = (1 - missing_data.sum() / (summary.rows * len(summary.columns))) * 100
             f.write(f"\nOverall Data Completeness: {overall_completeness:.2f}%\n")
             
             # Duplicate Records
             f.write(f"\nDUPLICATE RECORDS ANALYSIS\n")
             f.write("-" * 30 + "\n")
             
-            total_duplicates = self.df.duplicated().sum()
+            total_duplicates = summary.duplicate_rows
             f.write(f"Total duplicate rows: {total_duplicates:,}\n")
-            f.write(f"Percentage of duplicates: {(total_duplicates/len(self.df)*100):.2f}%\n")
+            f.write(f"Percentage of duplicates: {(total_duplicates/summary.rows*100):.2f}%\n")
+            
+            # Same timestamp and building but a different reading
+            duplicates = summary.duplicate_summary
+            f.write(f"Duplicate Time/building_type keys: {duplicates['duplicate_keys']:,}\n")
+            f.write(f"Conflicting duplicates (different Power): {duplicates['conflicting_keys']:,} keys, "
+                    f"{duplicates['conflicting_rows']:,} rows\n")
             
             # Check for duplicates by key columns
-            if 'file_name' in self.df.columns:
-                file_duplicates = self.df.duplicated(subset=['file_name']).sum()
+            if 'file_name' in summary.value_counts:
+                file_duplicates = summary.duplicate_values('file_name')
                 f.write(f"Duplicate file names: {file_duplicates:,}\n")
             
             f.write(f"\nDATA TYPE ANALYSIS\n")
             f.write("-" * 30 + "\n")
             
-            dtype_counts = self.df.dtypes.value_counts()
+            dtype_counts = summary.dtypes.astype(str).value_counts()
             for dtype, count in dtype_counts.items():
                 f.write(f"{str(dtype):<15}: {count} columns\n")
             
             # File Coverage Analysis
-            if 'year' in self.df.columns and 'building_type' in self.df.columns:
+            if summary.coverage is not None:
                 f.write(f"\nFILE COVERAGE ANALYSIS\n")
                 f.write("-" * 30 + "\n")
                 
-                coverage = self.df.groupby(['year', 'building_type']).size().unstack(fill_value=0)
+                coverage = summary.coverage.astype('int64').unstack(fill_value=0)
                 f.write("Records by Year and Building Type:\n")
                 f.write(coverage.to_string())
                 f.write("\n")
@@ -208,11 +308,9 @@ class DataAnalyzer:
     def generate_time_series_report(self):
         report_file = self.output_dir / f"04_time_series_report_{self.timestamp}.txt"
         
-        # Look for datetime-like columns
-        datetime_cols = []
-        for col in self.df.columns:
-            if any(keyword in col.lower() for keyword in ['time', 'date', 'timestamp']):
-                datetime_cols.append(col)
+        # Datetime-like columns were detected by name while loading
+        summary = self.summary
+        datetime_cols = list(summary.datetimes)
         
         with open(report_file, 'w', encoding='utf-8') as f:
             f.write("ELECTRIC POWER DATA - TIME SERIES ANALYSIS\n")
@@ -227,37 +325,37 @@ class DataAnalyzer:
                     f.write(f"\nAnalyzing column: {col}\n")
                     f.write("~" * 25 + "\n")
                     
-                    try:
-                        # Try to convert to datetime
-                        dt_series = pd.to_datetime(self.df[col], errors='coerce')
-                        valid_dates = dt_series.dropna()
+                    acc = summary.datetimes[col]
+                    if acc.valid > 0:
+                        f.write(f"Valid datetime entries: {acc.valid:,}\n")
+                        f.write(f"Invalid datetime entries: {acc.invalid:,}\n")
+                        f.write(f"Date range: {acc.min} to {acc.max}\n")
                         
-                        if len(valid_dates) > 0:
-                            f.write(f"Valid datetime entries: {len(valid_dates):,}\n")
-                            f.write(f"Invalid datetime entries: {len(dt_series) - len(valid_dates):,}\n")
-                            f.write(f"Date range: {valid_dates.min()} to {valid_dates.max()}\n")
-                            
-                            # Time span
-                            time_span = valid_dates.max() - valid_dates.min()
-                            f.write(f"Time span: {time_span.days} days\n")
-                            
-                            # Frequency analysis
-                            if len(valid_dates) > 1:
-                                time_diffs = valid_dates.diff().dropna()
-                                most_common_diff = time_diffs.mode()
-                                if len(most_common_diff) > 0:
-                                    f.write(f"Most common time interval: {most_common_diff.iloc[0]}\n")
-                        else:
-                            f.write("No valid datetime entries found\n")
-                            
-                    except Exception as e:
-                        f.write(f"Error analyzing datetime column: {e}\n")
+                        # Time span
+                        time_span = acc.max - acc.min
+                        f.write(f"Time span: {time_span.days} days\n")
+                    else:
+                        f.write("No valid datetime entries found\n")
+                
+                # Intervals are measured inside each building/file series, not across the
+                # interleaved rows, which would mix unrelated series
+                if summary.cadence is not None:
+                    f.write(f"\nSAMPLING CADENCE\n")
+                    f.write("-" * 30 + "\n")
+                    for line in format_cadence(summary.cadence):
+                        f.write(line + "\n")
+                    
+                    largest_gaps = summary.cadence.largest_gaps()
+                    if len(largest_gaps):
+                        f.write(f"\nLargest gaps:\n")
+                        f.write(largest_gaps.to_string(index=False))
+                        f.write("\n")
             else:
                 f.write("NO DATETIME COLUMNS DETECTED\n")
                 f.write("-" * 30 + "\n")
                 f.write("Searched for columns containing: 'time', 'date', 'timestamp'\n")
                 f.write("Available columns:\n")
-                for i, col in enumerate(self.df.columns, 1):
+                for i, col in enumerate(summary.columns, 1):
                     f.write(f"  {i}. {col}\n")
         
         print(f"Time series report saved to: {report_file}")
@@ -274,24 +372,25 @@ class DataAnalyzer:
             # Key Metrics
             f.write("KEY METRICS\n")
             f.write("-" * 20 + "\n")
-            f.write(f"Total Records: {len(self.df):,}\n")
-            f.write(f"Total Columns: {len(self.df.columns)}\n")
-            f.write(f"Dataset Size: {self.df.memory_usage(deep=True).sum() / 1024**2:.2f} MB\n")
+            summary = self.summary
+            f.write(f"Total Records: {summary.rows:,}\n")
+            f.write(f"Total Columns: {len(summary.columns)}\n")
+            f.write(f"Dataset Size: {summary.memory_bytes / 1024**2:.2f} MB\n")
             
-            if 'year' in self.df.columns:
-                years = sorted(self.df['year'].unique())
+            if 'year' in summary.value_counts:
+                years = summary.sorted_values('year')
                 f.write(f"Years Covered: {min(years)} - {max(years)} ({len(years)} years)\n")
             
-            if 'building_type' in self.df.columns:
-                building_types = self.df['building_type'].nunique()
+            if 'building_type' in summary.value_counts:
+                building_types = summary.distinct('building_type')
                 f.write(f"Building Types: {building_types}\n")
             
-            if 'file_name' in self.df.columns:
-                files = self.df['file_name'].nunique()
+            if 'file_name' in summary.value_counts:
+                files = summary.distinct('file_name')
                 f.write(f"Source Files: {files}\n")
             
             # Data Quality Score
-            missing_pct = (self.df.isnull().sum().sum() / (len(self.df) * len(self.df.columns))) * 100
+            missing_pct = (summary.null_counts.sum() / (summary.rows * len(summary.columns))) * 100
             quality_score = 100 - missing_pct
             f.write(f" Data Quality Score: {quality_score:.1f}%\n")
             
@@ -299,13 +398,13 @@ class DataAnalyzer:
             f.write(f"\nTOP DATA ISSUES\n")
             f.write("-" * 20 + "\n")
             
-            missing_by_col = self.df.isnull().sum().sort_values(ascending=False)
+            missing_by_col = summary.null_counts.sort_values(ascending=False)
             top_missing = missing_by_col[missing_by_col > 0].head(5)
             
             if len(top_missing) > 0:
                 f.write("Columns with most missing data:\n")
                 for col, missing in top_missing.items():
-                    pct = (missing / len(self.df)) * 100
+                    pct = (missing / summary.rows) * 100
                     f.write(f"  • {col}: {missing:,} missing ({pct:.1f}%)\n")
             else:
                 f.write("No missing data found!\n")
@@ -319,11 +418,11 @@ class DataAnalyzer:
             if missing_pct > 50:
                 f.write("High missing data - consider data cleaning\n")
             
-            numeric_cols = len(self.df.select_dtypes(include=[np.number]).columns)
+            numeric_cols = len(summary.numeric)
             if numeric_cols > 0:
                 f.write("Ready for statistical analysis\n")
             
-            if 'year' in self.df.columns and len(self.df['year'].unique()) > 1:
+            if 'year' in summary.value_counts and summary.distinct('year') > 1:
                 f.write("Suitable for trend analysis\n")
             
             f.write("\n" + "="*60 + "\n")
@@ -340,30 +439,42 @@ class DataAnalyzer:
         print("ELECTRIC POWER DATA ANALYSIS")
         print("="*40)
         
+        start = time.perf_counter()
         if not self.load_data():
             return False
+        self.report_timings = {'load_data': time.perf_counter() - start}
         
         print(f"\nGenerating analysis reports")
         print(f"Output directory: {self.output_dir.absolute()}")
         
-        # Generate all reports
+        # Generate all reports, timing each one
         reports = []
-        reports.append(self.generate_summary_dashboard())
-        reports.append(self.generate_basic_report())
-        reports.append(self.generate_statistical_report())
-        reports.append(self.generate_data_quality_report())
-        reports.append(self.generate_time_series_report())
+        for generate in (self.generate_summary_dashboard, self.generate_basic_report,
+                         self.generate_statistical_report, self.generate_data_quality_report,
+                         self.generate_time_series_report):
+            start = time.perf_counter()
+            reports.append(generate())
+            self.report_timings[generate.__name__] = time.perf_counter() - start
         
         print(f"\n Analysis complete! Generated {len(reports)} reports:")
         for report in reports:
             print(f" {report.name}")
         
+        print(f"\nTiming:")
+        for step, seconds in self.report_timings.items():
+            print(f" {step:<32} {seconds:8.2f} s")
+        
         return True
 
 # Main execution
 if __name__ == "__main__":
-    # Initialize analyzer with your CSV file
-    analyzer = DataAnalyzer("combined_electric_power_data.csv")
+    # Initialize analyzer with the Parquet store (or the legacy combined CSV);
+    # --streaming keeps memory bounded by reading the data in chunks
+    # --building-type=, --start= and --end= restrict the analysis to one window of the data
+    window = dict(arg[2:].split('=', 1) for arg in sys.argv[1:] if arg.startswith('--') and '=' in arg)
+    analyzer = DataAnalyzer(default_power_source(), streaming='--streaming' in sys.argv,
+                            building_type=window.get('building-type'), start=window.get('start'),
+                            end=window.get('end'))
     
     # Run complete analysis
     analyzer.run_complete_analysis()
@@ -1,15 +1,19 @@
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from pathlib import Path
 from collections import Counter
+from weather_storage import MEASUREMENT_COLUMNS, default_weather_source, read_weather_store
 
 
 class WeatherAnalyzer:
     
-    def __init__(self, csv_file):
+    def __init__(self, csv_file, weather_source=None):
         self.csv_file = csv_file
         self.df = pd.read_csv(csv_file)
+        # Parsed readings written by Weather_load.py, not just the file listing
+        self.weather_source = weather_source or default_weather_source()
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
     def analyze_all(self):
@@ -128,6 +132,8 @@ class WeatherAnalyzer:
                 zero_files = (self.df['File_Size_MB'] == 0).sum()
                 f.write(f"Zero-size files: {zero_files:,}\n")
             
+            self.write_measurement_summary(f)
+            
             # YEAR-EXTENSION MATRIX
             if 'Year' in self.df.columns and 'File_Extension' in self.df.columns:
                 f.write(f"\n FILES BY YEAR & TYPE\n")
@@ -171,6 +177,51 @@ class WeatherAnalyzer:
         
         print(f" Complete weather analysis saved to: {output_file}")
         return output_file
+    
+    def load_measurements(self):
+        """Readings from the weather store, or the combined CSV when no store was built"""
+        if os.path.isdir(self.weather_source):
+            return read_weather_store(self.weather_source)
+        if os.path.exists(self.weather_source):
+            readings = pd.read_csv(self.weather_source)
+            readings['Time'] = pd.to_datetime(readings['Time'], errors='coerce')
+            return readings
+        return None
+    
+    def write_measurement_summary(self, f):
+        """Reading counts, coverage and per-measurement statistics from the parsed weather data"""
+        f.write(f"\n WEATHER MEASUREMENTS\n")
+        f.write("-" * 30 + "\n")
+        readings = self.load_measurements()
+        if readings is None or readings.empty:
+            f.write(f"No parsed weather readings at {self.weather_source} - run Weather_load.py first\n")
+            return
+        
+        f.write(f"Source: {self.weather_source}\n")
+        f.write(f"Readings: {len(readings):,}\n")
+        if 'file_path' in readings.columns:
+            f.write(f"Files ingested: {readings['file_path'].nunique():,}\n")
+        times = readings['Time'].dropna()
+        if len(times) > 0:
+            f.write(f"Date range: {times.min()} to {times.max()}\n")
+            f.write(f"Duplicate timestamps: {int(times.duplicated().sum()):,}\n")
+            f.write("Readings by year:\n")
+            for year, count in times.dt.year.value_counts().sort_index().items():
+                f.write(f"  {year}: {count:,}\n")
+        f.write(f"Missing timestamps: {int(readings['Time'].isna().sum()):,}\n")
+        
+        for col in MEASUREMENT_COLUMNS:
+            if col not in readings.columns:
+                continue
+            series = readings[col].dropna()
+            missing = len(readings) - len(series)
+            f.write(f"\n{col}:\n")
+            f.write(f"  Missing: {missing:,} ({missing / len(readings) * 100:.1f}%)\n")
+            if len(series) > 0:
+                f.write(f"  Mean: {series.mean():.2f}\n")
+                f.write(f"  Min: {series.min():.2f}\n")
+                f.write(f"  Max: {series.max():.2f}\n")
+                f.write(f"  Std: {series.std():.2f}\n")
 
 # Usage
 if __name__ == "__main__":
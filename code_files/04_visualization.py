@@ -2,43 +2,64 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import os
+import sys
+import time
 import warnings
-from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
-from scipy import stats
 import seaborn as sns
+from concurrent.futures import ProcessPoolExecutor
+from power_query import load_building_power
+from power_cube import CUBE_PATH, build_cube, save_cube, load_rollup, cube_exists, combine_buildings, with_moments
+from rolling_stats import rolling_moments, rolling_statistics
+from autocorrelation import cube_correlograms, correlogram_row, hourly_matrix
+from feature_matrix import calendar_features, lagged
+from density_plot import density_grid, render_density
+from correlation import correlation_matrix, grouped_correlation, indicator_columns
 warnings.filterwarnings('ignore')
 
 
 # Set style for better plots
 plt.style.use('seaborn-v0_8')
 
-def load_power_data():
-    power_df = pd.read_csv("combined_electric_power_data.csv")
-    power_df['Time'] = pd.to_datetime(power_df['Time'])
-    power_df = power_df.dropna(subset=['Power (kW)'])
-    return power_df.sort_values('Time')
+# Output settings; --headless (or an Agg MPLBACKEND) renders without a display, in parallel
+figure_dpi = 300
+figure_format = 'png'
+headless = '--headless' in sys.argv or plt.get_backend().lower() == 'agg'
+render_workers = None  # None = one per figure, up to the CPU count
 
-def plot_rolling_statistics(df):
-    # Create a daily aggregated dataframe for smoother analysis
-    daily_df = df.groupby(df['Time'].dt.date)['Power (kW)'].agg(['mean', 'std', 'median']).reset_index()
-    daily_df['Time'] = pd.to_datetime(daily_df['Time'])
+def load_rollups(df, cube_path=CUBE_PATH, levels=('hourly', 'daily')):
+    """All-building mean/std per period from the aggregation cube, building it from df if missing"""
+    if not cube_exists(cube_path):
+        save_cube(build_cube(df), cube_path)
+    rollups = {}
+    for level in levels:
+        table = combine_buildings(load_rollup(level, cube_path))
+        rollups[level] = table.rename(columns={'period': 'Time'})
+    return rollups
+
+def rolling_statistics_data(daily_df):
+    # Daily mean/std come straight from the pre-aggregated cube
+    daily_df = daily_df[['Time', 'mean', 'std']].copy()
     
-    # Calculate rolling statistics with 30-day window
+    # Calculate rolling statistics with 30-day window from running sums
     window_size = 30
-    daily_df['rolling_mean'] = daily_df['mean'].rolling(window=window_size).mean()
-    daily_df['rolling_std'] = daily_df['std'].rolling(window=window_size).mean()
+    mean_stats = rolling_moments(daily_df['mean'], window_size)
+    daily_df['rolling_mean'] = mean_stats['mean']
+    daily_df['rolling_std'] = rolling_moments(daily_df['std'], window_size)['mean']
     daily_df['rolling_cv'] = daily_df['rolling_std'] / daily_df['rolling_mean']  # Coefficient of variation
-    daily_df['rolling_skew'] = daily_df['mean'].rolling(window=window_size).apply(lambda x: stats.skew(x))
-    
+    daily_df['rolling_skew'] = mean_stats['skew']
+    return {col: daily_df[col].to_numpy() for col in
+            ['Time', 'rolling_mean', 'rolling_std', 'rolling_cv', 'rolling_skew']}
+
+def render_rolling_statistics(data):
     # Plot the rolling statistics
     fig, axs = plt.subplots(3, 1, figsize=(15, 15), sharex=True)
     
     # Rolling mean and standard deviation
-    axs[0].plot(daily_df['Time'], daily_df['rolling_mean'], 
+    axs[0].plot(data['Time'], data['rolling_mean'], 
                 label='30-day Rolling Mean', color='blue', linewidth=2)
-    axs[0].fill_between(daily_df['Time'], 
-                       daily_df['rolling_mean'] - daily_df['rolling_std'],
-                       daily_df['rolling_mean'] + daily_df['rolling_std'],
+    axs[0].fill_between(data['Time'], 
+                       data['rolling_mean'] - data['rolling_std'],
+                       data['rolling_mean'] + data['rolling_std'],
                        color='blue', alpha=0.2, label='±1 Std Dev')
     axs[0].set_title('Rolling Mean with Standard Deviation Band (30-day window)', 
                     fontsize=14, fontweight='bold')
@@ -47,7 +68,7 @@ def plot_rolling_statistics(df):
     axs[0].grid(True, alpha=0.3)
     
     # Coefficient of variation
-    axs[1].plot(daily_df['Time'], daily_df['rolling_cv'], 
+    axs[1].plot(data['Time'], data['rolling_cv'], 
                 label='Coefficient of Variation', color='green', linewidth=2)
     axs[1].set_title('Rolling Coefficient of Variation (30-day window)', 
                     fontsize=14, fontweight='bold')
@@ -56,7 +77,7 @@ def plot_rolling_statistics(df):
     axs[1].grid(True, alpha=0.3)
     
     # Skewness
-    axs[2].plot(daily_df['Time'], daily_df['rolling_skew'], 
+    axs[2].plot(data['Time'], data['rolling_skew'], 
                 label='Skewness', color='purple', linewidth=2)
     axs[2].axhline(y=0, color='red', linestyle='--', alpha=0.7)
     axs[2].set_title('Rolling Skewness (30-day window)', fontsize=14, fontweight='bold')
@@ -66,19 +87,67 @@ def plot_rolling_statistics(df):
     axs[2].grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig('08_rolling_statistics.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    return fig
+
+def save_building_rolling_statistics(cube_path=CUBE_PATH, windows=(7, 30, 90),
+                                    output_file='rolling_statistics_by_building.csv'):
+    # Rolling diagnostics of the daily mean for every building type and window in one call
+    daily_by_building = with_moments(load_rollup('daily', cube_path)).rename(columns={'period': 'Time'})
+    rolling_df = rolling_statistics(daily_by_building, 'mean', windows=windows, by='building_type')
+    rolling_df.to_csv(output_file, index=False)
+    print(f"Rolling statistics for {daily_by_building['building_type'].nunique()} building types "
+          f"and windows {list(windows)} saved to: {output_file}")
+    return rolling_df
+
+def plot_correlogram(ax, values, band, title):
+    # Stem plot with the significance band around zero, as statsmodels draws it
+    lags = np.arange(len(values))
+    ax.vlines(lags, 0, values, color='tab:blue')
+    ax.plot(lags, values, 'o', color='tab:blue', markersize=4)
+    ax.fill_between(lags, -band, band, color='tab:blue', alpha=0.25, linewidth=0)
+    ax.axhline(y=0, color='black', linewidth=0.8)
+    ax.set_title(title, fontsize=14, fontweight='bold')
 
-def plot_autocorrelation(df):
-    # Create hourly resampled data for autocorrelation analysis
-    hourly_df = df.set_index('Time').resample('H')['Power (kW)'].mean().reset_index()
+def autocorrelation_data(hourly_rollup, correlograms):
+    # ACF/PACF of the all-building hourly mean come from the cached correlograms
+    row = correlogram_row(correlograms, ('All',))
+    correlogram = {'acf': correlograms['acf'][row, :169], 'acf_band': correlograms['acf_band'][row, :169],
+                   'pacf': correlograms['pacf'][row, :73],
+                   'pacf_band': np.r_[0, np.full(72, correlograms['pacf_band'][row])]}
+    
+    # Hourly mean on a regular grid, so a lag is a slice offset rather than a shifted copy
+    _, starts, grid = hourly_matrix(hourly_rollup, by=(), time_col='Time')
+    power = grid[0]
+    lags = [1, 24, 48, 168]  # 1 hour, 1 day, 2 days, 1 week
+    
+    times = starts[0] + np.arange(len(power)) * np.timedelta64(1, 'h')
+    columns = {'Time': times, 'Power (kW)': power}
+    columns.update(calendar_features(times, ('hour', 'day_of_week', 'month')))
+    columns.update({f'lag_{lag}h': lagged(power, lag) for lag in lags})
+    hourly_df = pd.DataFrame(columns)
+    
+    # Drop NaN values from lagged features
     hourly_df = hourly_df.dropna()
     
+    # Pairs (t-lag, t) are two views of the same array, binned into density rasters on a shared range
+    power_range = (np.nanmin(power), np.nanmax(power)) if np.isfinite(power).any() else None
+    pairs = {}
+    for lag in lags:
+        previous, current = power[:-lag], power[lag:]
+        paired = ~np.isnan(previous) & ~np.isnan(current)
+        previous, current = previous[paired], current[paired]
+        corr = np.corrcoef(previous, current)[0, 1] if len(current) > 1 else np.nan
+        pairs[lag] = (density_grid(previous, current, width=400, height=400,
+                                   x_range=power_range, y_range=power_range), corr)
+    
+    return correlogram, pairs, hourly_df  # hourly_df carries the lag features for correlation analysis
+
+def render_autocorrelation(correlogram):
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 12))
     
     # Autocorrelation function (ACF) - shows correlation with lagged values
-    plot_acf(hourly_df['Power (kW)'], lags=168, ax=ax1)  # 168 hours = 1 week
-    ax1.set_title('Autocorrelation Function (Hourly Data)', fontsize=14, fontweight='bold')
+    plot_correlogram(ax1, correlogram['acf'], correlogram['acf_band'],
+                     'Autocorrelation Function (Hourly Data)')  # 168 hours = 1 week
     ax1.grid(True, alpha=0.3)
     
     # Add vertical lines at 24, 48, 72, ... hours to highlight daily patterns
@@ -87,8 +156,8 @@ def plot_autocorrelation(df):
                    label='Daily cycle' if i==1 else None)
     
     # Partial Autocorrelation Function (PACF) - shows direct correlation with lagged values
-    plot_pacf(hourly_df['Power (kW)'], lags=72, ax=ax2)  # 72 hours = 3 days
-    ax2.set_title('Partial Autocorrelation Function (Hourly Data)', fontsize=14, fontweight='bold')
+    plot_correlogram(ax2, correlogram['pacf'], correlogram['pacf_band'],
+                     'Partial Autocorrelation Function (Hourly Data)')  # 72 hours = 3 days
     ax2.grid(True, alpha=0.3)
     
     # Add vertical lines at 24, 48, 72 hours
@@ -97,133 +166,163 @@ def plot_autocorrelation(df):
                    label='Daily cycle' if i==1 else None)
     
     plt.tight_layout()
-    plt.savefig('09_autocorrelation.png', dpi=300, bbox_inches='tight')
-    plt.show()
-    
-    # Create a more detailed daily lag plot
-    plt.figure(figsize=(15, 8))
-    
-    # Add time features for correlation analysis
-    hourly_df['hour'] = hourly_df['Time'].dt.hour
-    hourly_df['day_of_week'] = hourly_df['Time'].dt.dayofweek
-    hourly_df['month'] = hourly_df['Time'].dt.month
-    
-    # Create lagged features
-    for lag in [1, 24, 48, 168]:  # 1 hour, 1 day, 2 days, 1 week
-        hourly_df[f'lag_{lag}h'] = hourly_df['Power (kW)'].shift(lag)
-    
-    # Drop NaN values from lagged features
-    hourly_df = hourly_df.dropna()
-    
+    return fig
+
+def render_lag_scatter(pairs):
     # Create scatter plots of current vs lagged values
     fig, axs = plt.subplots(2, 2, figsize=(15, 12))
     axs = axs.flatten()
     
-    lags = [1, 24, 48, 168]
     titles = ['1-Hour Lag', '24-Hour (Daily) Lag', '48-Hour (2-Day) Lag', '168-Hour (Weekly) Lag']
     
-    for i, (lag, title) in enumerate(zip(lags, titles)):
-        axs[i].scatter(hourly_df[f'lag_{lag}h'], hourly_df['Power (kW)'], 
-                      alpha=0.5, s=10, color='blue')
+    for i, ((lag, (grid, corr)), title) in enumerate(zip(pairs.items(), titles)):
+        # Point density raster instead of one marker per pair
+        render_density(axs[i], grid)
         
         # Add correlation coefficient
-        corr = hourly_df[f'lag_{lag}h'].corr(hourly_df['Power (kW)'])
         axs[i].set_title(f'{title}\nCorrelation: {corr:.3f}', fontsize=14, fontweight='bold')
         axs[i].set_xlabel(f'Power (kW) at t-{lag}')
         axs[i].set_ylabel('Power (kW) at t')
         axs[i].grid(True, alpha=0.3)
         
         # Add diagonal line
-        min_val = min(hourly_df[f'lag_{lag}h'].min(), hourly_df['Power (kW)'].min())
-        max_val = max(hourly_df[f'lag_{lag}h'].max(), hourly_df['Power (kW)'].max())
+        if grid['points'] == 0:
+            continue
+        min_val, max_val = grid['x_range']
         axs[i].plot([min_val, max_val], [min_val, max_val], 'r--', alpha=0.7)
     
     plt.tight_layout()
-    plt.savefig('10_lag_scatter_plots.png', dpi=300, bbox_inches='tight')
-    plt.show()
-    
-    return hourly_df  # Return the hourly dataframe with lag features for correlation analysis
+    return fig
 
-def plot_spearman_correlation(hourly_df, df):
-    # Create correlation matrices
+def power_density_data(df, width=1200, height=300):
+    # Every raw reading of every building type, binned to one raster per building type
+    power_range = (df['Power (kW)'].min(), df['Power (kW)'].max()) if df['Power (kW)'].notna().any() else None
+    time_range = (df['Time'].min().value, df['Time'].max().value) if len(df) else None
+    grids = {}
+    for building_type, group in df.groupby('building_type', observed=True, sort=True):
+        grids[building_type] = density_grid(group['Time'].to_numpy(), group['Power (kW)'].to_numpy(),
+                                            width=width, height=height, x_range=time_range, y_range=power_range)
+    return grids
+
+def render_power_density(grids):
+    fig, axs = plt.subplots(max(len(grids), 1), 1, figsize=(15, 3.5 * max(len(grids), 1)),
+                            sharex=True, squeeze=False)
+    for ax, (building_type, grid) in zip(axs[:, 0], grids.items()):
+        render_density(ax, grid)
+        ax.set_title(f'{building_type}: {grid["points"]:,} readings', fontsize=14, fontweight='bold')
+        ax.set_ylabel('Power (kW)')
+    axs[-1, 0].set_xlabel('Date')
+    plt.tight_layout()
+    return fig
+
+def spearman_correlation_data(hourly_df, df):
+    # Correlation matrices are computed once here; rendering only draws them
+    matrices = {}
     
     # 1. Time features correlation with power
-    plt.figure(figsize=(12, 10))
-    
-    # Create time features for original dataframe
-    df_time = df.copy()
-    df_time['hour'] = df_time['Time'].dt.hour
-    df_time['day_of_week'] = df_time['Time'].dt.dayofweek
-    df_time['day_of_month'] = df_time['Time'].dt.day
-    df_time['month'] = df_time['Time'].dt.month
-    df_time['year'] = df_time['Time'].dt.year
-    df_time['is_weekend'] = df_time['Time'].dt.dayofweek >= 5
-    
-    # Select features for correlation
+    # Calendar features straight from the Time column, without copying the raw frame
     time_features = ['hour', 'day_of_week', 'day_of_month', 'month', 'year', 'is_weekend', 'Power (kW)']
-    
-    # Calculate Spearman correlation
-    corr_time = df_time[time_features].corr(method='spearman')
-    
-    # Plot heatmap
-    sns.heatmap(corr_time, annot=True, cmap='coolwarm', vmin=-1, vmax=1, center=0, 
-               fmt='.2f', linewidths=0.5)
-    plt.title('Spearman Correlation: Time Features vs Power', fontsize=16, fontweight='bold')
-    plt.tight_layout()
-    plt.savefig('11_spearman_correlation_time.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    time_columns = calendar_features(df['Time'].to_numpy(), time_features[:-1])
+    time_columns['Power (kW)'] = df['Power (kW)'].to_numpy()
+    # Each column is ranked once into int32 and the matrix is one product of the ranks
+    matrices['11_spearman_correlation_time'] = (correlation_matrix(time_columns),
+                                                'Spearman Correlation: Time Features vs Power')
     
     # 2. Lag features correlation with power
-    plt.figure(figsize=(12, 10))
-    
-    # Select lag features
     lag_cols = [col for col in hourly_df.columns if 'lag_' in col] + ['Power (kW)', 'hour', 'day_of_week', 'month']
-    
-    # Calculate Spearman correlation
-    corr_lag = hourly_df[lag_cols].corr(method='spearman')
-    
-    # Plot heatmap
-    sns.heatmap(corr_lag, annot=True, cmap='coolwarm', vmin=-1, vmax=1, center=0, 
-               fmt='.2f', linewidths=0.5)
-    plt.title('Spearman Correlation: Lag Features vs Power', fontsize=16, fontweight='bold')
-    plt.tight_layout()
-    plt.savefig('12_spearman_correlation_lag.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    matrices['12_spearman_correlation_lag'] = (correlation_matrix({col: hourly_df[col].to_numpy() for col in lag_cols}),
+                                               'Spearman Correlation: Lag Features vs Power')
     
     # 3. Building type correlation analysis
     if 'building_type' in df.columns:
-        # Create dummy variables for building types
-        building_dummies = pd.get_dummies(df['building_type'], prefix='building')
-        df_building = pd.concat([df[['Power (kW)']], building_dummies], axis=1)
-        
-        # Calculate Spearman correlation
-        corr_building = df_building.corr(method='spearman')
+        # Indicator arrays per building type instead of a get_dummies frame
+        building_columns = {'Power (kW)': time_columns['Power (kW)']}
+        building_columns.update(indicator_columns(df['building_type'], 'building'))
+        matrices['13_spearman_correlation_building'] = (correlation_matrix(building_columns),
+                                                        'Spearman Correlation: Building Types vs Power')
         
-        # Plot heatmap
-        plt.figure(figsize=(12, 10))
-        sns.heatmap(corr_building, annot=True, cmap='coolwarm', vmin=-1, vmax=1, center=0, 
-                   fmt='.2f', linewidths=0.5)
-        plt.title('Spearman Correlation: Building Types vs Power', fontsize=16, fontweight='bold')
-        plt.tight_layout()
-        plt.savefig('13_spearman_correlation_building.png', dpi=300, bbox_inches='tight')
+        # 4. Time features vs power within every building type and year, ranked per group
+        grouped = grouped_correlation({name: time_columns[name] for name in time_features if name != 'year'},
+                                      (df['building_type'].to_numpy(), time_columns['year']))
+        by_group = pd.DataFrame({f"{building_type} {int(year)}": corr['Power (kW)'].drop('Power (kW)')
+                                 for (building_type, year), corr in grouped.items()}).T
+        matrices['15_spearman_power_by_building_year'] = (
+            by_group, 'Spearman Correlation with Power by Building Type and Year')
+    return matrices
+
+def render_heatmap(data):
+    corr, title = data
+    fig = plt.figure(figsize=(12, 10))
+    sns.heatmap(corr, annot=True, cmap='coolwarm', vmin=-1, vmax=1, center=0, 
+               fmt='.2f', linewidths=0.5)
+    plt.title(title, fontsize=16, fontweight='bold')
+    plt.tight_layout()
+    return fig
+
+def _render_figure(job):
+    """Draw and save one figure; runs inside a worker process in headless mode"""
+    renderer, data, name, dpi, fmt, show = job
+    began = time.perf_counter()
+    fig = renderer(data)
+    output_file = f"{name}.{fmt}"
+    fig.savefig(output_file, dpi=dpi, bbox_inches='tight')
+    if show:
         plt.show()
+    plt.close(fig)
+    return output_file, time.perf_counter() - began
+
+def render_figures(jobs, dpi=300, fmt='png', headless=False, n_workers=None):
+    """Render (renderer, data, name) jobs and report the render time of each figure
 
-def main():
+    Interactive runs draw one figure after another and show each one. Headless
+    runs use the Agg backend, never block on show, and render the independent
+    figures concurrently in a process pool from the precomputed data.
+    """
+    tasks = [(renderer, data, name, dpi, fmt, not headless) for renderer, data, name in jobs]
+    n_workers = 1 if not headless else (n_workers or min(len(tasks), os.cpu_count() or 1))
+    began = time.perf_counter()
+    if n_workers == 1 or len(tasks) <= 1:
+        results = [_render_figure(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=plt.switch_backend,
+                                 initargs=('Agg',)) as executor:
+            results = list(executor.map(_render_figure, tasks))
+    elapsed = time.perf_counter() - began
+    
+    print(f"\nRENDER TIMES ({n_workers} workers, {dpi} dpi {fmt})")
+    print("-" * 30)
+    for output_file, seconds in results:
+        print(f"{output_file:<40} {seconds:>7.2f}s")
+    print(f"{'Total (wall clock)':<40} {elapsed:>7.2f}s")
+    return results
+
+def main(dpi=figure_dpi, fmt=figure_format, headless=headless, n_workers=render_workers):
     print("Creating Power Load Time Series Analysis with Enhanced Visualizations...")
+    if headless:
+        plt.switch_backend('Agg')
     
     # Load data
-    df = load_power_data()
+    df = load_building_power()
     print(f"Loaded {len(df)} records")
+    rollups = load_rollups(df)
+    
+    # Everything the figures need is computed up front; rendering then only draws
+    print("Computing rolling statistics...")
+    jobs = [(render_rolling_statistics, rolling_statistics_data(rollups['daily']), '08_rolling_statistics')]
+    save_building_rolling_statistics()
     
-    # Plot new visualizations
-    print("Generating rolling statistics plots...")
-    plot_rolling_statistics(df)
+    print("Computing autocorrelation...")
+    correlogram, pairs, hourly_df = autocorrelation_data(rollups['hourly'], cube_correlograms())
+    jobs.append((render_autocorrelation, correlogram, '09_autocorrelation'))
+    jobs.append((render_lag_scatter, pairs, '10_lag_scatter_plots'))
+    jobs.append((render_power_density, power_density_data(df), '14_power_density'))
     
-    print("Generating autocorrelation plots...")
-    hourly_df = plot_autocorrelation(df)
+    print("Computing Spearman correlation matrices...")
+    for name, matrix in spearman_correlation_data(hourly_df, df).items():
+        jobs.append((render_heatmap, matrix, name))
     
-    print("Generating Spearman correlation matrices...")
-    plot_spearman_correlation(hourly_df, df)
+    print("Rendering figures...")
+    render_figures(jobs, dpi=dpi, fmt=fmt, headless=headless, n_workers=n_workers)
     
     print("Analysis complete. All plots saved.")
     
@@ -0,0 +1,19 @@
+from power_query import load_building_power
+from forecasting import run_forecasting
+
+
+# ISO country code for the is_holiday feature; None leaves it out, since the data does not say
+holiday_country = None
+
+def main(holiday_country=holiday_country):
+    print("Creating load forecasting baselines...")
+    
+    # Load data
+    df = load_building_power()
+    print(f"Loaded {len(df)} records")
+    
+    run_forecasting(df, holiday_country=holiday_country)
+    print("Forecasting complete.")
+
+if __name__ == "__main__":
+    main()
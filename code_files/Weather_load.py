@@ -1,16 +1,24 @@
 import os
+import sys
 import csv
 from datetime import datetime
 from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+from weather_storage import (WEATHER_STORE, normalize_weather_frame, write_weather_store, write_weather_years,
+                             drop_weather_years, read_weather_store)
+from ingest_manifest import load_ingest_manifest, save_ingest_manifest, find_changed_files, record_ingested
 
 
+# Weather base path
+weather_base = r"C:\Users\karti\Desktop\data_set\Weather data\Weather data"
+WEATHER_EXTENSIONS = ('.xlsx', '.xls', '.csv', '.txt')
+
+# Worker processes used to parse files (1 = sequential, None = one per CPU)
+ingest_workers = None
+
 def list_weather_files_to_csv():
     """List weather files and save to CSV with comprehensive reporting"""
-
-    
-    # Weather base path
-    weather_base = r"C:\Users\karti\Desktop\data_set\Weather data\Weather data"
     
     print("LISTING ALL WEATHER FILES")
     print("="*50)
@@ -28,7 +36,7 @@ def list_weather_files_to_csv():
     
     for root, dirs, files in os.walk(weather_base):
         for file in files:
-            if file.endswith(('.xlsx', '.xls', '.csv', '.txt')):
+            if file.endswith(WEATHER_EXTENSIONS):
                 full_path = os.path.join(root, file)
                 print(full_path)
                 weather_count += 1
@@ -232,5 +240,107 @@ def generate_summary_report_file(weather_count, years_found, year_stats, extensi
     
     print(f"\n📄 Detailed report saved: {report_filename}")
 
-if __name__ == "__main__":
+def find_weather_files():
+    """Weather workbooks/CSVs under weather_base, in a deterministic order"""
+    all_files = []
+    for root, dirs, files in os.walk(weather_base):
+        dirs.sort()
+        all_files.extend(os.path.join(root, file) for file in sorted(files) if file.endswith(WEATHER_EXTENSIONS))
+    return all_files
+
+def read_weather_file(file_path):
+    """Parse one weather file into Time plus float32 temperature/humidity columns"""
+    if file_path.endswith('.csv'):
+        raw_df = pd.read_csv(file_path)
+    elif file_path.endswith('.txt'):
+        raw_df = pd.read_csv(file_path, sep=None, engine='python')
+    else:
+        raw_df = pd.read_excel(file_path)
+    return normalize_weather_frame(raw_df, file_path)
+
+def _load_weather_chunk(chunk):
+    """Parse one directory's files; runs inside a worker process"""
+    results = []
+    for file_path in chunk:
+        try:
+            results.append((file_path, read_weather_file(file_path), None))
+        except Exception as e:
+            results.append((file_path, None, f"{type(e).__name__}: {e}"))
+    return results
+
+def ingest_weather_files(all_files, n_workers=1):
+    """Parse files sequentially or over a process pool; returns (weather_df, errors)"""
+    chunks = {}
+    for file_path in all_files:
+        chunks.setdefault(os.path.dirname(file_path), []).append(file_path)
+    chunks = [chunks[key] for key in sorted(chunks)]
+    
+    if n_workers == 1 or len(chunks) <= 1:
+        results = [result for chunk in chunks for result in _load_weather_chunk(chunk)]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = [result for chunk_results in executor.map(_load_weather_chunk, chunks)
+                       for result in chunk_results]
+    
+    frames, errors = [], []
+    for file_path, df, error in results:
+        if error is None:
+            frames.append(df.assign(file_path=file_path))
+        else:
+            errors.append({'file_path': file_path, 'error': error})
+    weather_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return weather_df, errors
+
+def update_weather_store(store_path=WEATHER_STORE, manifest_file="weather_manifest.csv", n_workers=1,
+                         error_manifest="weather_ingest_errors.csv"):
+    """Parse new or changed weather files into the store and drop rows of removed ones"""
+    print("\n" + "="*50)
+    print("WEATHER MEASUREMENT INGEST")
+    print("="*50)
+    
+    # Without an existing store the manifest is meaningless - rebuild everything
+    manifest = load_ingest_manifest(manifest_file) if os.path.isdir(store_path) else {}
+    all_files = find_weather_files()
+    new_files, changed_files, removed_files, signatures = find_changed_files(all_files, manifest)
+    print(f"New files: {len(new_files)}, changed: {len(changed_files)}, removed: {len(removed_files)}")
+    
+    to_load = sorted(new_files + changed_files)
+    new_df, errors = ingest_weather_files(to_load, n_workers=n_workers) if to_load else (pd.DataFrame(), [])
+    if errors:
+        pd.DataFrame(errors).to_csv(error_manifest, index=False)
+        print(f"{len(errors)} files failed to load - see {error_manifest}")
+    elif os.path.exists(error_manifest):
+        os.remove(error_manifest)
+    
+    stale = set(changed_files) | set(removed_files)
+    if not os.path.isdir(store_path):
+        if not new_df.empty:
+            write_weather_store(new_df, store_path)
+    elif stale or not new_df.empty:
+        # Weather is small: rewrite only the years touched by new rows or by stale files
+        existing_df = read_weather_store(store_path)
+        is_stale = existing_df['file_path'].isin(stale)
+        affected = set(existing_df.loc[is_stale, 'Time'].dt.year.astype(str))
+        if not new_df.empty:
+            affected |= set(new_df['Time'].dt.year.astype(str))
+        kept_df = existing_df[~is_stale & existing_df['Time'].dt.year.astype(str).isin(affected)]
+        rebuilt_df = pd.concat([kept_df, new_df], ignore_index=True)
+        write_weather_years(rebuilt_df, store_path)
+        drop_weather_years(affected - set(rebuilt_df['Time'].dt.year.astype(str)), store_path)
+    
+    # Record what was ingested; failed files stay out of the manifest and are retried next run
+    for file_path in removed_files:
+        manifest.pop(file_path, None)
+    record_ingested(manifest, to_load, signatures, errors, new_df)
+    save_ingest_manifest(manifest, manifest_file)
+    
+    print(f"Added {len(new_df)} weather readings to {store_path}")
+    return new_df
+
+if __name__ == "__main__" and '--incremental' in sys.argv:
+    # Only parse weather files that are new or changed since the last run
+    update_weather_store(n_workers=ingest_workers)
+
+elif __name__ == "__main__":
     weather_data, csv_file = list_weather_files_to_csv()
+    update_weather_store(n_workers=ingest_workers)
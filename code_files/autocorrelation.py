@@ -0,0 +1,169 @@
+import os
+import numpy as np
+import pandas as pd
+from power_cube import CUBE_PATH, load_rollup, combine_buildings, with_moments, rollup_mtime
+
+
+CORRELOGRAM_CACHE = "correlograms.npz"
+Z_95 = 1.959963984540054
+
+def _fft_size(n):
+    """Smallest power of two that holds a linear (not circular) autocovariance of length n"""
+    return 1 << int(np.ceil(np.log2(max(2 * n - 1, 1))))
+
+def acf_fft(series, nlags):
+    """Biased ACF (as statsmodels acf with fft=True) for every row of a 2-D array
+
+    Rows may have different lengths: pad the tail with NaN. Missing values
+    are replaced by the row mean, so they add nothing to the autocovariance
+    but still count towards the denominator. Lags at or beyond a row's
+    length are NaN.
+    """
+    series = np.atleast_2d(np.asarray(series, dtype=np.float64))
+    n_series, length = series.shape
+    valid = ~np.isnan(series)
+    counts = valid.sum(axis=1)
+    # Lengths run up to the last observed value of each row
+    lengths = np.where(valid.any(axis=1), length - np.argmax(valid[:, ::-1], axis=1), 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(counts > 0, np.nansum(series, axis=1) / counts, 0.0)
+    centred = np.where(valid, series - means[:, None], 0.0)
+
+    size = _fft_size(length)
+    spectrum = np.fft.rfft(centred, n=size, axis=1)
+    autocov = np.fft.irfft(spectrum * np.conj(spectrum), n=size, axis=1)[:, :nlags + 1]
+    if autocov.shape[1] < nlags + 1:
+        autocov = np.pad(autocov, ((0, 0), (0, nlags + 1 - autocov.shape[1])), constant_values=np.nan)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        acf = autocov / autocov[:, :1]
+    acf[np.arange(nlags + 1)[None, :] >= lengths[:, None]] = np.nan
+    return acf
+
+def pacf_levinson(acf, nlags):
+    """PACF from ACF rows by Levinson-Durbin recursion (statsmodels method='ywm')
+
+    The recursion runs once over the lags and is vectorized across rows, so
+    many series cost the same number of Python steps as one.
+    """
+    acf = np.atleast_2d(np.asarray(acf, dtype=np.float64))
+    nlags = min(nlags, acf.shape[1] - 1)
+    pacf = np.full((acf.shape[0], nlags + 1), np.nan)
+    pacf[:, 0] = 1.0
+    if nlags == 0:
+        return pacf
+
+    phi = np.zeros((acf.shape[0], nlags + 1))
+    phi[:, 1] = acf[:, 1]
+    pacf[:, 1] = acf[:, 1]
+    error = 1.0 - acf[:, 1] ** 2
+    for k in range(2, nlags + 1):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            reflection = (acf[:, k] - np.einsum('ij,ij->i', phi[:, 1:k], acf[:, k - 1:0:-1])) / error
+        phi[:, 1:k] = phi[:, 1:k] - reflection[:, None] * phi[:, k - 1:0:-1]
+        phi[:, k] = reflection
+        pacf[:, k] = reflection
+        error = error * (1.0 - reflection ** 2)
+    return pacf
+
+def acf_confint(acf, nobs, alpha_z=Z_95):
+    """Bartlett half-widths for the ACF, as drawn by statsmodels plot_acf"""
+    acf = np.atleast_2d(acf)
+    nobs = np.asarray(nobs, dtype=np.float64).reshape(-1, 1)
+    cumulative = np.cumsum(np.nan_to_num(acf[:, 1:]) ** 2, axis=1)
+    variance = np.concatenate([np.zeros((acf.shape[0], 1)), np.ones((acf.shape[0], 1)) / nobs,
+                               (1 + 2 * cumulative[:, :-1]) / nobs], axis=1)
+    return alpha_z * np.sqrt(variance[:, :acf.shape[1]])
+
+def pacf_confint(nobs, alpha_z=Z_95):
+    """Half-width of the PACF significance band for each series"""
+    return alpha_z / np.sqrt(np.asarray(nobs, dtype=np.float64))
+
+def hourly_matrix(table, value_col='mean', by=('building_type',), time_col='period', freq='h'):
+    """One regular-grid row per group from a long (group, time, value) table
+
+    Missing periods become NaN so lag k always means k periods apart. Returns
+    (keys, start times, 2-D float64 array padded with NaN).
+    """
+    by = list(by)
+    grouped = table.groupby(by, observed=True, sort=True) if by else [((), table)]
+    step = pd.to_timedelta(pd.tseries.frequencies.to_offset(freq)).to_timedelta64()
+    keys, starts, rows = [], [], []
+    for key, group in grouped:
+        times = group[time_col].to_numpy(dtype='datetime64[ns]')
+        start = times.min()
+        positions = ((times - start) // step).astype(np.int64)
+        row = np.full(positions.max() + 1, np.nan)
+        row[positions] = group[value_col].to_numpy(dtype=np.float64)
+        keys.append(key if isinstance(key, tuple) else (key,))
+        starts.append(start)
+        rows.append(row)
+    matrix = np.full((len(rows), max((len(r) for r in rows), default=0)), np.nan)
+    for i, row in enumerate(rows):
+        matrix[i, :len(row)] = row
+    return keys, np.array(starts, dtype='datetime64[ns]'), matrix
+
+def compute_correlograms(keys, matrix, nlags=8760, pacf_lags=168):
+    """ACF, PACF and significance bands for every row of matrix"""
+    nobs = (~np.isnan(matrix)).sum(axis=1)
+    acf = acf_fft(matrix, nlags)
+    pacf = pacf_levinson(acf, pacf_lags)
+    return {'keys': np.array(['|'.join(map(str, key)) for key in keys]), 'nobs': nobs,
+            'acf': acf, 'pacf': pacf, 'acf_band': acf_confint(acf, nobs), 'pacf_band': pacf_confint(nobs)}
+
+def save_correlograms(correlograms, cache_file=CORRELOGRAM_CACHE, source_mtime=None):
+    np.savez(cache_file, source_mtime=np.float64(source_mtime or 0), **correlograms)
+    print(f"Correlograms saved to: {cache_file}")
+
+def load_correlograms(cache_file=CORRELOGRAM_CACHE, source_mtime=None, nlags=None, pacf_lags=None):
+    """Cached correlograms, or None when missing, stale or too short for the requested lags"""
+    if not os.path.exists(cache_file):
+        return None
+    with np.load(cache_file) as cached:
+        correlograms = {name: cached[name] for name in cached.files}
+    if source_mtime is not None and correlograms.pop('source_mtime') != np.float64(source_mtime):
+        return None
+    correlograms.pop('source_mtime', None)
+    if nlags is not None and correlograms['acf'].shape[1] < nlags + 1:
+        return None
+    if pacf_lags is not None and correlograms['pacf'].shape[1] < pacf_lags + 1:
+        return None
+    return correlograms
+
+def correlogram_row(correlograms, key):
+    """Index of a series in the correlogram arrays, by its group key tuple"""
+    return int(np.flatnonzero(correlograms['keys'] == '|'.join(map(str, key)))[0])
+
+def significant_lags(acf, band, top_n=10, min_lag=1):
+    """Lags with the largest significant |ACF|, strongest first, for feature selection"""
+    acf, band = np.asarray(acf), np.asarray(band)
+    lags = np.arange(len(acf))
+    strength = np.where((lags >= min_lag) & (np.abs(acf) > band), np.abs(acf), -np.inf)
+    order = np.argsort(strength)[::-1][:top_n]
+    return lags[order][np.isfinite(strength[order])]
+
+def cube_correlograms(cube_path=CUBE_PATH, nlags=8760, pacf_lags=168, cache_file=CORRELOGRAM_CACHE):
+    """Hourly-mean correlograms for all buildings combined, each building_type and each year of it
+
+    Keys are ('All',), (building_type,) and (building_type, year). The arrays
+    are cached in cache_file and reused until the hourly rollup changes.
+    """
+    source_mtime = rollup_mtime('hourly', cube_path)
+    cached = load_correlograms(cache_file, source_mtime, nlags, pacf_lags)
+    if cached is not None:
+        return cached
+
+    hourly = with_moments(load_rollup('hourly', cube_path))
+    hourly['year'] = hourly['period'].dt.year.astype(str)
+    combined = combine_buildings(hourly)
+    all_keys, _, all_matrix = hourly_matrix(combined, by=())
+    building_keys, _, building_matrix = hourly_matrix(hourly, by=('building_type',))
+    year_keys, _, year_matrix = hourly_matrix(hourly, by=('building_type', 'year'))
+
+    width = max(all_matrix.shape[1], building_matrix.shape[1], year_matrix.shape[1])
+    matrix = np.vstack([np.pad(m, ((0, 0), (0, width - m.shape[1])), constant_values=np.nan)
+                        for m in (all_matrix, building_matrix, year_matrix)])
+    keys = [('All',)] + building_keys + year_keys
+    correlograms = compute_correlograms(keys, matrix, nlags, pacf_lags)
+    save_correlograms(correlograms, cache_file, source_mtime)
+    return correlograms
@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+from duplicate_detection import hash_rows
+
+
+# A series is one source file of one building type; readings inside it should be regular
+SERIES_KEY = ('building_type', 'file_path')
+
+def _run_starts(flags):
+    """Positions where a run of True values begins"""
+    return flags & ~np.r_[False, flags[:-1]]
+
+def modal_intervals(step_series, steps, n_series):
+    """Most common positive step per series code (0 where a series has none)
+
+    Uses run lengths of the sorted (series, step) pairs, so ties go to the
+    shorter step.
+    """
+    modal = np.zeros(n_series, dtype=np.int64)
+    positive = steps > 0
+    if positive.any():
+        pair_series, pair_steps = step_series[positive], steps[positive]
+        pair_order = np.lexsort((pair_steps, pair_series))
+        pair_series, pair_steps = pair_series[pair_order], pair_steps[pair_order]
+        boundary = np.r_[True, (pair_series[1:] != pair_series[:-1]) | (pair_steps[1:] != pair_steps[:-1])]
+        run_starts = np.flatnonzero(boundary)
+        run_lengths = np.diff(np.r_[run_starts, len(pair_series)])
+        run_series, run_steps = pair_series[run_starts], pair_steps[run_starts]
+        best = np.lexsort((-run_lengths, run_series))
+        first = np.r_[True, run_series[best][1:] != run_series[best][:-1]]
+        modal[run_series[best][first]] = run_steps[best][first]
+    return modal
+
+def _cadence_parts(times, keys, top_n=10):
+    """Mergeable cadence statistics for int64 epoch-ns times grouped by uint64 series keys
+
+    Gaps depend on each series' modal step, which is only known once every
+    chunk is seen, so this returns the per-series step histogram and each
+    series' top_n largest steps instead of gap counts.
+    """
+    codes, uniques = pd.factorize(keys)
+    codes = codes.astype(np.int64)
+
+    # Original order inside each series: detects out-of-order stretches
+    order = np.argsort(codes, kind='stable')
+    c, t = codes[order], times[order]
+    same = c[1:] == c[:-1]
+    backwards = (np.diff(t) < 0) & same
+    out_of_order_runs = int(np.count_nonzero(_run_starts(backwards)))
+
+    # Time-sorted order inside each series: interval distribution, overlaps and gap candidates
+    order = np.lexsort((times, codes))
+    c, t = codes[order], times[order]
+    same = c[1:] == c[:-1]
+    steps = np.diff(t)[same]
+    step_keys = uniques[c[1:][same]]
+    step_start = t[:-1][same]
+
+    positive = steps > 0
+    pairs = pd.DataFrame({'series_key': step_keys[positive], 'step': steps[positive]})
+    largest = pairs.assign(start=step_start[positive]).sort_values('step', ascending=False, kind='stable')
+
+    return {
+        'series': set(uniques.tolist()),
+        'step_counts': pairs.value_counts(sort=False),
+        'largest_steps': largest.groupby('series_key', sort=False).head(top_n),
+        'overlaps': int(np.count_nonzero(steps == 0)),
+        'out_of_order': int(np.count_nonzero(backwards)),
+        'out_of_order_runs': out_of_order_runs,
+    }
+
+class CadenceAccumulator:
+    """Per-series sampling cadence, gaps, overlaps and out-of-order stretches across chunks
+
+    Series are identified by a hash of the key columns, so categories may differ
+    from chunk to chunk. The last row of each chunk is carried into the next one
+    so a series split across a chunk boundary is still analysed contiguously.
+    Step histograms are merged per series and gaps are counted against each
+    series' modal step over all chunks, so results do not depend on chunk size.
+    """
+
+    def __init__(self, by=SERIES_KEY, time_col='Time', gap_factor=1.5, top_n=10):
+        self.by = [col for col in by]
+        self.time_col = time_col
+        self.gap_factor = gap_factor
+        self.top_n = top_n
+        self.rows = 0
+        self.invalid = 0
+        self.series = set()
+        self.overlaps = 0
+        self.out_of_order = 0
+        self.out_of_order_runs = 0
+        self._step_counts = pd.Series(dtype='int64', index=pd.MultiIndex.from_arrays(
+            [np.empty(0, np.uint64), np.empty(0, np.int64)], names=['series_key', 'step']))
+        self._largest_steps = pd.DataFrame({'series_key': np.empty(0, np.uint64), 'step': np.empty(0, np.int64),
+                                            'start': np.empty(0, np.int64)})
+        self._gap_summary = None
+        self._labels = {}
+        self._carry = None
+
+    def update(self, chunk):
+        by = [col for col in self.by if col in chunk.columns]
+        times = pd.to_datetime(chunk[self.time_col], errors='coerce')
+        valid = times.notna().to_numpy()
+        self.invalid += int(len(valid) - valid.sum())
+        times = times.to_numpy(dtype='datetime64[ns]')[valid].view(np.int64)
+        keys = hash_rows(chunk, by)[valid] if by else np.zeros(valid.sum(), dtype=np.uint64)
+        if len(times) == 0:
+            return self
+
+        # Remember readable labels for any series, looked up only for reported gaps
+        if by:
+            labelled = chunk.loc[valid, by].drop_duplicates()
+            for key, label in zip(hash_rows(labelled, by), labelled.itertuples(index=False)):
+                self._labels.setdefault(int(key), tuple(label))
+
+        if self._carry is not None:
+            times = np.r_[self._carry[0], times]
+            keys = np.r_[self._carry[1], keys]
+        parts = _cadence_parts(times, keys, self.top_n)
+        self._carry = (times[-1:], keys[-1:])
+
+        self.rows += int(valid.sum())
+        self.series |= parts['series']
+        for name in ('overlaps', 'out_of_order', 'out_of_order_runs'):
+            setattr(self, name, getattr(self, name) + parts[name])
+        self._step_counts = (pd.concat([self._step_counts, parts['step_counts']])
+                             .groupby(level=['series_key', 'step']).sum().astype('int64'))
+        largest = pd.concat([self._largest_steps, parts['largest_steps']], ignore_index=True)
+        self._largest_steps = (largest.sort_values('step', ascending=False, kind='stable')
+                               .groupby('series_key', sort=False).head(self.top_n))
+        self._gap_summary = None
+        return self
+
+    def _gaps(self):
+        """Gap statistics against each series' modal step, computed once per update"""
+        if self._gap_summary is None:
+            counts = self._step_counts.reset_index(name='count')
+            # Ties go to the shorter step, as in modal_intervals
+            modal = (counts.sort_values(['series_key', 'count', 'step'], ascending=[True, False, True])
+                     .drop_duplicates('series_key').set_index('series_key')['step'])
+            expected = counts['series_key'].map(modal).to_numpy(dtype=np.float64)
+            is_gap = counts['step'].to_numpy() > self.gap_factor * expected
+            gap_counts = counts['count'].to_numpy()[is_gap]
+            gap_steps = counts['step'].to_numpy()[is_gap]
+            missing = (np.rint(gap_steps / expected[is_gap]).astype(np.int64) - 1) * gap_counts
+
+            largest = self._largest_steps
+            largest = largest[largest['step'].to_numpy() > self.gap_factor
+                              * largest['series_key'].map(modal).to_numpy(dtype=np.float64)]
+            largest = largest.sort_values('step', ascending=False, kind='stable').head(self.top_n)
+            self._gap_summary = {
+                'gaps': int(gap_counts.sum()),
+                'missing_samples': int(missing.sum()),
+                'gap_time': pd.Timedelta(int((gap_steps * gap_counts).sum())),
+                'top_gaps': pd.DataFrame({
+                    'series_key': largest['series_key'].to_numpy(dtype=np.uint64),
+                    'start': pd.to_datetime(largest['start'].to_numpy(dtype=np.int64)),
+                    'end': pd.to_datetime((largest['start'] + largest['step']).to_numpy(dtype=np.int64)),
+                    'duration': pd.to_timedelta(largest['step'].to_numpy(dtype=np.int64)),
+                }),
+            }
+        return self._gap_summary
+
+    @property
+    def intervals(self):
+        """Count of each positive sampling interval over all series"""
+        intervals = self._step_counts.groupby(level='step').sum()
+        return pd.Series(intervals.to_numpy(dtype=np.int64), index=pd.to_timedelta(intervals.index), dtype='int64')
+
+    @property
+    def gaps(self):
+        return self._gaps()['gaps']
+
+    @property
+    def missing_samples(self):
+        return self._gaps()['missing_samples']
+
+    @property
+    def gap_time(self):
+        return self._gaps()['gap_time']
+
+    @property
+    def top_gaps(self):
+        return self._gaps()['top_gaps']
+
+    @property
+    def modal_interval(self):
+        intervals = self.intervals
+        return intervals.idxmax() if len(intervals) else None
+
+    def largest_gaps(self):
+        """Top gaps with the series key columns spelled out"""
+        gaps = self.top_gaps.copy()
+        labels = [self._labels.get(int(key), ()) for key in gaps['series_key']]
+        for i, col in enumerate(self.by):
+            gaps[col] = [label[i] if i < len(label) else None for label in labels]
+        return gaps.drop(columns='series_key').reset_index(drop=True)
+
+def analyze_frame_cadence(df, by=SERIES_KEY, time_col='Time', gap_factor=1.5, top_n=10):
+    """Cadence statistics for an in-memory frame"""
+    return CadenceAccumulator(by, time_col, gap_factor, top_n).update(df)
+
+def format_cadence(acc, max_intervals=5):
+    """Human-readable cadence lines shared by the reports and the ingest log"""
+    lines = [f"Series analysed: {len(acc.series):,} ({', '.join(acc.by)})",
+             f"Most common sampling interval: {acc.modal_interval}"]
+    total = acc.intervals.sum()
+    if total:
+        lines.append("Interval distribution:")
+        for interval, count in acc.intervals.sort_values(ascending=False).head(max_intervals).items():
+            lines.append(f"  {str(interval):<20}: {count:>10,} ({count / total * 100:5.1f}%)")
+    lines.append(f"Gaps: {acc.gaps:,} ({acc.missing_samples:,} missing samples, {acc.gap_time} total)")
+    lines.append(f"Overlapping timestamps: {acc.overlaps:,}")
+    lines.append(f"Out-of-order steps: {acc.out_of_order:,} in {acc.out_of_order_runs:,} stretches")
+    return lines
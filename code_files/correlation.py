@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+
+METHODS = ('spearman', 'pearson')
+# Integer columns with at most this many distinct levels are ranked by counting instead of sorting
+COUNTING_RANK_LEVELS = 1 << 16
+
+def _counting_ranks(values, group_codes, n_groups):
+    """Doubled average ranks of small-range integers within groups, from one bincount"""
+    low = int(values.min())
+    levels = int(values.max()) - low + 1
+    keys = group_codes * levels + (values - low)
+    counts = np.bincount(keys, minlength=n_groups * levels).reshape(n_groups, levels)
+    # Values ranked below each level, counted inside its own group only
+    below = np.cumsum(counts, axis=1) - counts
+    doubled = 2 * below + counts + 1
+    return doubled.ravel()[keys].astype(np.int32)
+
+def _sorting_ranks(values, group_codes):
+    """Doubled average ranks (tied values share the mean rank) within groups, by one sort"""
+    order = np.lexsort((values, group_codes))
+    sorted_values, sorted_groups = values[order], group_codes[order]
+    index = np.arange(len(values))
+    new_group = np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]
+    new_run = new_group | np.r_[True, sorted_values[1:] != sorted_values[:-1]]
+    group_start = np.maximum.accumulate(np.where(new_group, index, 0))
+    run_start = np.maximum.accumulate(np.where(new_run, index, 0))
+    run_end = np.minimum.accumulate(np.where(np.r_[new_run[1:], True], index, len(values))[::-1])[::-1]
+    ranks = np.empty(len(values), dtype=np.int32)
+    # 1-based first + last position of the tie run, i.e. twice its average rank
+    ranks[order] = (run_start - group_start) + (run_end - group_start) + 2
+    return ranks
+
+def rank_column(values, group_codes=None, n_groups=1):
+    """int32 ranks of one column, twice the average rank so ties stay integral
+
+    Spearman correlation is the Pearson correlation of these ranks; scaling
+    by two does not change it. With group_codes, ranks restart in every group.
+    """
+    values = np.asarray(values)
+    if len(values) >= (1 << 30):
+        raise ValueError("Too many rows for int32 doubled ranks")
+    if group_codes is None:
+        group_codes = np.zeros(len(values), dtype=np.int64)
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int32)
+    if values.dtype.kind in 'biu':
+        values = values.astype(np.int64)
+        if int(values.max()) - int(values.min()) < COUNTING_RANK_LEVELS:
+            return _counting_ranks(values, group_codes, n_groups)
+    return _sorting_ranks(values, group_codes)
+
+def _complete_rows(columns, sample=None, seed=0):
+    """Rows where every column has a value, optionally a random sample of them"""
+    n = len(next(iter(columns.values())))
+    valid = np.ones(n, dtype=bool)
+    for values in columns.values():
+        values = np.asarray(values)
+        if values.dtype.kind in 'fc':
+            valid &= ~np.isnan(values)
+        elif values.dtype.kind in 'mM':
+            valid &= ~np.isnat(values)
+    rows = np.flatnonzero(valid)
+    if sample is not None and sample < len(rows):
+        rows = np.sort(np.random.default_rng(seed).choice(rows, size=sample, replace=False))
+    return rows
+
+def _matrix_columns(columns, rows, method, group_codes, n_groups):
+    """One int32 rank (spearman) or float64 value (pearson) array per column, for the given rows"""
+    prepared = []
+    for values in columns.values():
+        values = np.asarray(values)
+        if values.dtype.kind == 'M':
+            values = values.view(np.int64)
+        values = values[rows]
+        if method == 'spearman':
+            prepared.append(rank_column(values, group_codes, n_groups))
+        else:
+            prepared.append(values.astype(np.float64))
+    return prepared
+
+def _correlation_from_blocks(prepared, start, stop, block_size):
+    """Pearson correlation of rows start:stop, accumulating X'X one row block at a time"""
+    k = len(prepared)
+    n = stop - start
+    if n < 2:
+        return np.full((k, k), np.nan)
+    # Centring first keeps X'X well conditioned for large raw values such as epoch times
+    means = np.array([array[start:stop].mean(dtype=np.float64) for array in prepared])
+    gram = np.zeros((k, k))
+    sums = np.zeros(k)
+    for block_start in range(start, stop, block_size):
+        block_stop = min(block_start + block_size, stop)
+        block = np.empty((block_stop - block_start, k))
+        for j, array in enumerate(prepared):
+            block[:, j] = array[block_start:block_stop]
+        block -= means
+        gram += block.T @ block
+        sums += block.sum(axis=0)
+    covariance = gram - np.outer(sums, sums) / n
+    scale = np.sqrt(np.maximum(np.diag(covariance), 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = covariance / np.outer(scale, scale)
+    corr = np.clip(corr, -1.0, 1.0)
+    diagonal = np.where(scale > 0, 1.0, np.nan)
+    corr[np.diag_indices(k)] = diagonal
+    return corr
+
+def correlation_matrix(columns, method='spearman', sample=None, seed=0, block_size=1_000_000):
+    """Spearman or Pearson correlation matrix of {name: array} columns
+
+    Each column is ranked once into int32 (no DataFrame copy), and the matrix
+    comes from X'X accumulated over row blocks of at most block_size, so
+    peak memory is one block of float64 rather than a ranked copy of the
+    frame. Rows with a missing value in any column are dropped; sample
+    correlates a random subset of the remaining rows.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown correlation method: {method}")
+    rows = _complete_rows(columns, sample, seed)
+    prepared = _matrix_columns(columns, rows, method, None, 1)
+    corr = _correlation_from_blocks(prepared, 0, len(rows), block_size)
+    return pd.DataFrame(corr, index=list(columns), columns=list(columns))
+
+def grouped_correlation(columns, groups, method='spearman', sample=None, seed=0, block_size=1_000_000):
+    """{group: correlation matrix} with ranks computed within each group
+
+    groups is one array (e.g. building_type) or a tuple of arrays (e.g.
+    building_type and year); keys are scalars or tuples to match. Rows with a
+    missing key are left out. Ranking is done once for all groups, then rows
+    are ordered by group so each group is a contiguous slice. sample applies
+    per group.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown correlation method: {method}")
+    group_arrays = groups if isinstance(groups, tuple) else (groups,)
+    group_frame = pd.DataFrame({i: np.asarray(g) for i, g in enumerate(group_arrays)})
+    grouped = group_frame.groupby(list(group_frame.columns), sort=True, observed=True)
+    # Rows with a missing group key belong to no group (ngroup gives them NaN)
+    group_codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    keys = list(grouped.size().index)
+    if isinstance(groups, tuple) and len(group_arrays) == 1:
+        keys = [(key,) for key in keys]
+
+    rows = _complete_rows(columns)
+    rows = rows[group_codes[rows] >= 0]
+    if sample is not None:
+        rng = np.random.default_rng(seed)
+        codes = group_codes[rows]
+        chosen = [rng.choice(rows[codes == g], size=min(sample, int((codes == g).sum())), replace=False)
+                  for g in range(len(keys))]
+        rows = np.sort(np.concatenate(chosen)) if chosen else rows[:0]
+    order = rows[np.argsort(group_codes[rows], kind='stable')]
+    ordered_codes = group_codes[order]
+    prepared = _matrix_columns(columns, order, method, ordered_codes.astype(np.int64), len(keys))
+
+    bounds = np.searchsorted(ordered_codes, np.arange(len(keys) + 1))
+    matrices = {}
+    for g, key in enumerate(keys):
+        corr = _correlation_from_blocks(prepared, bounds[g], bounds[g + 1], block_size)
+        matrices[key] = pd.DataFrame(corr, index=list(columns), columns=list(columns))
+    return matrices
+
+def indicator_columns(categories, prefix):
+    """{prefix_category: int8 indicator} for a categorical, like pd.get_dummies without the frame"""
+    categorical = pd.Categorical(categories)
+    codes = categorical.codes
+    return {f"{prefix}_{category}": (codes == i).astype(np.int8) for i, category in enumerate(categorical.categories)}
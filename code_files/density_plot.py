@@ -0,0 +1,72 @@
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.colors import LogNorm
+
+
+# Raster size of a density panel; drawing cost depends on this, not on the number of points
+DENSITY_WIDTH = 600
+DENSITY_HEIGHT = 400
+
+def _as_float(values):
+    """float64 view of numeric or datetime64 values (datetimes as epoch ns), plus whether they were dates"""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        ns = values.astype('datetime64[ns]').view(np.int64)
+        return np.where(ns == np.iinfo(np.int64).min, np.nan, ns.astype(np.float64)), True
+    return values.astype(np.float64), False
+
+def _bin_index(values, low, high, bins):
+    scaled = (values - low) * (bins / (high - low)) if high > low else np.zeros_like(values)
+    # The upper edge belongs to the last bin, as in np.histogram
+    return np.minimum(scaled.astype(np.int64), bins - 1)
+
+def _axis_range(values, value_range):
+    if value_range is not None:
+        return float(value_range[0]), float(value_range[1])
+    if len(values) == 0:
+        return 0.0, 1.0
+    low, high = float(values.min()), float(values.max())
+    return (low, high) if high > low else (low - 0.5, high + 0.5)
+
+def density_grid(x, y, width=DENSITY_WIDTH, height=DENSITY_HEIGHT, x_range=None, y_range=None):
+    """Point counts on a height x width grid, binned with one bincount over flat cell indices
+
+    x may be datetime64. Returns a dict with the int64 count grid and the data
+    ranges of both axes, which is all render_density needs.
+    """
+    x, x_dates = _as_float(x)
+    y, _ = _as_float(y)
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    x, y = x[valid], y[valid]
+    x_low, x_high = _axis_range(x, x_range)
+    y_low, y_high = _axis_range(y, y_range)
+    inside = (x >= x_low) & (x <= x_high) & (y >= y_low) & (y <= y_high)
+    x, y = x[inside], y[inside]
+    cells = _bin_index(y, y_low, y_high, height) * width + _bin_index(x, x_low, x_high, width)
+    counts = np.bincount(cells, minlength=width * height).reshape(height, width)
+    return {'counts': counts, 'x_range': (x_low, x_high), 'y_range': (y_low, y_high),
+            'x_dates': x_dates, 'points': int(len(x))}
+
+def histogram_counts(values, bins=30, value_range=None):
+    """np.histogram-compatible (counts, edges) from a single bincount"""
+    values, _ = _as_float(values)
+    values = values[~np.isnan(values)]
+    low, high = _axis_range(values, value_range)
+    values = values[(values >= low) & (values <= high)]
+    counts = np.bincount(_bin_index(values, low, high, bins), minlength=bins)
+    return counts, np.linspace(low, high, bins + 1)
+
+def render_density(ax, grid, cmap='viridis', log=True, colorbar=True):
+    """Draw a density_grid result as an image; empty cells stay transparent"""
+    counts = np.ma.masked_equal(grid['counts'], 0)
+    x_low, x_high = grid['x_range']
+    if grid['x_dates']:
+        x_low, x_high = mdates.date2num(np.array([x_low, x_high]).astype('datetime64[ns]'))
+    norm = LogNorm(vmin=1, vmax=max(int(grid['counts'].max()), 2)) if log else None
+    image = ax.imshow(counts, origin='lower', aspect='auto', cmap=cmap, norm=norm, interpolation='nearest',
+                      extent=(x_low, x_high, grid['y_range'][0], grid['y_range'][1]))
+    if grid['x_dates']:
+        ax.xaxis_date()
+    if colorbar:
+        ax.figure.colorbar(image, ax=ax, label='Points per pixel')
+    return image
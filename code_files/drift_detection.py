@@ -0,0 +1,274 @@
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+
+DRIFT_STATE = "drift_state.pkl"
+EVENT_COLUMNS = ['building_type', 'Time', 'detector', 'direction', 'statistic', 'reference_mean', 'reference_std']
+
+class _Detector:
+    """Standardized two-sided change detector with O(1) state
+
+    The first `warmup` values after a start or reset fix the reference mean
+    and std; later values are scored as z = (x - mean) / std. After a change
+    the next `holdoff` values are skipped before warming up again, so a
+    transient (such as a seasonal difference straddling a level shift) does
+    not become the new reference. Subclasses turn a run of z values into
+    upward/downward statistics with cumulative sums and running minima, so a
+    chunk is scanned without a Python loop except for one step per change.
+    """
+
+    name = None
+
+    def __init__(self, threshold, drift, warmup, holdoff):
+        self.threshold = threshold
+        self.drift = drift
+        self.warmup = warmup
+        self.holdoff = holdoff
+        self.skip = 0
+        self.reset()
+
+    def reset(self):
+        self.ref_count = 0
+        self.ref_sum = 0.0
+        self.ref_sumsq = 0.0
+        self._reset_statistic()
+
+    @property
+    def reference(self):
+        mean = self.ref_sum / self.ref_count if self.ref_count else np.nan
+        variance = self.ref_sumsq / self.ref_count - mean ** 2 if self.ref_count else np.nan
+        return mean, np.sqrt(max(variance, 0.0)) if self.ref_count else np.nan
+
+    def update(self, values):
+        """Scan values in order; returns [(position, direction, statistic, ref mean, ref std)]"""
+        values = np.asarray(values, dtype=np.float64)
+        alarms = []
+        i = 0
+        while i < len(values):
+            if self.skip:
+                skipped = min(self.skip, len(values) - i)
+                self.skip -= skipped
+                i += skipped
+                continue
+            if self.ref_count < self.warmup:
+                taken = values[i:i + self.warmup - self.ref_count]
+                self.ref_count += len(taken)
+                self.ref_sum += taken.sum()
+                self.ref_sumsq += (taken ** 2).sum()
+                i += len(taken)
+                continue
+
+            mean, std = self.reference
+            z = (values[i:] - mean) / (std if std > 0 else 1.0)
+            up, down = self._scan(z)
+            crossed = np.flatnonzero((up > self.threshold) | (down > self.threshold))
+            if len(crossed) == 0:
+                self._carry(z, up, down)
+                break
+
+            at = crossed[0]
+            direction = 'up' if up[at] > self.threshold else 'down'
+            alarms.append((i + at, direction, float(max(up[at], down[at])), mean, std))
+            # A change restarts the reference on the new regime
+            self.reset()
+            self.skip = self.holdoff
+            i += at + 1
+        return alarms
+
+class Cusum(_Detector):
+    """Two-sided tabular CUSUM: S = max(0, S + z - k) in each direction
+
+    The max(0, .) recursion is solved per chunk as S_t = C_t - min(-S_0,
+    min_{j<=t} C_j), where C is the cumulative sum of (z - k).
+    """
+
+    name = 'cusum'
+
+    def __init__(self, threshold=15.0, drift=0.5, warmup=2016, holdoff=2016):
+        super().__init__(threshold, drift, warmup, holdoff)
+
+    def _reset_statistic(self):
+        self.up = 0.0
+        self.down = 0.0
+
+    @staticmethod
+    def _side(steps, start):
+        cumulative = np.cumsum(steps)
+        return cumulative - np.minimum(-start, np.minimum.accumulate(cumulative))
+
+    def _scan(self, z):
+        return self._side(z - self.drift, self.up), self._side(-z - self.drift, self.down)
+
+    def _carry(self, z, up, down):
+        self.up, self.down = float(up[-1]), float(down[-1])
+
+class PageHinkley(_Detector):
+    """Two-sided Page-Hinkley test on standardized values
+
+    m_t accumulates the deviation of each value from the running mean since
+    the last reset, less the tolerated drift; the statistic is the distance
+    of m_t from its running minimum.
+    """
+
+    name = 'page_hinkley'
+
+    def __init__(self, threshold=100.0, drift=0.25, warmup=2016, holdoff=2016):
+        super().__init__(threshold, drift, warmup, holdoff)
+
+    def _reset_statistic(self):
+        self.count = 0
+        self.total = 0.0
+        self.m_up = self.min_up = 0.0
+        self.m_down = self.min_down = 0.0
+        self._pending = None
+
+    def _scan(self, z):
+        counts = self.count + np.arange(1, len(z) + 1)
+        running_mean = (self.total + np.cumsum(z)) / counts
+        m_up = self.m_up + np.cumsum(z - running_mean - self.drift)
+        m_down = self.m_down + np.cumsum(running_mean - z - self.drift)
+        up = m_up - np.minimum(self.min_up, np.minimum.accumulate(m_up))
+        down = m_down - np.minimum(self.min_down, np.minimum.accumulate(m_down))
+        self._pending = (m_up, m_down)
+        return up, down
+
+    def _carry(self, z, up, down):
+        m_up, m_down = self._pending
+        self._pending = None
+        self.count += len(z)
+        self.total += z.sum()
+        self.m_up, self.min_up = float(m_up[-1]), float(min(self.min_up, m_up.min()))
+        self.m_down, self.min_down = float(m_down[-1]), float(min(self.min_down, m_down.min()))
+
+DETECTORS = {'cusum': Cusum, 'page_hinkley': PageHinkley}
+
+class _SeasonalResidual:
+    """x(t) - x(t - season) from a carried window of the last season of readings
+
+    Load has strong daily and weekly cycles, so detectors watch the change
+    against the same time one week earlier rather than the raw level. Memory
+    is one season of readings per series, however long the history.
+    """
+
+    def __init__(self, season):
+        self.season = np.timedelta64(pd.Timedelta(season).value, 'ns')
+        self.times = np.empty(0, dtype='datetime64[ns]')
+        self.values = np.empty(0, dtype=np.float64)
+
+    def update(self, times, values):
+        all_times = np.r_[self.times, times]
+        all_values = np.r_[self.values, values]
+        targets = times - self.season
+        positions = np.minimum(np.searchsorted(all_times, targets), len(all_times) - 1)
+        matched = all_times[positions] == targets
+        residuals = np.where(matched, values - all_values[positions], np.nan)
+
+        keep = all_times > all_times[-1] - self.season
+        self.times, self.values = all_times[keep], all_values[keep]
+        return residuals
+
+class DriftMonitor:
+    """Per-building_type online drift detection over streamed power readings
+
+    Feed chunks in time order with update(); each series keeps one detector
+    and (when season is set) one season of readings, so state does not grow
+    with the history. Every change point is appended to events and passed to
+    on_drift, which can trigger retraining. Detector warmup/holdoff default
+    to one week of 5-minute readings.
+    """
+
+    def __init__(self, detector='cusum', season='7D', by='building_type', time_col='Time',
+                 value_col='Power (kW)', on_drift=None, **detector_params):
+        self.detector = detector
+        self.detector_params = detector_params
+        self.season = season
+        self.by = by
+        self.time_col = time_col
+        self.value_col = value_col
+        self.on_drift = on_drift
+        self.rows = 0
+        self.events = []
+        self._detectors = {}
+        self._residuals = {}
+        self._last_time = {}
+
+    def __getstate__(self):
+        # Callbacks are not persisted with the detector state
+        state = self.__dict__.copy()
+        state['on_drift'] = None
+        return state
+
+    def _series_state(self, key):
+        if key not in self._detectors:
+            self._detectors[key] = DETECTORS[self.detector](**self.detector_params)
+            if self.season is not None:
+                self._residuals[key] = _SeasonalResidual(self.season)
+        return self._detectors[key], self._residuals.get(key)
+
+    def update(self, chunk):
+        """Scan one chunk; returns the change-point events it produced"""
+        new_events = []
+        chunk = chunk[[self.by, self.time_col, self.value_col]].dropna()
+        self.rows += len(chunk)
+        for key, group in chunk.groupby(self.by, observed=True, sort=True):
+            times = group[self.time_col].to_numpy(dtype='datetime64[ns]')
+            values = group[self.value_col].to_numpy(dtype=np.float64)
+            order = np.argsort(times, kind='stable')
+            times, values = times[order], values[order]
+            # Readings at or before the last one seen are replays and are skipped
+            last = self._last_time.get(key)
+            if last is not None:
+                fresh = times > last
+                times, values = times[fresh], values[fresh]
+            if len(times) == 0:
+                continue
+            self._last_time[key] = times[-1]
+
+            detector, residual = self._series_state(key)
+            if residual is not None:
+                values = residual.update(times, values)
+                measured = ~np.isnan(values)
+                times, values = times[measured], values[measured]
+            for position, direction, statistic, mean, std in detector.update(values):
+                event = {'building_type': key, 'Time': pd.Timestamp(times[position]), 'detector': detector.name,
+                         'direction': direction, 'statistic': statistic,
+                         'reference_mean': mean, 'reference_std': std}
+                new_events.append(event)
+                if self.on_drift is not None:
+                    self.on_drift(event)
+        self.events.extend(new_events)
+        return new_events
+
+    def events_frame(self):
+        return pd.DataFrame(self.events, columns=EVENT_COLUMNS)
+
+def detect_drift(chunks, **kwargs):
+    """Run a fresh DriftMonitor over an iterable of chunks (or a single frame)"""
+    monitor = DriftMonitor(**kwargs)
+    for chunk in ([chunks] if isinstance(chunks, pd.DataFrame) else chunks):
+        monitor.update(chunk)
+    return monitor
+
+def load_drift_monitor(state_file=DRIFT_STATE, **kwargs):
+    """Persisted monitor from an earlier incremental run, or a new one"""
+    if os.path.exists(state_file):
+        with open(state_file, 'rb') as f:
+            monitor = pickle.load(f)
+        monitor.on_drift = kwargs.get('on_drift')
+        return monitor
+    return DriftMonitor(**kwargs)
+
+def save_drift_monitor(monitor, state_file=DRIFT_STATE):
+    with open(state_file, 'wb') as f:
+        pickle.dump(monitor, f)
+
+def write_drift_events(events, events_file="drift_events.csv"):
+    """Append change-point events to a CSV log"""
+    if len(events) == 0:
+        return None
+    frame = pd.DataFrame(events, columns=EVENT_COLUMNS)
+    frame.to_csv(events_file, mode='a', header=not os.path.exists(events_file), index=False)
+    print(f"{len(frame)} drift events written to: {events_file}")
+    return events_file
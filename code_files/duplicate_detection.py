@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_CONFLICT_KEY = ('Time', 'building_type')
+DEFAULT_VALUE_COLUMN = 'Power (kW)'
+
+def hash_rows(df, key=None):
+    """64-bit hash per row over the key columns (all columns when key is None)
+
+    Categorical columns hash their categories once and gather by code, so long
+    file paths stored as categoricals cost no per-row string hashing.
+    """
+    columns = list(key) if key is not None else list(df.columns)
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+class DuplicateDetector:
+    """Streaming exact-duplicate and conflicting-duplicate counter over row hashes
+
+    Rows are reduced to uint64 hashes and spread over n_buckets by their top
+    bits, so the final counting handles one bucket at a time. With spill_dir the
+    buckets are appended to files on disk and only one bucket is ever in memory.
+    Conflicts are rows that share conflict_key (e.g. Time + building_type) but
+    carry different non-null values in value_column.
+    """
+
+    def __init__(self, key=None, conflict_key=DEFAULT_CONFLICT_KEY, value_column=DEFAULT_VALUE_COLUMN,
+                 n_buckets=16, spill_dir=None):
+        self.key = key
+        self.conflict_key = conflict_key
+        self.value_column = value_column
+        self.n_buckets = n_buckets
+        self.rows = 0
+        self._shift = np.uint64(64 - max(1, int(np.ceil(np.log2(n_buckets)))))
+        self._spill_dir = tempfile.mkdtemp(dir=spill_dir) if spill_dir is not None else None
+        self._buckets = {name: [[] for _ in range(n_buckets)] for name in ('rows', 'keys', 'values')}
+        self._result = None
+
+    def _bucket_of(self, hashes):
+        return (hashes >> self._shift).astype(np.int64) % self.n_buckets
+
+    def _store(self, name, bucket, array):
+        if self._spill_dir is None:
+            self._buckets[name][bucket].append(array)
+        else:
+            with open(os.path.join(self._spill_dir, f"{name}_{bucket}.bin"), 'ab') as f:
+                array.tofile(f)
+
+    def _load(self, name, bucket):
+        if self._spill_dir is None:
+            parts = self._buckets[name][bucket]
+            return np.concatenate(parts) if parts else np.empty(0, dtype=np.uint64)
+        path = os.path.join(self._spill_dir, f"{name}_{bucket}.bin")
+        return np.fromfile(path, dtype=np.uint64) if os.path.exists(path) else np.empty(0, dtype=np.uint64)
+
+    def _split(self, hashes, *arrays):
+        """Yield (bucket, hashes, *arrays) slices grouped by the bucket of each hash"""
+        if self.n_buckets == 1:
+            yield (0, hashes) + arrays
+            return
+        buckets = self._bucket_of(hashes)
+        order = np.argsort(buckets, kind='stable')
+        bounds = np.searchsorted(buckets[order], np.arange(self.n_buckets + 1))
+        for bucket in range(self.n_buckets):
+            selected = order[bounds[bucket]:bounds[bucket + 1]]
+            if len(selected):
+                yield (bucket, hashes[selected]) + tuple(array[selected] for array in arrays)
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        self._result = None
+
+        for bucket, row_hashes in self._split(hash_rows(chunk, self.key)):
+            self._store('rows', bucket, row_hashes)
+
+        has_conflict_columns = (self.conflict_key is not None and self.value_column in chunk.columns
+                                and all(col in chunk.columns for col in self.conflict_key))
+        if has_conflict_columns:
+            # Missing readings never conflict with a measured value
+            measured = chunk[chunk[self.value_column].notna()]
+            key_hashes = hash_rows(measured, self.conflict_key)
+            value_hashes = hash_rows(measured, [self.value_column])
+            for bucket, keys, values in self._split(key_hashes, value_hashes):
+                self._store('keys', bucket, keys)
+                self._store('values', bucket, values)
+        return self
+
+    def result(self):
+        """Counts of duplicate rows, duplicated keys and conflicting keys/rows"""
+        if self._result is not None:
+            return self._result
+
+        duplicate_rows = duplicate_keys = conflicting_keys = conflicting_rows = 0
+        for bucket in range(self.n_buckets):
+            row_hashes = self._load('rows', bucket)
+            row_hashes.sort()
+            duplicate_rows += int(np.count_nonzero(row_hashes[1:] == row_hashes[:-1]))
+
+            key_hashes = self._load('keys', bucket)
+            if len(key_hashes) == 0:
+                continue
+            value_hashes = self._load('values', bucket)
+            order = np.lexsort((value_hashes, key_hashes))
+            key_hashes, value_hashes = key_hashes[order], value_hashes[order]
+
+            key_starts = np.flatnonzero(np.r_[True, key_hashes[1:] != key_hashes[:-1]])
+            key_sizes = np.diff(np.r_[key_starts, len(key_hashes)])
+            new_value = np.r_[True, (key_hashes[1:] != key_hashes[:-1]) | (value_hashes[1:] != value_hashes[:-1])]
+            distinct_values = np.add.reduceat(new_value.astype(np.int64), key_starts)
+
+            duplicate_keys += int(np.count_nonzero(key_sizes > 1))
+            conflicted = distinct_values > 1
+            conflicting_keys += int(np.count_nonzero(conflicted))
+            conflicting_rows += int(key_sizes[conflicted].sum())
+
+        self._result = {'rows': self.rows, 'duplicate_rows': int(duplicate_rows),
+                        'duplicate_keys': duplicate_keys, 'conflicting_keys': conflicting_keys,
+                        'conflicting_rows': conflicting_rows}
+        return self._result
+
+    def close(self):
+        """Remove spilled bucket files"""
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+
+def find_duplicates(df, key=None, conflict_key=DEFAULT_CONFLICT_KEY, value_column=DEFAULT_VALUE_COLUMN):
+    """Duplicate counts for an in-memory frame"""
+    return DuplicateDetector(key, conflict_key, value_column, n_buckets=1).update(df).result()
@@ -0,0 +1,209 @@
+import numpy as np
+import pandas as pd
+from rolling_stats import rolling_moments
+from autocorrelation import hourly_matrix, correlogram_row, significant_lags
+from power_cube import CUBE_PATH, load_rollup, with_moments
+from weather_join import align_weather
+
+try:
+    import holidays
+except ImportError:
+    holidays = None
+
+
+CALENDAR_FEATURES = ('hour', 'day_of_week', 'month', 'day_of_year', 'is_weekend')
+NS_PER_HOUR = 3_600_000_000_000
+
+class FeatureSpec:
+    """Which columns go into the design matrix, in order
+
+    lags and rolling windows are in periods of the series (hours for the
+    hourly cube) and count back from the issue time, horizon periods before
+    the target. Rolling aggregates cover the window ending at the issue
+    time, so no feature sees a value after it. Calendar and weather
+    features describe the target time. is_holiday is only added when
+    holiday_country (an ISO code for the holidays package) is given, as the
+    dataset does not record where the buildings are.
+    """
+
+    def __init__(self, lags=(1, 24, 48, 168), rolling_windows=(24, 168), rolling_stats=('mean', 'std'),
+                 calendar=None, weather_columns=(), horizon=1, holiday_country=None):
+        self.horizon = horizon
+        self.lags = tuple(lags)
+        self.rolling_windows = tuple(rolling_windows)
+        self.rolling_stats = tuple(rolling_stats)
+        if calendar is None:
+            calendar = CALENDAR_FEATURES + (('is_holiday',) if holiday_country else ())
+        if 'is_holiday' in calendar and not holiday_country:
+            raise ValueError("is_holiday needs a holiday_country")
+        self.calendar = tuple(calendar)
+        self.holiday_country = holiday_country
+        self.weather_columns = tuple(weather_columns)
+
+    @property
+    def feature_names(self):
+        names = [f"lag_{lag}" for lag in self.lags]
+        names += [f"rolling_{stat}_{window}" for window in self.rolling_windows for stat in self.rolling_stats]
+        return names + list(self.calendar) + list(self.weather_columns)
+
+    @property
+    def history(self):
+        """Periods of history a row needs before all its lag/rolling features exist"""
+        lookback = max(self.lags + tuple(window for window in self.rolling_windows) + (1,))
+        return lookback + self.horizon - 1
+
+    @classmethod
+    def from_correlograms(cls, correlograms, key, top_n=8, **kwargs):
+        """Spec whose lags are the strongest significant autocorrelation lags of a series"""
+        row = correlogram_row(correlograms, key)
+        lags = significant_lags(correlograms['acf'][row], correlograms['acf_band'][row], top_n)
+        return cls(lags=tuple(sorted(int(lag) for lag in lags)), **kwargs)
+
+def holiday_dates(years, country):
+    """Public holiday dates of country as datetime64[D] for the given years"""
+    if holidays is None:
+        raise ImportError("is_holiday needs the holidays package")
+    years = sorted({int(year) for year in years})
+    return np.array(sorted(holidays.country_holidays(country, years=years)), dtype='datetime64[D]')
+
+def calendar_features(times, names=CALENDAR_FEATURES, country=None):
+    """{name: array} calendar columns straight from datetime64 arithmetic, no DataFrame
+
+    When any time is missing (NaT) the columns are float64 with NaN there, as
+    pandas does for integers, so dropna removes those rows.
+    """
+    times = np.asarray(times, dtype='datetime64[ns]')
+    missing = np.isnat(times)
+    days = times.astype('datetime64[D]')
+    months = times.astype('datetime64[M]')
+    years = times.astype('datetime64[Y]')
+    features = {}
+    for name in names:
+        if name == 'hour':
+            features[name] = (times - days).astype(np.int64) // NS_PER_HOUR
+        elif name == 'day_of_week':
+            # 1970-01-01 was a Thursday; Monday is 0 as in pandas
+            features[name] = (days.astype(np.int64) + 3) % 7
+        elif name == 'day_of_month':
+            features[name] = (days - months).astype(np.int64) + 1
+        elif name == 'month':
+            features[name] = months.astype(np.int64) % 12 + 1
+        elif name == 'year':
+            features[name] = years.astype(np.int64) + 1970
+        elif name == 'day_of_year':
+            features[name] = (days - years).astype(np.int64) + 1
+        elif name == 'is_weekend':
+            features[name] = (days.astype(np.int64) + 3) % 7 >= 5
+        elif name == 'is_holiday':
+            if not country:
+                raise ValueError("is_holiday needs a holiday country")
+            unique_years = np.unique(years[~missing].astype(np.int64) + 1970)
+            features[name] = np.isin(days, holiday_dates(unique_years, country))
+        else:
+            raise ValueError(f"Unknown calendar feature: {name}")
+        if missing.any():
+            features[name] = np.where(missing, np.nan, features[name].astype(np.float64))
+    return features
+
+def lagged(values, lag):
+    """values shifted forward by lag positions, NaN-filled at the start"""
+    result = np.full(len(values), np.nan, dtype=np.float64)
+    if lag < len(values):
+        result[lag:] = values[:len(values) - lag]
+    return result
+
+class _SeriesFeatures:
+    """Whole-series lag sources and rolling aggregates, sliced into blocks on demand"""
+
+    def __init__(self, values, spec):
+        self.values = values
+        self.rolling = {}
+        for window in spec.rolling_windows:
+            moments = rolling_moments(values, window, min_periods=1)
+            # Shift by the horizon so the window ends at the issue time
+            self.rolling.update({(stat, window): lagged(moments[stat], spec.horizon)
+                                 for stat in spec.rolling_stats})
+
+def iter_feature_blocks(values, start, spec, block_size=8760, freq='h', weather=None,
+                        weather_tolerance=pd.Timedelta(hours=3), weather_method='backward', dropna=True,
+                        first_row=0):
+    """Yield (X, y, times) blocks in time order for one regular-grid series
+
+    X is a C-contiguous float32 array with one column per spec.feature_names
+    entry. Only the current block is materialised, so a training set can be
+    built from all years without holding one large matrix. weather is a
+    frame with a sorted Time column and spec.weather_columns (as from
+    weather_join.load_weather_frame), aligned with weather_method within
+    weather_tolerance.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    step = pd.to_timedelta(pd.tseries.frequencies.to_offset(freq)).to_timedelta64()
+    start = np.datetime64(start, 'ns')
+    series = _SeriesFeatures(values, spec)
+    has_weather = weather is not None and len(weather) > 0
+
+    n_features = len(spec.feature_names)
+    for block_start in range(max(spec.history, first_row), len(values), block_size):
+        rows = np.arange(block_start, min(block_start + block_size, len(values)))
+        times = start + rows * step
+        X = np.empty((len(rows), n_features), dtype=np.float32)
+        column = 0
+        for lag in spec.lags:
+            X[:, column] = values[rows - (spec.horizon - 1) - lag]
+            column += 1
+        for window in spec.rolling_windows:
+            for stat in spec.rolling_stats:
+                X[:, column] = series.rolling[(stat, window)][rows]
+                column += 1
+        for name, feature in calendar_features(times, spec.calendar, spec.holiday_country).items():
+            X[:, column] = feature
+            column += 1
+        aligned = (align_weather(times, weather, spec.weather_columns, weather_tolerance, weather_method)
+                   if has_weather and spec.weather_columns else {})
+        for col in spec.weather_columns:
+            # Without a reading close enough the covariate is missing
+            X[:, column] = aligned.get(col, np.nan)
+            column += 1
+
+        y = values[rows].astype(np.float32)
+        if dropna:
+            keep = ~np.isnan(y) & ~np.isnan(X).any(axis=1)
+            X, y, times = np.ascontiguousarray(X[keep]), y[keep], times[keep]
+        if len(y):
+            yield X, y, times
+
+def forecast_features(values, start, spec, freq='h', weather=None):
+    """(X, target times) for the spec.horizon periods right after the end of values"""
+    # Only the last spec.history periods feed these rows, so serving cost does not grow with history
+    values = np.asarray(values, dtype=np.float64)
+    skipped = max(len(values) - spec.history, 0)
+    step = pd.to_timedelta(pd.tseries.frequencies.to_offset(freq)).to_timedelta64()
+    start = np.datetime64(start, 'ns') + skipped * step
+    padded = np.r_[values[skipped:], np.full(spec.horizon, np.nan)]
+    blocks = iter_feature_blocks(padded, start, spec, block_size=spec.horizon, freq=freq, weather=weather,
+                                 dropna=False, first_row=len(padded) - spec.horizon)
+    X, _, times = next(blocks, (np.empty((0, len(spec.feature_names)), dtype=np.float32), None,
+                                np.empty(0, dtype='datetime64[ns]')))
+    return X, times
+
+def building_series(cube_path=CUBE_PATH, level='hourly', building_types=None):
+    """Regular-grid mean Power (kW) per building_type from the aggregation cube"""
+    table = with_moments(load_rollup(level, cube_path, building_types=building_types))
+    keys, starts, matrix = hourly_matrix(table, by=('building_type',))
+    return {key[0]: (start, row[:len(row) - np.argmax(~np.isnan(row[::-1]))])
+            for key, start, row in zip(keys, starts, matrix)}
+
+def iter_building_blocks(spec, cube_path=CUBE_PATH, building_types=None, block_size=8760, weather=None):
+    """Yield (building_type, X, y, times) blocks per building type, each in time order"""
+    for building_type, (start, values) in building_series(cube_path, building_types=building_types).items():
+        for X, y, times in iter_feature_blocks(values, start, spec, block_size, weather=weather):
+            yield building_type, X, y, times
+
+def build_feature_matrix(values, start, spec, **kwargs):
+    """Whole-series (X, y, times), concatenated from the streamed blocks"""
+    blocks = list(iter_feature_blocks(values, start, spec, **kwargs))
+    if not blocks:
+        return (np.empty((0, len(spec.feature_names)), dtype=np.float32), np.empty(0, dtype=np.float32),
+                np.empty(0, dtype='datetime64[ns]'))
+    X, y, times = zip(*blocks)
+    return np.concatenate(X), np.concatenate(y), np.concatenate(times)
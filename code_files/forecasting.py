@@ -0,0 +1,266 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from power_cube import rollup
+from autocorrelation import hourly_matrix
+from feature_matrix import FeatureSpec, iter_feature_blocks, forecast_features
+
+try:
+    from sklearn.ensemble import HistGradientBoostingRegressor
+except ImportError:
+    HistGradientBoostingRegressor = None
+
+
+HORIZONS = {'hour-ahead': 1, 'day-ahead': 24}
+SEASON = 24
+
+class SeasonalNaive:
+    """Value one season (rounded up to cover the horizon) before the target"""
+
+    name = 'seasonal_naive'
+
+    def __init__(self, column):
+        self.column = column
+
+    def fit(self, X, y):
+        return self
+
+    def predict(self, X):
+        return X[:, self.column].astype(np.float64)
+
+class RidgeModel:
+    """Ridge regression on standardized features, fitted from streamed Gram sums
+
+    partial_fit only accumulates X'X, X'y and column sums in float64, so the
+    training set can arrive block by block; solve() then costs O(features^3).
+    """
+
+    name = 'ridge'
+
+    def __init__(self, alpha=1.0):
+        self.alpha = alpha
+        self.n = 0
+        self._gram = None
+        self._xty = None
+        self._sums = None
+        self._y_sum = 0.0
+        self.coef_ = None
+        self.intercept_ = 0.0
+
+    def partial_fit(self, X, y):
+        X = X.astype(np.float64)
+        y = y.astype(np.float64)
+        if self._gram is None:
+            self._gram = np.zeros((X.shape[1], X.shape[1]))
+            self._xty = np.zeros(X.shape[1])
+            self._sums = np.zeros(X.shape[1])
+        self._gram += X.T @ X
+        self._xty += X.T @ y
+        self._sums += X.sum(axis=0)
+        self._y_sum += y.sum()
+        self.n += len(y)
+        return self
+
+    def solve(self):
+        means = self._sums / self.n
+        y_mean = self._y_sum / self.n
+        # Centred cross products from the raw sums
+        gram = self._gram - self.n * np.outer(means, means)
+        xty = self._xty - self.n * means * y_mean
+        scale = np.sqrt(np.clip(np.diag(gram) / self.n, 1e-12, None))
+        standardized = gram / np.outer(scale, scale)
+        weights = np.linalg.solve(standardized + self.alpha * np.eye(len(scale)), xty / scale)
+        self.coef_ = weights / scale
+        self.intercept_ = y_mean - means @ self.coef_
+        return self
+
+    def fit(self, X, y):
+        return self.partial_fit(X, y).solve()
+
+    def predict(self, X):
+        return X.astype(np.float64) @ self.coef_ + self.intercept_
+
+class GradientBoostingModel:
+    """sklearn HistGradientBoostingRegressor, used only when scikit-learn is installed"""
+
+    name = 'gradient_boosting'
+
+    def __init__(self, **params):
+        self.model = HistGradientBoostingRegressor(**params)
+
+    def fit(self, X, y):
+        self.model.fit(X, y)
+        return self
+
+    def predict(self, X):
+        return self.model.predict(X).astype(np.float64)
+
+def available_models():
+    names = ['seasonal_naive', 'ridge']
+    if HistGradientBoostingRegressor is not None:
+        names.append('gradient_boosting')
+    return names
+
+def horizon_spec(horizon, lags=(1, 2, 24, 168), rolling_windows=(24, 168), **kwargs):
+    """FeatureSpec for a direct horizon-step model that always carries the seasonal-naive lag"""
+    seasonal_lag = SEASON * int(np.ceil(horizon / SEASON)) - horizon + 1
+    lags = tuple(sorted(set(lags) | {seasonal_lag}))
+    return FeatureSpec(lags=lags, rolling_windows=rolling_windows, horizon=horizon, **kwargs), lags.index(seasonal_lag)
+
+def building_hourly_series(df):
+    """{building_type: (start, regular hourly mean series)} from load_building_power rows"""
+    table = rollup(df, 'hourly')
+    table['mean'] = table['sum'] / table['count']
+    keys, starts, matrix = hourly_matrix(table, by=('building_type',))
+    series = {}
+    for key, start, row in zip(keys, starts, matrix):
+        observed = np.flatnonzero(~np.isnan(row))
+        series[key[0]] = (start, row[:observed[-1] + 1] if len(observed) else row[:0])
+    return series
+
+def _errors(y, predicted):
+    error = predicted - y
+    return {'mae': float(np.mean(np.abs(error))), 'rmse': float(np.sqrt(np.mean(error ** 2))),
+            'rows': int(len(y))}
+
+def _train_building(task):
+    """Fit and evaluate every model and horizon for one building type (process-pool worker)"""
+    building_type, start, values, horizons, model_names, test_hours, holiday_country = task
+    split = len(values) - test_hours
+    fitted, metrics = {}, []
+    for horizon_name, horizon in horizons.items():
+        spec, seasonal_column = horizon_spec(horizon, holiday_country=holiday_country)
+        ridge = RidgeModel()
+        train_blocks, test_X, test_y = [], [], []
+        began = time.perf_counter()
+        # Training rows stream straight into the ridge sums; the holdout stays in memory
+        for X, y, times in iter_feature_blocks(values, start, spec):
+            rows = ((times - np.datetime64(start, 'ns')) // np.timedelta64(1, 'h')).astype(np.int64)
+            train = rows < split
+            if train.any():
+                ridge.partial_fit(X[train], y[train])
+                if 'gradient_boosting' in model_names:
+                    train_blocks.append((X[train], y[train]))
+            if (~train).any():
+                test_X.append(X[~train])
+                test_y.append(y[~train])
+        if ridge.n == 0 or not test_y:
+            continue
+
+        models = {'seasonal_naive': SeasonalNaive(seasonal_column), 'ridge': ridge.solve()}
+        if 'gradient_boosting' in model_names and HistGradientBoostingRegressor is not None:
+            X_train = np.concatenate([X for X, _ in train_blocks])
+            y_train = np.concatenate([y for _, y in train_blocks])
+            models['gradient_boosting'] = GradientBoostingModel().fit(X_train, y_train)
+        fit_seconds = time.perf_counter() - began
+
+        X_test, y_test = np.concatenate(test_X), np.concatenate(test_y)
+        for name in model_names:
+            if name not in models:
+                continue
+            metrics.append(dict(building_type=building_type, horizon=horizon_name, model=name,
+                                fit_seconds=fit_seconds, **_errors(y_test, models[name].predict(X_test))))
+        fitted[horizon_name] = (spec, models)
+    return building_type, fitted, metrics
+
+def train_forecasters(series, horizons=HORIZONS, model_names=None, test_days=30, n_workers=1,
+                      holiday_country=None):
+    """Train all models for every building type, in parallel over building types
+
+    Returns ({building_type: {horizon: (spec, {model: fitted})}}, metrics frame,
+    training throughput in series per second).
+    """
+    model_names = model_names or available_models()
+    tasks = [(building_type, start, values, horizons, model_names, test_days * 24, holiday_country)
+             for building_type, (start, values) in sorted(series.items())]
+    began = time.perf_counter()
+    if n_workers == 1 or len(tasks) <= 1:
+        results = [_train_building(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(_train_building, tasks))
+    elapsed = time.perf_counter() - began
+
+    forecasters = {building_type: fitted for building_type, fitted, _ in results if fitted}
+    metrics = pd.DataFrame([row for _, _, rows in results for row in rows])
+    return forecasters, metrics, len(tasks) / elapsed if elapsed > 0 else np.inf
+
+def forecast(forecasters, series, horizon_name, model_name='ridge'):
+    """Batched forecast of the next horizon periods for every building type
+
+    Feature rows of all buildings are stacked and each building's model sees
+    its own slice, so one call serves every series. Returns a long frame of
+    building_type, Time and forecast.
+    """
+    if not forecasters:
+        return pd.DataFrame(columns=['building_type', 'Time', 'forecast'])
+    building_types = list(forecasters)
+    blocks = [forecast_features(series[bt][1], series[bt][0], forecasters[bt][horizon_name][0])
+              for bt in building_types]
+    X = np.concatenate([X for X, _ in blocks])
+    bounds = np.cumsum([0] + [len(times) for _, times in blocks])
+    predictions = np.empty(len(X))
+    for i, building_type in enumerate(building_types):
+        rows = slice(bounds[i], bounds[i + 1])
+        predictions[rows] = forecasters[building_type][horizon_name][1][model_name].predict(X[rows])
+    codes = np.repeat(np.arange(len(building_types)), np.diff(bounds))
+    return pd.DataFrame({'building_type': pd.Categorical.from_codes(codes, building_types),
+                         'Time': np.concatenate([times for _, times in blocks]), 'forecast': predictions})
+
+def benchmark_forecasts(forecasters, series, horizons=HORIZONS, model_names=None, repeats=20):
+    """Latency per batched call and throughput (series/sec, forecasts/sec) per horizon and model"""
+    model_names = model_names or available_models()
+    rows = []
+    for horizon_name in horizons:
+        for model_name in model_names:
+            if not all(model_name in fitted[horizon_name][1] for fitted in forecasters.values()):
+                continue
+            latencies = []
+            for _ in range(repeats):
+                began = time.perf_counter()
+                result = forecast(forecasters, series, horizon_name, model_name)
+                latencies.append(time.perf_counter() - began)
+            latency = float(np.median(latencies))
+            rows.append({'horizon': horizon_name, 'model': model_name,
+                         'latency_ms': latency * 1000, 'p95_latency_ms': float(np.percentile(latencies, 95)) * 1000,
+                         'series_per_sec': len(forecasters) / latency,
+                         'forecasts_per_sec': len(result) / latency})
+    return pd.DataFrame(rows)
+
+def run_forecasting(df, n_workers=None, test_days=30, output_file='forecast_metrics.csv', holiday_country=None):
+    """Train, evaluate and benchmark the baselines on load_building_power output
+
+    holiday_country adds an is_holiday feature from that country's calendar.
+    """
+    print("\n" + "="*50)
+    print("LOAD FORECASTING BASELINES")
+    print("="*50)
+
+    series = building_hourly_series(df)
+    print(f"Building types: {len(series)}, models: {', '.join(available_models())}")
+    if HistGradientBoostingRegressor is None:
+        print("scikit-learn not installed - gradient boosting skipped")
+
+    n_workers = n_workers or min(len(series), os.cpu_count() or 1)
+    forecasters, metrics, throughput = train_forecasters(series, test_days=test_days, n_workers=n_workers,
+                                                         holiday_country=holiday_country)
+    print(f"Trained {len(forecasters)} building types in parallel ({n_workers} workers): "
+          f"{throughput:.2f} series/sec")
+    if metrics.empty:
+        print("Not enough history to train and evaluate - skipped")
+        return forecasters, metrics
+
+    print(f"\nHOLDOUT ERRORS (last {test_days} days)")
+    print("-" * 30)
+    print(metrics.pivot_table(index=['horizon', 'model'], values=['mae', 'rmse'], aggfunc='mean').round(3))
+
+    timings = benchmark_forecasts(forecasters, series)
+    print("\nFORECAST LATENCY AND THROUGHPUT")
+    print("-" * 30)
+    print(timings.round(3).to_string(index=False))
+
+    metrics.to_csv(output_file, index=False)
+    print(f"\nForecast metrics saved to: {output_file}")
+    return forecasters, metrics
@@ -0,0 +1,81 @@
+import os
+import hashlib
+import pandas as pd
+
+
+# Shared by the power and weather ingests: one row per ingested source file
+MANIFEST_COLUMNS = ['file_path', 'size', 'mtime', 'sha1', 'rows']
+
+def file_content_hash(file_path, block_size=1 << 20):
+    """SHA-1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_ingest_manifest(manifest_file="ingest_manifest.csv"):
+    """Load the ingest manifest as a dict keyed by file path"""
+    if not os.path.exists(manifest_file):
+        return {}
+    # round_trip keeps the float mtimes exactly as written, so unchanged files compare equal
+    manifest_df = pd.read_csv(manifest_file, dtype={'sha1': str}, float_precision='round_trip')
+    return {row['file_path']: row for row in manifest_df.to_dict('records')}
+
+def save_ingest_manifest(manifest, manifest_file="ingest_manifest.csv"):
+    """Write the ingest manifest back to disk"""
+    records = [manifest[path] for path in sorted(manifest)]
+    pd.DataFrame(records, columns=MANIFEST_COLUMNS).to_csv(manifest_file, index=False)
+
+def stat_signature(file_path):
+    """Manifest entry from stat() alone, without a content hash
+
+    A later size/mtime change then counts as a change, since there is no
+    hash to prove the content is the same.
+    """
+    stat = os.stat(file_path)
+    return {'file_path': file_path, 'size': stat.st_size, 'mtime': stat.st_mtime, 'sha1': None}
+
+def record_ingested(manifest, loaded_files, signatures, errors, df):
+    """Add loaded files with their row counts to the manifest; failed files are left out to be retried"""
+    failed = {e['file_path'] for e in errors}
+    row_counts = df['file_path'].value_counts() if not df.empty else {}
+    for file_path in loaded_files:
+        if file_path in failed:
+            manifest.pop(file_path, None)
+        else:
+            manifest[file_path] = dict(signatures[file_path], rows=int(row_counts.get(file_path, 0)))
+    return manifest
+
+def find_changed_files(all_files, manifest):
+    """Split files into new, changed and removed relative to the manifest
+
+    Size and mtime are checked first; the content hash is only computed when
+    they differ, so unchanged files cost one stat() call each.
+    Returns (new_files, changed_files, removed_files, signatures).
+    """
+    new_files, changed_files = [], []
+    signatures = {}
+    
+    for file_path in all_files:
+        stat = os.stat(file_path)
+        entry = manifest.get(file_path)
+        if entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            continue
+        
+        sha1 = file_content_hash(file_path)
+        signatures[file_path] = {'file_path': file_path, 'size': stat.st_size,
+                                 'mtime': stat.st_mtime, 'sha1': sha1}
+        if entry is None:
+            new_files.append(file_path)
+        elif entry['sha1'] != sha1:
+            # Entries without a hash (written by a full build) compare unequal here too
+            changed_files.append(file_path)
+        else:
+            # Touched but identical content - only refresh the stat fields
+            manifest[file_path] = dict(entry, size=stat.st_size, mtime=stat.st_mtime)
+            del signatures[file_path]
+    
+    current = set(all_files)
+    removed_files = sorted(path for path in manifest if path not in current)
+    return new_files, changed_files, removed_files, signatures
@@ -0,0 +1,234 @@
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+from power_storage import load_power_frame, default_power_source, power_partitions, partition_signature
+from cadence_analysis import modal_intervals
+
+
+# One directory per building_type/year holding time-sorted readings plus a value order
+PEAK_INDEX = "peak_index"
+INDEX_ARRAYS = ('time', 'power', 'order', 'sorted_power')
+# Bumped whenever the array layout changes, so older indexes are rebuilt
+INDEX_FORMAT = 2
+PEAK_LEVELS = {'hourly': 'h', 'daily': 'D', 'monthly': 'M'}
+
+def _partition_dir(index_path, building_type, year):
+    return os.path.join(index_path, f"building_type={building_type}", f"year={year}")
+
+def index_partition(times, power):
+    """Index arrays for one series: readings sorted by time (duplicate times averaged),
+    the positions ordered by ascending power, and the ascending power values
+
+    Equal values are stored in reverse time order, so walking the order from
+    the end gives the highest readings with ties in time order.
+    """
+    times = np.asarray(times, dtype='datetime64[ns]').view(np.int64)
+    power = np.asarray(power, dtype=np.float64)
+    valid = ~np.isnan(power) & (times != np.iinfo(np.int64).min)
+    unique_times, inverse = np.unique(times[valid], return_inverse=True)
+    sums = np.bincount(inverse, weights=power[valid], minlength=len(unique_times))
+    counts = np.bincount(inverse, minlength=len(unique_times))
+    mean_power = (sums / np.maximum(counts, 1)).astype(np.float32)
+    # Stable sort on the negated values keeps equal peaks in time order, then reversed
+    order = np.argsort(-mean_power, kind='stable')[::-1].astype(np.int32)
+    return {'time': unique_times, 'power': mean_power, 'order': order, 'sorted_power': mean_power[order]}
+
+def build_peak_index(source=None, index_path=PEAK_INDEX, rebuild=False):
+    """Build or refresh the peak index, rewriting only partitions whose source files changed
+
+    Each building_type/year is read on its own, so memory stays at one
+    partition. Returns the number of partitions (re)built.
+    """
+    print("\n" + "="*50)
+    print("BUILDING PEAK INDEX")
+    print("="*50)
+
+    source = source or default_power_source()
+    if rebuild and os.path.exists(index_path):
+        shutil.rmtree(index_path)
+    partitions = power_partitions(source)
+    built = 0
+    for year, building_type in partitions:
+        directory = _partition_dir(index_path, building_type, year)
+        meta_file = os.path.join(directory, 'meta.json')
+        signature = partition_signature(source, year, building_type)
+        if os.path.exists(meta_file):
+            with open(meta_file) as f:
+                meta = json.load(f)
+                if meta.get('source') == signature and meta.get('format') == INDEX_FORMAT:
+                    continue
+        df = load_power_frame(source, columns=['Time', 'Power (kW)'], years=[year], building_types=[building_type])
+        arrays = index_partition(df['Time'].to_numpy(), df['Power (kW)'].to_numpy())
+        steps = np.diff(arrays['time'])
+        step = int(modal_intervals(np.zeros(len(steps), dtype=np.int64), steps, 1)[0])
+        os.makedirs(directory, exist_ok=True)
+        for name in INDEX_ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), arrays[name])
+        with open(meta_file, 'w') as f:
+            json.dump({'source': signature, 'format': INDEX_FORMAT, 'rows': int(len(arrays['time'])),
+                       'step_ns': step}, f)
+        built += 1
+        print(f"  {building_type}/{year}: {len(arrays['time'])} readings indexed")
+
+    # Partitions that disappeared from the source are dropped from the index
+    present = {(str(building_type), str(year)) for year, building_type in partitions}
+    if os.path.isdir(index_path):
+        for bt_dir in os.listdir(index_path):
+            for year_dir in os.listdir(os.path.join(index_path, bt_dir)):
+                key = (bt_dir.split('=', 1)[-1], year_dir.split('=', 1)[-1])
+                if key not in present:
+                    shutil.rmtree(os.path.join(index_path, bt_dir, year_dir))
+    print(f"Peak index at {index_path}: {built} of {len(partitions)} partitions rebuilt")
+    return built
+
+class PeakIndex:
+    """Millisecond peak queries over the per-partition index built by build_peak_index
+
+    Arrays are memory-mapped on first use. Time ranges become a searchsorted
+    slice of the time-sorted readings; top-N scans the value order from its
+    highest end only until N readings inside the range are found.
+    """
+
+    def __init__(self, index_path=PEAK_INDEX):
+        self.index_path = index_path
+        self._partitions = {}
+        for bt_dir in sorted(os.listdir(index_path)) if os.path.isdir(index_path) else []:
+            for year_dir in sorted(os.listdir(os.path.join(index_path, bt_dir))):
+                key = (bt_dir.split('=', 1)[-1], year_dir.split('=', 1)[-1])
+                self._partitions[key] = None
+
+    @property
+    def building_types(self):
+        return sorted({building_type for building_type, _ in self._partitions})
+
+    def _load(self, key):
+        if self._partitions[key] is None:
+            directory = _partition_dir(self.index_path, *key)
+            arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r') for name in INDEX_ARRAYS}
+            with open(os.path.join(directory, 'meta.json')) as f:
+                arrays['step_ns'] = json.load(f)['step_ns']
+            self._partitions[key] = arrays
+        return self._partitions[key]
+
+    def _select(self, building_type=None, years=None, start=None, end=None):
+        """(key, arrays, first, stop) for every partition overlapping the query, stop exclusive"""
+        start = pd.Timestamp(start).value if start is not None else None
+        end = pd.Timestamp(end).value if end is not None else None
+        building_types = [building_type] if isinstance(building_type, str) else building_type
+        selected = []
+        for key in self._partitions:
+            if building_types is not None and key[0] not in building_types:
+                continue
+            if years is not None and key[1] not in {str(year) for year in years}:
+                continue
+            arrays = self._load(key)
+            first = int(np.searchsorted(arrays['time'], start)) if start is not None else 0
+            stop = int(np.searchsorted(arrays['time'], end)) if end is not None else len(arrays['time'])
+            if stop > first:
+                selected.append((key, arrays, first, stop))
+        return selected
+
+    def top_peaks(self, n=100, building_type=None, years=None, start=None, end=None, block=4096):
+        """The n highest readings (per building type) with start <= Time < end"""
+        frames = []
+        for (bt, year), arrays, first, stop in self._select(building_type, years, start, end):
+            order = arrays['order']
+            hits = []
+            found = 0
+            # Walk down from the highest value block by block until n in-range readings are found
+            for block_end in range(len(order), 0, -block):
+                positions = np.asarray(order[max(block_end - block, 0):block_end])[::-1]
+                positions = positions[(positions >= first) & (positions < stop)]
+                hits.append(positions[:n - found])
+                found += len(hits[-1])
+                if found >= n:
+                    break
+            positions = np.concatenate(hits) if hits else np.empty(0, dtype=np.int32)
+            frames.append(pd.DataFrame({'building_type': bt, 'year': year,
+                                        'Time': np.asarray(arrays['time'][positions]).view('datetime64[ns]'),
+                                        'Power (kW)': np.asarray(arrays['power'][positions])}))
+        if not frames:
+            return pd.DataFrame(columns=['building_type', 'year', 'Time', 'Power (kW)', 'rank'])
+        result = pd.concat(frames, ignore_index=True)
+        # Partitions of one building type are merged, then cut back to n each
+        result = result.sort_values(['building_type', 'Power (kW)', 'Time'], ascending=[True, False, True],
+                                    kind='stable')
+        result['rank'] = result.groupby('building_type', sort=False).cumcount() + 1
+        return result[result['rank'] <= n].reset_index(drop=True)
+
+    def exceedance(self, threshold, building_type=None, years=None, start=None, end=None):
+        """Readings and hours above threshold kW per building type within [start, end)"""
+        rows = {}
+        for (bt, year), arrays, first, stop in self._select(building_type, years, start, end):
+            if first == 0 and stop == len(arrays['time']):
+                # Whole partition: binary search in the ascending values, which touches only O(log n) pages
+                count = len(arrays['sorted_power']) - int(np.searchsorted(arrays['sorted_power'], threshold, side='right'))
+            else:
+                count = int(np.count_nonzero(arrays['power'][first:stop] > threshold))
+            row = rows.setdefault(bt, {'building_type': bt, 'readings': 0, 'hours': 0.0})
+            row['readings'] += count
+            row['hours'] += count * arrays['step_ns'] / 3.6e12
+        return pd.DataFrame(list(rows.values()), columns=['building_type', 'readings', 'hours'])
+
+    def exceedance_by_period(self, threshold, level='daily', building_type=None, years=None, start=None, end=None):
+        """Readings above threshold kW per building type and period"""
+        frames = []
+        for (bt, year), arrays, first, stop in self._select(building_type, years, start, end):
+            times = np.asarray(arrays['time'][first:stop]).view('datetime64[ns]')
+            above = times[np.asarray(arrays['power'][first:stop]) > threshold]
+            periods, counts = np.unique(above.astype(f"datetime64[{PEAK_LEVELS[level]}]"), return_counts=True)
+            frames.append(pd.DataFrame({'building_type': bt, 'period': periods.astype('datetime64[ns]'),
+                                        'readings': counts}))
+        if not frames:
+            return pd.DataFrame(columns=['building_type', 'period', 'readings'])
+        return pd.concat(frames, ignore_index=True).sort_values(['building_type', 'period'], ignore_index=True)
+
+    def maxima(self, level='daily', building_type=None, years=None, start=None, end=None):
+        """Peak reading and its time per building type and hour/day/month"""
+        frames = []
+        for (bt, year), arrays, first, stop in self._select(building_type, years, start, end):
+            times = np.asarray(arrays['time'][first:stop])
+            power = np.asarray(arrays['power'][first:stop])
+            periods = times.view('datetime64[ns]').astype(f"datetime64[{PEAK_LEVELS[level]}]")
+            # Within each period the last row of the (period, power) order is its maximum
+            order = np.lexsort((power, periods))
+            last = order[np.r_[periods[order][1:] != periods[order][:-1], True]]
+            frames.append(pd.DataFrame({'building_type': bt, 'period': periods[last].astype('datetime64[ns]'),
+                                        'Time': times[last].view('datetime64[ns]'), 'Power (kW)': power[last]}))
+        if not frames:
+            return pd.DataFrame(columns=['building_type', 'period', 'Time', 'Power (kW)'])
+        return pd.concat(frames, ignore_index=True).sort_values(['building_type', 'period'], ignore_index=True)
+
+    def load_duration_curve(self, building_type=None, years=None, points=200):
+        """Hours each load level was reached or exceeded, per building type
+
+        Evaluated at `points` levels between the minimum and maximum reading by
+        binary search in each partition's ascending values, so no partition
+        is re-sorted or fully read.
+        """
+        selected = self._select(building_type, years)
+        frames = []
+        for bt in sorted({key[0] for key, _, _, _ in selected}):
+            parts = [arrays for key, arrays, _, _ in selected if key[0] == bt]
+            low = min(float(arrays['sorted_power'][0]) for arrays in parts)
+            high = max(float(arrays['sorted_power'][-1]) for arrays in parts)
+            levels = np.linspace(high, low, points)
+            hours = np.zeros(points)
+            for arrays in parts:
+                reached = len(arrays['sorted_power']) - np.searchsorted(arrays['sorted_power'], levels, side='left')
+                hours += reached * arrays['step_ns'] / 3.6e12
+            total = sum(len(arrays['sorted_power']) * arrays['step_ns'] / 3.6e12 for arrays in parts)
+            frames.append(pd.DataFrame({'building_type': bt, 'Power (kW)': levels, 'hours': hours,
+                                        'fraction_of_time': hours / total if total else np.nan}))
+        if not frames:
+            return pd.DataFrame(columns=['building_type', 'Power (kW)', 'hours', 'fraction_of_time'])
+        return pd.concat(frames, ignore_index=True)
+
+if __name__ == "__main__":
+    build_peak_index()
+    index = PeakIndex()
+    print("\nTOP 10 PEAKS PER BUILDING TYPE")
+    print("-" * 30)
+    print(index.top_peaks(10).to_string(index=False))
@@ -0,0 +1,138 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+
+# Mirror of the raw workbook tree with one Arrow IPC file per source workbook
+CACHE_PATH = "power_file_cache"
+CACHE_SUFFIX = '.arrow'
+
+def cache_file_path(file_path, source_root, cache_root=CACHE_PATH):
+    """Mirrored cache location of a source file, or None when it lies outside source_root"""
+    relative = os.path.relpath(os.path.abspath(file_path), os.path.abspath(source_root))
+    if relative.startswith(os.pardir):
+        return None
+    return os.path.join(cache_root, relative + CACHE_SUFFIX)
+
+def _source_signature(file_path):
+    stat = os.stat(file_path)
+    return {b'source_size': str(stat.st_size).encode(), b'source_mtime_ns': str(stat.st_mtime_ns).encode()}
+
+def read_cached_frame(file_path, cache_path):
+    """Cached frame for file_path, or None if the cache is missing or older than the source"""
+    if cache_path is None or not os.path.exists(cache_path):
+        return None
+    try:
+        table = feather.read_table(cache_path, memory_map=True)
+    except (pa.ArrowInvalid, OSError):
+        return None
+    metadata = table.schema.metadata or {}
+    signature = _source_signature(file_path)
+    if any(metadata.get(key) != value for key, value in signature.items()):
+        return None
+    return table.to_pandas()
+
+def write_cached_frame(df, file_path, cache_path):
+    """Store df with the source size/mtime it was read from; returns False if it cannot be stored"""
+    if 'Time' in df.columns and df['Time'].dtype == object:
+        # Text timestamps are parsed once here instead of on every later read
+        df = df.assign(Time=pd.to_datetime(df['Time'], errors='coerce'))
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return False
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **_source_signature(file_path)})
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    # Write then rename so a crashed run never leaves a truncated cache file behind
+    temporary = f"{cache_path}.{os.getpid()}.tmp"
+    feather.write_feather(table, temporary, compression='uncompressed')
+    os.replace(temporary, cache_path)
+    return True
+
+def read_through_cache(file_path, reader, source_root, cache_root=CACHE_PATH):
+    """reader(file_path) served from the cache mirror when it is current
+
+    A stale or missing entry is re-read from the source and refreshed, but
+    only once the mirror exists (build it with convert_to_cache).
+    """
+    cache_path = cache_file_path(file_path, source_root, cache_root) if os.path.isdir(cache_root) else None
+    df = read_cached_frame(file_path, cache_path)
+    if df is not None:
+        return df
+    df = reader(file_path)
+    if cache_path is not None:
+        write_cached_frame(df, file_path, cache_path)
+    return df
+
+def cache_status(file_paths, source_root, cache_root=CACHE_PATH):
+    """(current, stale, missing) counts of cache entries for file_paths, checked from metadata only"""
+    current = stale = missing = 0
+    for file_path in file_paths:
+        cache_path = cache_file_path(file_path, source_root, cache_root)
+        if cache_path is None or not os.path.exists(cache_path):
+            missing += 1
+            continue
+        with pa.memory_map(cache_path) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+        if all(metadata.get(key) == value for key, value in _source_signature(file_path).items()):
+            current += 1
+        else:
+            stale += 1
+    return current, stale, missing
+
+def _convert_chunk(task):
+    """Refresh the cache entries of one directory's files; runs inside a worker process"""
+    file_paths, reader, source_root, cache_root = task
+    converted, skipped, errors = 0, 0, []
+    for file_path in file_paths:
+        cache_path = cache_file_path(file_path, source_root, cache_root)
+        try:
+            if read_cached_frame(file_path, cache_path) is not None:
+                skipped += 1
+                continue
+            if write_cached_frame(reader(file_path), file_path, cache_path):
+                converted += 1
+            else:
+                errors.append({'file_path': file_path, 'error': "Not representable in Arrow"})
+        except Exception as e:
+            errors.append({'file_path': file_path, 'error': f"{type(e).__name__}: {e}"})
+    return converted, skipped, errors
+
+def convert_to_cache(file_paths, reader, source_root, cache_root=CACHE_PATH, n_workers=1):
+    """Mirror every source file into the cache, converting only new or modified ones
+
+    An entry counts as current when the source size and mtime_ns match the
+    ones stored with it; contents are not hashed, so an edit that keeps both
+    is not picked up. Orphaned .arrow entries are removed only from
+    directories that mirror an existing source directory, and nothing else in
+    cache_root is touched. Returns (converted, up to date, errors).
+    """
+    chunks = {}
+    for file_path in file_paths:
+        chunks.setdefault(os.path.dirname(file_path), []).append(file_path)
+    tasks = [(chunks[key], reader, source_root, cache_root) for key in sorted(chunks)]
+    os.makedirs(cache_root, exist_ok=True)
+
+    if n_workers == 1 or len(tasks) <= 1:
+        results = [_convert_chunk(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(_convert_chunk, tasks))
+
+    expected = {os.path.normpath(path) for path in (cache_file_path(f, source_root, cache_root) for f in file_paths)
+                if path is not None}
+    for root, _, files in os.walk(cache_root):
+        # A directory missing from the source (e.g. an unmounted share) keeps its entries
+        if not os.path.isdir(os.path.join(source_root, os.path.relpath(root, cache_root))):
+            continue
+        for file in files:
+            path = os.path.normpath(os.path.join(root, file))
+            if file.endswith(CACHE_SUFFIX) and path not in expected:
+                os.remove(path)
+
+    converted = sum(result[0] for result in results)
+    skipped = sum(result[1] for result in results)
+    errors = [error for result in results for error in result[2]]
+    return converted, skipped, errors
@@ -0,0 +1,118 @@
+import os
+import numpy as np
+import pandas as pd
+
+
+# Pre-aggregated Power (kW) rollups per building_type, one Parquet file per level
+CUBE_PATH = "power_cube"
+LEVELS = {'5min': '5min', 'hourly': 'h', 'daily': 'D', 'monthly': 'M'}
+MEASURES = ['count', 'sum', 'sumsq', 'min', 'max']
+
+def _period_start(times, level):
+    if LEVELS[level] == 'M':
+        # Calendar months are not a fixed frequency, so floor through periods
+        return times.dt.to_period('M').dt.to_timestamp()
+    return times.dt.floor(LEVELS[level])
+
+def rollup(df, level, value_col='Power (kW)'):
+    """count/sum/sumsq/min/max of value_col per building_type and period"""
+    values = df[value_col].astype('float64')
+    frame = pd.DataFrame({
+        'building_type': df['building_type'] if 'building_type' in df.columns else 'All',
+        'period': _period_start(df['Time'], level),
+        'value': values,
+        'square': values * values,
+    }).dropna(subset=['value', 'period'])
+    grouped = frame.groupby(['building_type', 'period'], observed=True)
+    table = pd.DataFrame({
+        'count': grouped['value'].count(),
+        'sum': grouped['value'].sum(),
+        'sumsq': grouped['square'].sum(),
+        'min': grouped['value'].min(),
+        'max': grouped['value'].max(),
+    }).reset_index()
+    table['building_type'] = table['building_type'].astype(str)
+    return table
+
+def build_cube(df, levels=LEVELS):
+    """Rollups for every level from raw rows"""
+    return {level: rollup(df, level) for level in levels}
+
+def merge_rollups(*tables):
+    """Combine rollups of the same level; counts and sums add, extremes take min/max"""
+    tables = [t for t in tables if t is not None and len(t)]
+    if not tables:
+        return pd.DataFrame(columns=['building_type', 'period'] + MEASURES)
+    combined = pd.concat(tables, ignore_index=True)
+    grouped = combined.groupby(['building_type', 'period'])
+    return grouped.agg(count=('count', 'sum'), sum=('sum', 'sum'), sumsq=('sumsq', 'sum'),
+                       min=('min', 'min'), max=('max', 'max')).reset_index()
+
+def _level_file(cube_path, level):
+    return os.path.join(cube_path, f"{level}.parquet")
+
+def save_cube(cube, cube_path=CUBE_PATH):
+    os.makedirs(cube_path, exist_ok=True)
+    for level, table in cube.items():
+        table.sort_values(['building_type', 'period']).to_parquet(_level_file(cube_path, level), index=False)
+    print(f"Aggregation cube saved to: {cube_path}")
+    return cube_path
+
+def load_rollup(level, cube_path=CUBE_PATH, building_types=None, start=None, end=None):
+    """Read one level, filtered by building type and [start, end) period"""
+    filters = []
+    if building_types is not None:
+        filters.append(('building_type', 'in', list(building_types)))
+    if start is not None:
+        filters.append(('period', '>=', pd.Timestamp(start)))
+    if end is not None:
+        filters.append(('period', '<', pd.Timestamp(end)))
+    return pd.read_parquet(_level_file(cube_path, level), filters=filters or None)
+
+def rollup_mtime(level, cube_path=CUBE_PATH):
+    """Modification time of a level's file, for invalidating results derived from it"""
+    return os.path.getmtime(_level_file(cube_path, level))
+
+def cube_exists(cube_path=CUBE_PATH):
+    return all(os.path.exists(_level_file(cube_path, level)) for level in LEVELS)
+
+def update_cube(new_df, cube_path=CUBE_PATH):
+    """Fold newly ingested rows into the persisted cube"""
+    if new_df.empty:
+        return None
+    new_cube = build_cube(new_df)
+    if cube_exists(cube_path):
+        new_cube = {level: merge_rollups(load_rollup(level, cube_path), table)
+                    for level, table in new_cube.items()}
+    return save_cube(new_cube, cube_path)
+
+def replace_building_types(rows_df, building_types, cube_path=CUBE_PATH):
+    """Recompute every period of the given building types from rows_df
+
+    Used when source files change or disappear: min/max cannot be subtracted, so
+    those building types are rebuilt from the stored rows instead.
+    """
+    if not cube_exists(cube_path):
+        return save_cube(build_cube(rows_df), cube_path)
+    cube = {}
+    for level in LEVELS:
+        table = load_rollup(level, cube_path)
+        kept = table[~table['building_type'].isin(list(building_types))]
+        cube[level] = merge_rollups(kept, rollup(rows_df, level) if len(rows_df) else None)
+    return save_cube(cube, cube_path)
+
+def with_moments(table):
+    """Add mean and sample std (ddof=1, as pandas) derived from the stored sums"""
+    table = table.copy()
+    count = table['count'].astype('float64')
+    table['mean'] = table['sum'] / count
+    variance = (table['sumsq'] - table['sum'] ** 2 / count) / (count - 1)
+    table['std'] = np.sqrt(variance.clip(lower=0)).where(count > 1)
+    return table
+
+def combine_buildings(table):
+    """Collapse building types into one series per period"""
+    grouped = table.groupby('period')
+    combined = grouped.agg(count=('count', 'sum'), sum=('sum', 'sum'), sumsq=('sumsq', 'sum'),
+                           min=('min', 'min'), max=('max', 'max')).reset_index()
+    return with_moments(combined)
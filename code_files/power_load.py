@@ -1,9 +1,26 @@
 import pandas as pd
 import os
+import sys
+import shutil
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from ingest_manifest import (load_ingest_manifest, save_ingest_manifest, stat_signature, record_ingested,
+                             find_changed_files)
+from power_storage import (STORE_PATH, write_power_store, append_power_store,
+                           replace_power_partitions, read_power_store,
+                           compact_power_frame, METADATA_COLUMNS)
+from cadence_analysis import analyze_frame_cadence, format_cadence
+from xlsx_reader import read_power_workbook, project_power_columns
+from density_plot import histogram_counts
+from power_cache import CACHE_PATH, read_through_cache, convert_to_cache, cache_status
+from power_cube import CUBE_PATH, build_cube, save_cube, update_cube, replace_building_types
+from peak_index import PEAK_INDEX, build_peak_index
+from power_query import SORTED_PATH, build_sorted_store
+from drift_detection import (DRIFT_STATE, detect_drift, load_drift_monitor, save_drift_monitor,
+                             write_drift_events)
 
 
 base_path = r"C:\Users\karti\Desktop\data_set\Electric power load data\Electric power load data"
@@ -12,6 +29,12 @@ base_path = r"C:\Users\karti\Desktop\data_set\Electric power load data\Electric
 building_types = ['Office', 'Commercial', 'Public', 'Residential']
 years = ['2016', '2017', '2018', '2019', '2020', '2021']
 
+# Binary mirror of base_path (built with --build-cache); set to None to always read the workbooks
+cache_path = CACHE_PATH
+
+# Worker processes used to parse files (1 = sequential, None = one per CPU)
+ingest_workers = None
+
 def diagnose_directory_structure():
     print("DIRECTORY STRUCTURE DIAGNOSIS")
     print("="*50)
@@ -61,6 +84,10 @@ def diagnose_directory_structure():
                                 files = os.listdir(item_path)
                                 excel_files = [f for f in files if f.endswith(('.xlsx', '.xls', '.csv'))]
                                 print(f"        Excel/CSV files: {len(excel_files)}")
+                                if cache_path is not None and os.path.isdir(cache_path):
+                                    current, stale, missing = cache_status(
+                                        [os.path.join(item_path, f) for f in excel_files], base_path, cache_path)
+                                    print(f"        Cached: {current} current, {stale} stale, {missing} missing")
                                 if excel_files:
                                     for f in excel_files[:3]:  # Show first 3 files
                                         print(f"          {f}")
@@ -73,7 +100,7 @@ def diagnose_directory_structure():
             except Exception as e:
                 print(f"  Error listing year directory: {e}")
 
-def find_all_excel_files():
+def find_all_excel_files(verbose=True):
     """Find all Excel files in the directory structure"""
     print("\n" + "="*50)
     print("SEARCHING FOR ALL EXCEL FILES")
@@ -81,15 +108,18 @@ def find_all_excel_files():
     
     all_files = []
     
-    # Walk through all directories
+    # Walk through all directories (sorted so the file order is deterministic)
     for root, dirs, files in os.walk(base_path):
-        excel_files = [f for f in files if f.endswith(('.xlsx', '.xls', '.csv'))]
+        dirs.sort()
+        excel_files = sorted(f for f in files if f.endswith(('.xlsx', '.xls', '.csv')))
         if excel_files:
-            print(f"\nFound {len(excel_files)} files in: {root}")
+            if verbose:
+                print(f"\nFound {len(excel_files)} files in: {root}")
             for file in excel_files:
                 file_path = os.path.join(root, file)
                 all_files.append(file_path)
-                print(f"  {file}")
+                if verbose:
+                    print(f"  {file}")
     
     print(f"\nTotal Excel/CSV files found: {len(all_files)}")
     return all_files
@@ -100,11 +130,7 @@ def load_sample_file(file_path):
     print("="*50)
     
     try:
-        # Try different methods to read the file
-        if file_path.endswith('.csv'):
-            df = pd.read_csv(file_path)
-        else:
-            df = pd.read_excel(file_path)
+        df = read_power_file(file_path)
         
         print(f"File loaded successfully!")
         print(f"Shape: {df.shape}")
@@ -120,8 +146,151 @@ def load_sample_file(file_path):
         print(f"Error loading file: {e}")
         return None
 
-def load_all_data_flexible():
-    """Load all data with flexible approach"""
+def extract_file_metadata(file_path):
+    """Extract year and building type from a file path"""
+    path_parts = file_path.replace(base_path, '').split(os.sep)
+    year = None
+    building_type = None
+    
+    for part in path_parts:
+        if part.isdigit() and len(part) == 4:
+            year = part
+        elif any(bt in part for bt in building_types):
+            for bt in building_types:
+                if bt in part:
+                    building_type = bt
+                    break
+    
+    return year if year else 'Unknown', building_type if building_type else 'Unknown'
+
+def read_source_file(file_path):
+    """Parse a single power workbook/CSV from the raw archive"""
+    if file_path.endswith('.csv'):
+        return project_power_columns(pd.read_csv(file_path))
+    return read_power_workbook(file_path)
+
+def read_power_file(file_path):
+    """Read a single power file into a DataFrame, from the binary cache when it is current"""
+    if cache_path is None:
+        return read_source_file(file_path)
+    # Entries written before every reader was projected may still carry extra sheet columns
+    return project_power_columns(read_through_cache(file_path, read_source_file, base_path, cache_path))
+
+def build_power_cache(n_workers=1, error_manifest="cache_errors.csv"):
+    """Convert the raw archive into the binary cache mirror, skipping files already cached"""
+    print("\n" + "="*50)
+    print("BUILDING BINARY CACHE")
+    print("="*50)
+    
+    all_files = find_all_excel_files(verbose=False)
+    converted, current, errors = convert_to_cache(all_files, read_source_file, base_path,
+                                                  cache_path or CACHE_PATH, n_workers=n_workers)
+    print(f"Converted: {converted}, already current: {current}, failed: {len(errors)}")
+    if errors:
+        pd.DataFrame(errors).to_csv(error_manifest, index=False)
+        print(f"Failed files listed in: {error_manifest}")
+    elif os.path.exists(error_manifest):
+        os.remove(error_manifest)
+    return converted, current, errors
+
+def chunk_files(all_files, chunk_by='directory', chunk_size=None):
+    """Group files into work chunks by directory or year, optionally capped at chunk_size files"""
+    groups = {}
+    for index, file_path in enumerate(all_files):
+        if chunk_by == 'year':
+            key = extract_file_metadata(file_path)[0]
+        elif chunk_by == 'directory':
+            key = os.path.dirname(file_path)
+        else:
+            raise ValueError(f"Unknown chunk_by value: {chunk_by}")
+        groups.setdefault(key, []).append((index, file_path))
+    
+    chunks = []
+    for key in sorted(groups):
+        members = groups[key]
+        step = chunk_size if chunk_size else len(members)
+        for start in range(0, len(members), step):
+            chunks.append((key, members[start:start + step]))
+    return chunks
+
+def _load_file_chunk(chunk):
+    """Parse one chunk of files; runs inside a worker process"""
+    key, members = chunk
+    results = []
+    for index, file_path in members:
+        try:
+            results.append((index, read_power_file(file_path), None))
+        except Exception as e:
+            results.append((index, None, f"{type(e).__name__}: {e}"))
+    return key, results
+
+def attach_file_metadata(combined_df, file_paths, lengths):
+    """Add file/year/building columns as categoricals built from one code per source file"""
+    file_ids = np.repeat(np.arange(len(file_paths), dtype=np.int32), lengths)
+    metadata = [(path, os.path.basename(path)) + extract_file_metadata(path) for path in file_paths]
+    
+    for col, values in zip(METADATA_COLUMNS, zip(*metadata)):
+        codes, categories = pd.factorize(pd.Series(values, dtype=object))
+        combined_df[col] = pd.Categorical.from_codes(codes[file_ids], categories=categories)
+    return combined_df
+
+def ingest_power_files(all_files, n_workers=1, chunk_by='directory', chunk_size=None):
+    """Parse files sequentially or over a process pool; returns (combined_df, errors)"""
+    chunks = chunk_files(all_files, chunk_by=chunk_by, chunk_size=chunk_size)
+    loaded = {}
+    errors = []
+    
+    def collect(key, results):
+        records = 0
+        for index, df, error in results:
+            if error is None:
+                loaded[index] = df
+                records += len(df)
+            else:
+                file_path = all_files[index]
+                year, building_type = extract_file_metadata(file_path)
+                errors.append({'file_path': file_path, 'year': year,
+                               'building_type': building_type, 'error': error})
+        print(f"  {key}: {records} records from {len(results)} files")
+    
+    if n_workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            collect(*_load_file_chunk(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            for key, results in executor.map(_load_file_chunk, chunks):
+                collect(key, results)
+    
+    # Merge in the original file order so the output does not depend on scheduling
+    indices = sorted(loaded)
+    frames = [loaded[index] for index in indices]
+    combined_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if frames:
+        attach_file_metadata(combined_df, [all_files[index] for index in indices],
+                             [len(df) for df in frames])
+        compact_power_frame(combined_df)
+    errors.sort(key=lambda e: e['file_path'])
+    return combined_df, errors
+
+def write_error_manifest(errors, manifest_file="ingest_errors.csv"):
+    """Save per-file load failures so they can be inspected and retried"""
+    if not errors:
+        if os.path.exists(manifest_file):
+            os.remove(manifest_file)
+        return None
+    pd.DataFrame(errors, columns=['file_path', 'year', 'building_type', 'error']).to_csv(manifest_file, index=False)
+    print(f"{len(errors)} files failed to load - see {manifest_file}")
+    return manifest_file
+
+def load_all_data_flexible(n_workers=1, chunk_by='directory', chunk_size=None,
+                           error_manifest="ingest_errors.csv", manifest_file="ingest_manifest.csv"):
+    """Load all data with flexible approach
+
+    n_workers > 1 (or None for one per CPU) parses files over a process pool.
+    Failed files are collected into error_manifest instead of being dropped.
+    Every loaded file is recorded in the ingest manifest, so a later
+    --incremental run only picks up files added or changed after this load.
+    """
     print("\n" + "="*50)
     print("LOADING ALL DATA (FLEXIBLE APPROACH)")
     print("="*50)
@@ -132,51 +301,126 @@ def load_all_data_flexible():
         print("No Excel/CSV files found!")
         return pd.DataFrame()
     
-    all_dataframes = []
-    
-    for file_path in all_files:
-        try:
-            print(f"\nLoading: {file_path}")
-            
-            # Extract metadata from path
-            path_parts = file_path.replace(base_path, '').split(os.sep)
-            year = None
-            building_type = None
-            
-            # Try to extract year and building type from path
-            for part in path_parts:
-                if part.isdigit() and len(part) == 4:
-                    year = part
-                elif any(bt in part for bt in building_types):
-                    for bt in building_types:
-                        if bt in part:
-                            building_type = bt
-                            break
-            
-            # Load the file
-            if file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
-            else:
-                df = pd.read_excel(file_path)
-            
-            # Add metadata
-            df['file_path'] = file_path
-            df['file_name'] = os.path.basename(file_path)
-            df['year'] = year if year else 'Unknown'
-            df['building_type'] = building_type if building_type else 'Unknown'
-            
-            all_dataframes.append(df)
-            print(f"  Loaded {len(df)} records")
-            
-        except Exception as e:
-            print(f"   Error loading {file_path}: {e}")
+    combined_df, errors = ingest_power_files(all_files, n_workers=n_workers,
+                                             chunk_by=chunk_by, chunk_size=chunk_size)
+    write_error_manifest(errors, error_manifest)
+    # stat() only: hashing would read every file a second time right after parsing it
+    signatures = {file_path: stat_signature(file_path) for file_path in all_files}
+    save_ingest_manifest(record_ingested({}, all_files, signatures, errors, combined_df), manifest_file)
     
-    if all_dataframes:
-        combined_df = pd.concat(all_dataframes, ignore_index=True)
+    if not combined_df.empty:
         print(f"\nTotal records loaded: {len(combined_df)}")
-        return combined_df
+    return combined_df
+
+def _partition_keys(df):
+    return df['year'].astype(str) + '/' + df['building_type'].astype(str)
+
+def _rebuild_partitions(stale_files, new_df, store_path):
+    """Rewrite the partitions holding stale files; returns the new rows that were not written"""
+    affected = {extract_file_metadata(path) for path in stale_files}
+    wanted = {f"{year}/{bt}" for year, bt in affected}
+    
+    existing_df = read_power_store(store_path, years=sorted({year for year, _ in affected}),
+                                   building_types=sorted({bt for _, bt in affected}))
+    existing_df = existing_df[_partition_keys(existing_df).isin(wanted) &
+                              ~existing_df['file_path'].isin(stale_files)]
+    
+    if new_df.empty:
+        rebuilt_df, remaining_df = existing_df, new_df
     else:
-        return pd.DataFrame()
+        in_affected = _partition_keys(new_df).isin(wanted)
+        rebuilt_df = pd.concat([existing_df, new_df[in_affected]], ignore_index=True)
+        remaining_df = new_df[~in_affected]
+    replace_power_partitions(rebuilt_df, store_path)
+    
+    # delete_matching only touches partitions that received rows; drop emptied ones explicitly
+    kept = set(_partition_keys(rebuilt_df))
+    for year, bt in affected:
+        partition_dir = os.path.join(store_path, f"year={year}", f"building_type={bt}")
+        if f"{year}/{bt}" not in kept and os.path.isdir(partition_dir):
+            shutil.rmtree(partition_dir)
+    
+    return remaining_df
+
+def report_drift(events):
+    """Print change points that should trigger retraining the forecasting models"""
+    if not events:
+        print("No drift detected")
+        return
+    for event in events:
+        print(f"  Drift in {event['building_type']} at {event['Time']} ({event['detector']}, {event['direction']})")
+    print(f"Retraining recommended for: {', '.join(sorted({e['building_type'] for e in events}))}")
+
+def update_combined_data(store_path=STORE_PATH, manifest_file="ingest_manifest.csv", n_workers=1,
+                         error_manifest="ingest_errors.csv", cube_path=CUBE_PATH, drift_state=DRIFT_STATE,
+                         peak_index_path=PEAK_INDEX, sorted_path=SORTED_PATH):
+    """Incrementally refresh the power data store from new or changed files only"""
+    print("\n" + "="*50)
+    print("INCREMENTAL DATA REFRESH")
+    print("="*50)
+    
+    # Without an existing store the manifest is meaningless - rebuild everything
+    manifest = load_ingest_manifest(manifest_file) if os.path.isdir(store_path) else {}
+    
+    all_files = find_all_excel_files(verbose=False)
+    new_files, changed_files, removed_files, signatures = find_changed_files(all_files, manifest)
+    print(f"New files: {len(new_files)}, changed: {len(changed_files)}, removed: {len(removed_files)}")
+    
+    to_load = sorted(new_files + changed_files)
+    new_df, errors = ingest_power_files(to_load, n_workers=n_workers) if to_load else (pd.DataFrame(), [])
+    write_error_manifest(errors, error_manifest)
+    
+    # Cheap cadence check on just the new files catches gaps and overlaps at ingest time
+    if not new_df.empty:
+        print("\nCadence of new files:")
+        for line in format_cadence(analyze_frame_cadence(new_df)):
+            print(f"  {line}")
+    
+    stale = sorted(set(changed_files) | set(removed_files))
+    if not os.path.isdir(store_path):
+        # A rebuilt store gets a fresh cube, or its rows would be counted twice
+        if os.path.isdir(cube_path):
+            shutil.rmtree(cube_path)
+        if not new_df.empty:
+            write_power_store(new_df, store_path)
+    else:
+        # Rows from changed or removed files must be replaced, which rewrites their partitions
+        remaining_df = _rebuild_partitions(stale, new_df, store_path) if stale else new_df
+        append_power_store(remaining_df, store_path)
+    
+    # Keep the aggregation cube in step with the store
+    if stale:
+        stale_types = sorted({extract_file_metadata(path)[1] for path in stale})
+        rows_df = read_power_store(store_path, columns=['Time', 'Power (kW)', 'building_type'],
+                                   building_types=stale_types)
+        replace_building_types(rows_df, stale_types, cube_path)
+        if not new_df.empty:
+            update_cube(new_df[~new_df['building_type'].isin(stale_types)], cube_path)
+    else:
+        update_cube(new_df, cube_path)
+    
+    # Peak index and sorted store are rebuilt only where the store files changed
+    if os.path.isdir(store_path):
+        build_peak_index(store_path, peak_index_path)
+        build_sorted_store(store_path, sorted_path)
+    
+    # Only readings newer than those already seen advance the drift detectors
+    if not new_df.empty:
+        print("\nDrift check on new readings:")
+        monitor = load_drift_monitor(drift_state)
+        events = monitor.update(new_df)
+        report_drift(events)
+        write_drift_events(events)
+        save_drift_monitor(monitor, drift_state)
+    
+    # Record what was ingested; failed files stay out of the manifest and are retried next run
+    for file_path in removed_files:
+        manifest.pop(file_path, None)
+    record_ingested(manifest, to_load, signatures, errors, new_df)
+    save_ingest_manifest(manifest, manifest_file)
+    
+    print(f"Added {len(new_df)} records to {store_path}")
+    return new_df
 
 def safe_summary_statistics(combined_df):
     """Generate summary statistics safely"""
@@ -253,7 +497,11 @@ def create_basic_visualizations(combined_df):
         plt.subplot(2, 2, 4)
         # Plot histogram of first numeric column
         first_numeric = numeric_cols[0]
-        combined_df[first_numeric].hist(bins=30)
+        # Counts are binned up front, so drawing costs 30 bars however many rows there are
+        counts, edges = histogram_counts(combined_df[first_numeric].to_numpy(dtype=np.float64, na_value=np.nan),
+                                         bins=30)
+        plt.stairs(counts, edges, fill=True)
+        plt.grid(True)
         plt.title(f'Distribution of {first_numeric}')
         plt.xlabel(first_numeric)
         plt.ylabel('Frequency')
@@ -262,7 +510,15 @@ def create_basic_visualizations(combined_df):
     plt.show()
 
 # Main execution
-if __name__ == "__main__":
+if __name__ == "__main__" and '--build-cache' in sys.argv:
+    # One-time conversion of the workbook archive; later loads read the binary mirror
+    build_power_cache(n_workers=ingest_workers)
+
+elif __name__ == "__main__" and '--incremental' in sys.argv:
+    # Daily refresh: only parse files that are new or changed since the last run
+    update_combined_data(n_workers=ingest_workers)
+
+elif __name__ == "__main__":
     print("ELECTRIC POWER DATA LOADER - DIAGNOSTIC VERSION")
     print("="*60)
     
@@ -277,7 +533,7 @@ if __name__ == "__main__":
         sample_df = load_sample_file(all_files[0])
     
     # Step 4: Load all data
-    combined_df = load_all_data_flexible()
+    combined_df = load_all_data_flexible(n_workers=ingest_workers)
     
     # Step 5: Generate safe summary statistics
     safe_summary_statistics(combined_df)
@@ -286,13 +542,17 @@ if __name__ == "__main__":
     if not combined_df.empty:
         create_basic_visualizations(combined_df)
         
-        # Save combined data
-        output_file = "combined_electric_power_data.csv"
-        combined_df.to_csv(output_file, index=False)
-        print(f"\nCombined data saved to: {output_file}")
+        # Save combined data as a partitioned Parquet store plus pre-aggregated rollups
+        write_power_store(combined_df)
+        save_cube(build_cube(combined_df))
+        build_peak_index(STORE_PATH)
+        build_sorted_store(STORE_PATH)
+        
+        # Scan the full history once so incremental refreshes continue from its detector state
+        print("\nDrift check on full history:")
+        monitor = detect_drift(combined_df)
+        report_drift(monitor.events)
+        write_drift_events(monitor.events)
+        save_drift_monitor(monitor)
     
     print("\nDiagnostic complete!")
-    
-print("Saving combined data to CSV...")
-combined_df.to_csv("combined_electric_power_data.csv", index=False)
-print("Data saved to: combined_electric_power_data.csv")
\ No newline at end of file
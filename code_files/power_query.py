@@ -0,0 +1,248 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from power_storage import (load_power_frame, default_power_source, power_partitions, partition_signature,
+                           METADATA_COLUMNS)
+
+
+# Column files per building type, rows in Time order, plus the first Time of every block
+SORTED_PATH = "power_sorted"
+BLOCK_ROWS = 8192
+
+def _partition_dir(sorted_path, building_type):
+    return os.path.join(sorted_path, f"building_type={building_type}")
+
+def _column_file(name):
+    return re.sub(r'[^0-9a-z]+', '_', name.lower()).strip('_') + '.npy'
+
+def _source_signatures(source, partitions, building_type):
+    return [[year, partition_signature(source, year, building_type)]
+            for year, bt in partitions if bt == building_type]
+
+def write_sorted_partition(df, directory, source=None, block_rows=BLOCK_ROWS):
+    """Write one building type's rows as Time-sorted column files with a sparse block index
+
+    NaT times sort first. Categorical columns are stored as int32 codes with
+    their categories in meta.json, everything else as its own dtype.
+    """
+    times = df['Time'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    order = np.argsort(times, kind='stable')
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory)
+    columns = {}
+    for name in df.columns:
+        if name == 'building_type':
+            continue
+        values = df[name]
+        entry = {'file': _column_file(name)}
+        if name == 'Time':
+            array = times[order]
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            array = values.cat.codes.to_numpy().astype(np.int32)[order]
+            entry['categories'] = [str(c) for c in values.cat.categories]
+        else:
+            array = values.to_numpy()[order]
+        np.save(os.path.join(directory, entry['file']), array)
+        columns[name] = entry
+    sorted_times = times[order]
+    np.save(os.path.join(directory, 'blocks.npy'), sorted_times[::block_rows])
+    meta = {'rows': int(len(df)), 'block_rows': block_rows, 'columns': columns, 'source': source}
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+def build_sorted_store(source=None, sorted_path=SORTED_PATH, rebuild=False):
+    """Build or refresh the sorted store, rewriting only building types whose source changed
+
+    One building type is loaded and sorted at a time. Returns the number of
+    building types (re)written.
+    """
+    print("\n" + "="*50)
+    print("BUILDING SORTED POWER STORE")
+    print("="*50)
+
+    source = source or default_power_source()
+    if rebuild and os.path.exists(sorted_path):
+        shutil.rmtree(sorted_path)
+    partitions = power_partitions(source)
+    building_types = sorted({building_type for _, building_type in partitions})
+    built = 0
+    for building_type in building_types:
+        directory = _partition_dir(sorted_path, building_type)
+        signature = _source_signatures(source, partitions, building_type)
+        meta_file = os.path.join(directory, 'meta.json')
+        if os.path.exists(meta_file):
+            with open(meta_file) as f:
+                if json.load(f).get('source') == signature:
+                    continue
+        df = load_power_frame(source, building_types=[building_type])
+        write_sorted_partition(df, directory, signature)
+        built += 1
+        print(f"  {building_type}: {len(df)} rows sorted")
+
+    # Building types that disappeared from the source are dropped
+    if os.path.isdir(sorted_path):
+        for name in os.listdir(sorted_path):
+            if name.split('=', 1)[-1] not in building_types:
+                shutil.rmtree(os.path.join(sorted_path, name))
+    print(f"Sorted store at {sorted_path}: {built} of {len(building_types)} building types rebuilt")
+    return built
+
+class PowerStore:
+    """Time-range reads over the sorted store without loading or sorting the full dataset
+
+    Column files are memory-mapped on first use. A range lookup binary-searches
+    the in-memory block index, then only the one block of the Time column that
+    holds the boundary, and the returned window is the only data copied.
+    """
+
+    def __init__(self, sorted_path=SORTED_PATH):
+        self.sorted_path = sorted_path
+        self._meta = {}
+        self._arrays = {}
+        for name in sorted(os.listdir(sorted_path)) if os.path.isdir(sorted_path) else []:
+            meta_file = os.path.join(sorted_path, name, 'meta.json')
+            if os.path.exists(meta_file):
+                with open(meta_file) as f:
+                    self._meta[name.split('=', 1)[-1]] = json.load(f)
+
+    @property
+    def building_types(self):
+        return list(self._meta)
+
+    @property
+    def columns(self):
+        names = {}
+        for meta in self._meta.values():
+            names.update(dict.fromkeys(meta['columns']))
+        return list(names) + ['building_type']
+
+    def __len__(self):
+        return sum(meta['rows'] for meta in self._meta.values())
+
+    def is_current(self, source=None):
+        """True when every building type matches the store files it was built from"""
+        source = source or default_power_source()
+        if not self._meta or not os.path.exists(source):
+            return False
+        partitions = power_partitions(source)
+        if {building_type for _, building_type in partitions} != set(self._meta):
+            return False
+        return all(meta['source'] == _source_signatures(source, partitions, building_type)
+                   for building_type, meta in self._meta.items())
+
+    def _column(self, building_type, name):
+        key = (building_type, name)
+        if key not in self._arrays:
+            directory = _partition_dir(self.sorted_path, building_type)
+            file = 'blocks.npy' if name is None else self._meta[building_type]['columns'][name]['file']
+            # The block index is small and searched on every query, so it is read into memory
+            self._arrays[key] = np.load(os.path.join(directory, file), mmap_mode=None if name is None else 'r')
+        return self._arrays[key]
+
+    def _row_bound(self, building_type, value, side):
+        """First row whose Time is >= value (side='left') or > value (side='right')"""
+        block_rows = self._meta[building_type]['block_rows']
+        block = max(int(np.searchsorted(self._column(building_type, None), value, side)) - 1, 0)
+        low = block * block_rows
+        window = self._column(building_type, 'Time')[low:low + block_rows]
+        return low + int(np.searchsorted(window, value, side))
+
+    def row_range(self, building_type, start=None, end=None):
+        """(first, stop) rows of building_type with start <= Time < end"""
+        first = self._row_bound(building_type, pd.Timestamp(start).value, 'left') if start is not None else 0
+        stop = (self._row_bound(building_type, pd.Timestamp(end).value, 'left') if end is not None
+                else self._meta[building_type]['rows'])
+        return first, max(stop, first)
+
+    def query(self, building_type=None, start=None, end=None, columns=None, years=None):
+        """Rows with start <= Time < end, ordered by (building_type, Time)
+
+        building_type is one name, a list, or None for all. columns defaults
+        to every stored column plus building_type. Rows with a missing Time
+        are only returned when start is None.
+        """
+        requested = [building_type] if isinstance(building_type, str) else building_type
+        building_types = [bt for bt in self.building_types if requested is None or bt in requested]
+        columns = list(columns) if columns is not None else self.columns
+        # year is needed for the filter even when it is not returned
+        read_columns = [c for c in dict.fromkeys(columns + (['year'] if years is not None else []))
+                        if c != 'building_type']
+
+        parts = []
+        for bt in building_types:
+            first, stop = self.row_range(bt, start, end)
+            meta_columns = self._meta[bt]['columns']
+            part = {}
+            for name in read_columns:
+                if name not in meta_columns:
+                    raise KeyError(f"Column not in sorted store: {name}")
+                values = np.asarray(self._column(bt, name)[first:stop])
+                if name == 'Time':
+                    values = values.view('datetime64[ns]')
+                elif 'categories' in meta_columns[name]:
+                    values = pd.Categorical.from_codes(values, meta_columns[name]['categories'])
+                part[name] = values
+            rows = stop - first
+            if years is not None:
+                keep = np.asarray(part['year'].isin([str(y) for y in years]))
+                part = {name: values[keep] for name, values in part.items()}
+                rows = int(keep.sum())
+            part['building_type'] = pd.Categorical.from_codes(np.full(rows, building_types.index(bt), dtype=np.int8),
+                                                              building_types)
+            parts.append(part)
+
+        frame = {}
+        for name in columns:
+            arrays = [part[name] for part in parts]
+            if not arrays:
+                frame[name] = pd.Series(dtype='datetime64[ns]' if name == 'Time' else 'float64')
+            elif isinstance(arrays[0], pd.Categorical):
+                # Codes are only comparable within one building type, so categories are merged
+                frame[name] = union_categoricals(arrays) if len(arrays) > 1 else arrays[0]
+            else:
+                frame[name] = np.concatenate(arrays)
+        df = pd.DataFrame(frame)
+        for name in METADATA_COLUMNS:
+            if name in df.columns and isinstance(df[name].dtype, pd.CategoricalDtype):
+                df[name] = df[name].cat.remove_unused_categories()
+        return df
+
+def load_sorted_power(source=None, sorted_path=SORTED_PATH):
+    """PowerStore over sorted_path when it is current with source, else None"""
+    store = PowerStore(sorted_path)
+    return store if store.is_current(source) else None
+
+def load_building_power(years=None, building_types=None, sorted_path=SORTED_PATH):
+    """load_power_data rows in (building_type, Time) order instead of global Time order
+
+    A current sorted store serves them without any sort; otherwise the
+    store is loaded and sorted per building type.
+    """
+    columns = ['Time', 'Power (kW)', 'building_type']
+    store = load_sorted_power(default_power_source(), sorted_path)
+    if store is not None:
+        power_df = store.query(building_types, columns=columns, years=years)
+        return power_df.dropna(subset=['Power (kW)']).reset_index(drop=True)
+    power_df = load_power_frame(default_power_source(), columns=columns, years=years, building_types=building_types)
+    power_df = power_df.dropna(subset=['Power (kW)'])
+    # Same Time unit as the sorted store, whichever path served the rows
+    power_df['Time'] = power_df['Time'].astype('datetime64[ns]')
+    # Missing times go first in each building type, as write_sorted_partition stores them
+    return power_df.sort_values(['building_type', 'Time'], kind='stable', na_position='first').reset_index(drop=True)
+
+if __name__ == "__main__":
+    build_sorted_store(rebuild='--rebuild' in sys.argv)
+    store = PowerStore()
+    print(f"\nRows: {len(store)}, building types: {', '.join(store.building_types)}")
+    for building_type in store.building_types:
+        began = time.perf_counter()
+        window = store.query(building_type, columns=['Time', 'Power (kW)'])
+        elapsed = (time.perf_counter() - began) * 1000
+        print(f"  {building_type}: {len(window)} rows in {elapsed:.1f} ms")
@@ -0,0 +1,163 @@
+import os
+import shutil
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+
+# Partitioned Parquet dataset that replaces combined_electric_power_data.csv
+STORE_PATH = "combined_electric_power_data"
+CSV_PATH = "combined_electric_power_data.csv"
+PARTITION_COLUMNS = ['year', 'building_type']
+METADATA_COLUMNS = ['file_path', 'file_name', 'year', 'building_type']
+
+def _partitioning():
+    key_type = pa.dictionary(pa.int32(), pa.string())
+    return ds.partitioning(pa.schema([('year', key_type), ('building_type', key_type)]), flavor='hive')
+
+def _read_partitioning():
+    # Dictionary-encoded partition keys come back as pandas categoricals
+    return ds.HivePartitioning.discover(infer_dictionary=True)
+
+def compact_power_frame(df):
+    """Convert a frame to the compact in-memory schema
+
+    Time becomes datetime64, Power (kW) float32, and the per-row file/year/building
+    strings become categoricals so each distinct value is stored once.
+    """
+    if 'Time' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Time']):
+        df['Time'] = pd.to_datetime(df['Time'], errors='coerce')
+    if 'Power (kW)' in df.columns and df['Power (kW)'].dtype != 'float32':
+        df['Power (kW)'] = pd.to_numeric(df['Power (kW)'], errors='coerce').astype('float32')
+    for col in METADATA_COLUMNS:
+        if col in df.columns:
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype('category')
+            df[col] = df[col].cat.remove_unused_categories()
+    if 'year' in df.columns and not all(isinstance(c, str) for c in df['year'].cat.categories):
+        df['year'] = df['year'].cat.rename_categories(lambda c: str(c))
+    return df
+
+def prepare_power_frame(df):
+    """Cast a loaded frame to the storage schema"""
+    df = df.copy(deep=False)
+    for col in PARTITION_COLUMNS:
+        if col not in df.columns:
+            df[col] = 'Unknown'
+    return compact_power_frame(df)
+
+def _write(df, store_path, existing_data_behavior):
+    table = pa.Table.from_pandas(prepare_power_frame(df), preserve_index=False)
+    ds.write_dataset(table, store_path, format='parquet', partitioning=_partitioning(),
+                     basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                     existing_data_behavior=existing_data_behavior)
+
+def write_power_store(df, store_path=STORE_PATH):
+    """Write the full dataset, replacing any existing store"""
+    if os.path.exists(store_path):
+        shutil.rmtree(store_path)
+    _write(df, store_path, 'overwrite_or_ignore')
+    print(f"Power data store written to: {store_path}")
+    return store_path
+
+def append_power_store(df, store_path=STORE_PATH):
+    """Add rows as new files inside their year/building_type partitions"""
+    if not df.empty:
+        _write(df, store_path, 'overwrite_or_ignore')
+    return store_path
+
+def replace_power_partitions(df, store_path=STORE_PATH):
+    """Rewrite only the partitions present in df, leaving the others untouched"""
+    if not df.empty:
+        _write(df, store_path, 'delete_matching')
+    return store_path
+
+def _partition_filter(years=None, building_types=None):
+    expression = None
+    if years is not None:
+        expression = ds.field('year').isin([str(y) for y in years])
+    if building_types is not None:
+        condition = ds.field('building_type').isin(list(building_types))
+        expression = condition if expression is None else expression & condition
+    return expression
+
+def read_power_store(store_path=STORE_PATH, columns=None, years=None, building_types=None):
+    """Read the store with column projection and year/building_type partition pruning"""
+    dataset = ds.dataset(store_path, format='parquet', partitioning=_read_partitioning())
+    table = dataset.to_table(columns=columns, filter=_partition_filter(years, building_types))
+    return compact_power_frame(table.to_pandas())
+
+def power_partitions(path=STORE_PATH):
+    """Sorted (year, building_type) pairs present in a store directory or legacy CSV"""
+    if os.path.isdir(path):
+        dataset = ds.dataset(path, format='parquet', partitioning=_read_partitioning())
+        keys = {(str(key['year']), str(key['building_type']))
+                for key in (ds.get_partition_keys(fragment.partition_expression)
+                            for fragment in dataset.get_fragments())}
+    else:
+        df = pd.read_csv(path, usecols=PARTITION_COLUMNS, dtype=str).drop_duplicates()
+        keys = set(zip(df['year'], df['building_type']))
+    return sorted(keys)
+
+def partition_signature(path, year, building_type):
+    """[name, size, mtime_ns] of the store files behind one partition, or of the whole legacy CSV"""
+    if os.path.isdir(path):
+        directory = os.path.join(path, f"year={year}", f"building_type={building_type}")
+        names = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+        files = [os.path.join(directory, name) for name in names]
+    else:
+        files = [path]
+    return [[os.path.basename(file), os.stat(file).st_size, os.stat(file).st_mtime_ns] for file in files]
+
+def _filter_csv_chunk(df, columns, years, building_types):
+    if years is not None:
+        df = df[df['year'].astype(str).isin([str(y) for y in years])]
+    if building_types is not None:
+        df = df[df['building_type'].isin(list(building_types))]
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+def _csv_usecols(columns, years, building_types):
+    if columns is None:
+        return None
+    # Filter columns are needed even when they are not projected
+    extra = [c for c, v in (('year', years), ('building_type', building_types)) if v is not None]
+    return list(dict.fromkeys(list(columns) + extra))
+
+def iter_power_chunks(path=STORE_PATH, chunksize=500_000, columns=None, years=None, building_types=None):
+    """Yield the dataset as DataFrames of at most chunksize rows"""
+    if os.path.isdir(path):
+        dataset = ds.dataset(path, format='parquet', partitioning=_read_partitioning())
+        for batch in dataset.to_batches(columns=columns, filter=_partition_filter(years, building_types),
+                                        batch_size=chunksize):
+            if batch.num_rows:
+                yield compact_power_frame(batch.to_pandas())
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunksize,
+                                 usecols=_csv_usecols(columns, years, building_types)):
+            chunk = _filter_csv_chunk(chunk, columns, years, building_types)
+            if len(chunk):
+                yield compact_power_frame(chunk.reset_index(drop=True))
+
+def load_power_frame(path=STORE_PATH, columns=None, years=None, building_types=None):
+    """Load power data from a Parquet store directory, or from a legacy combined CSV"""
+    if os.path.isdir(path):
+        return read_power_store(path, columns=columns, years=years, building_types=building_types)
+
+    df = pd.read_csv(path, usecols=_csv_usecols(columns, years, building_types))
+    df = _filter_csv_chunk(df, columns, years, building_types)
+    return compact_power_frame(df.reset_index(drop=True))
+
+def default_power_source():
+    """Prefer the Parquet store, falling back to the legacy CSV"""
+    return STORE_PATH if os.path.isdir(STORE_PATH) else CSV_PATH
+
+def load_power_data(years=None, building_types=None):
+    """Time, Power (kW) and building_type rows with a reading, in time order"""
+    # Only the columns the analyses use are read; Time is already datetime64 in the store
+    power_df = load_power_frame(default_power_source(), columns=['Time', 'Power (kW)', 'building_type'],
+                                years=years, building_types=building_types)
+    power_df = power_df.dropna(subset=['Power (kW)'])
+    return power_df.sort_values('Time')
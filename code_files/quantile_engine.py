@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+GROUP_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+def _clean(values):
+    """Drop NaNs into a single float64 working array"""
+    values = np.asarray(values)
+    if values.dtype != np.float64:
+        values = values.astype(np.float64)
+    mask = np.isnan(values)
+    return values[~mask] if mask.any() else values.copy()
+
+def exact_quantiles(values, qs=DEFAULT_QUANTILES, iqr_multiplier=1.5):
+    """All requested quantiles plus the IQR outlier count from one working copy
+
+    The non-null values are copied once and partitioned in place around every
+    rank that the quantiles need, instead of sorting or copying per quantile.
+    Returns (quantiles, outlier_count, count).
+    """
+    work = _clean(values)
+    if len(work) == 0:
+        return {q: np.nan for q in qs}, 0, 0
+
+    qs = sorted(set(qs) | {0.25, 0.75})
+    positions = np.asarray(qs) * (len(work) - 1)
+    kth = np.unique(np.concatenate([np.floor(positions), np.ceil(positions)]).astype(np.int64))
+    work.partition(kth)
+
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    results = work[lower] + (work[upper] - work[lower]) * (positions - lower)
+    by_q = dict(zip(qs, results))
+
+    q1, q3 = by_q[0.25], by_q[0.75]
+    iqr = q3 - q1
+    outliers = int(np.count_nonzero((work < q1 - iqr_multiplier * iqr) | (work > q3 + iqr_multiplier * iqr)))
+    return by_q, outliers, len(work)
+
+class KLLSketch:
+    """Mergeable KLL quantile sketch with a selectable rank error bound
+
+    epsilon is the target normalized rank error (0.01 means a reported median
+    lies between the 49th and 51st percentile with high probability). Memory
+    is O(1/epsilon) regardless of how many values are added.
+    """
+
+    def __init__(self, epsilon=0.005, seed=0):
+        self.epsilon = epsilon
+        self.k = max(8, int(np.ceil(1.7 / epsilon)))
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self._levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # An odd item out stays behind so total weight is preserved exactly
+                keep = items[:1] if len(items) % 2 else items[:0]
+                pairs = items[len(keep):]
+                promoted = pairs[self._rng.integers(2)::2]
+                self._levels[level] = keep
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        values = _clean(values)
+        if len(values) == 0:
+            return self
+        self.count += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self._compress()
+        return self
+
+    def _weighted(self):
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level, dtype=np.float64)
+                                  for level, items in enumerate(self._levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs):
+        if self.count == 0:
+            return [np.nan for _ in qs]
+        values, cumulative = self._weighted()
+        targets = np.asarray(qs) * cumulative[-1]
+        index = np.minimum(np.searchsorted(cumulative, targets, side='left'), len(values) - 1)
+        result = values[index]
+        # The extremes are tracked exactly
+        result = np.where(np.asarray(qs) <= 0, self.min, result)
+        result = np.where(np.asarray(qs) >= 1, self.max, result)
+        return list(result)
+
+    def rank(self, x, inclusive=True):
+        """Estimated number of values <= x (or < x when inclusive is False)"""
+        if self.count == 0:
+            return 0.0
+        values, cumulative = self._weighted()
+        index = np.searchsorted(values, x, side='right' if inclusive else 'left')
+        return float(cumulative[index - 1] * self.count / cumulative[-1]) if index > 0 else 0.0
+
+    def count_outside(self, lower, upper):
+        return self.rank(lower, inclusive=False) + (self.count - self.rank(upper))
+
+def quantile_summary(values, qs=DEFAULT_QUANTILES, epsilon=None, iqr_multiplier=1.5):
+    """Quantiles and IQR outlier count, exact when epsilon is None, else from a KLL sketch"""
+    if epsilon is None:
+        by_q, outliers, count = exact_quantiles(values, qs, iqr_multiplier)
+        return {'count': count, 'quantiles': {q: by_q[q] for q in qs}, 'outliers': outliers, 'exact': True}
+    sketch = KLLSketch(epsilon).update(values)
+    return sketch_summary(sketch, qs, iqr_multiplier)
+
+def sketch_summary(sketch, qs=DEFAULT_QUANTILES, iqr_multiplier=1.5):
+    """quantile_summary result from an already-filled sketch"""
+    q1, q3 = sketch.quantiles([0.25, 0.75])
+    iqr = q3 - q1
+    outliers = sketch.count_outside(q1 - iqr_multiplier * iqr, q3 + iqr_multiplier * iqr)
+    return {'count': sketch.count, 'quantiles': dict(zip(qs, sketch.quantiles(qs))),
+            'outliers': int(round(outliers)), 'exact': False}
+
+def grouped_quantiles(df, value_col, by=('year', 'building_type'), qs=GROUP_QUANTILES):
+    """Exact per-group quantiles from a single sort of (group, value) over all groups"""
+    grouper = df.groupby(list(by), observed=True, sort=True)
+    group_index = grouper.size().index
+    # Rows with a missing group key get NaN from ngroup and belong to no group
+    codes = grouper.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    values = df[value_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = ~np.isnan(values) & (codes >= 0)
+    codes, values = codes[valid], values[valid]
+    values = values[np.lexsort((values, codes))]
+
+    counts = np.bincount(codes, minlength=len(group_index))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    present = counts > 0
+
+    columns = {'count': counts[present]}
+    for q in qs:
+        positions = starts[present] + q * (counts[present] - 1)
+        lower = np.floor(positions).astype(np.int64)
+        upper = np.ceil(positions).astype(np.int64)
+        columns[f"p{int(round(q * 100)):02d}"] = values[lower] + (values[upper] - values[lower]) * (positions - lower)
+    return pd.DataFrame(columns, index=group_index[present])
+
+def sketch_group_table(sketches, qs=GROUP_QUANTILES, names=('year', 'building_type')):
+    """grouped_quantiles-shaped table from a {group key tuple: KLLSketch} mapping"""
+    keys = sorted(sketches)
+    rows = []
+    for key in keys:
+        sketch = sketches[key]
+        rows.append([sketch.count] + list(sketch.quantiles(qs)))
+    columns = ['count'] + [f"p{int(round(q * 100)):02d}" for q in qs]
+    index = pd.MultiIndex.from_tuples(keys, names=list(names))
+    return pd.DataFrame(rows, index=index, columns=columns)
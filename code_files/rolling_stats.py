@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+
+STATISTICS = ['count', 'mean', 'std', 'cv', 'skew', 'kurt']
+
+def _merge(a, b):
+    """Combine (n, mean, M2, M3, M4) aggregates of two disjoint sets of values (Chan/Pebay)
+
+    M2..M4 are sums of powers of deviations from each set's own mean, so no
+    large sums are ever differenced.
+    """
+    na, mean_a, m2a, m3a, m4a = a
+    nb, mean_b, m2b, m3b, m4b = b
+    n = na + nb
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv = np.where(n > 0, 1.0 / n, 0.0)
+    delta = mean_b - mean_a
+    mean = mean_a + delta * nb * inv
+    m2 = m2a + m2b + delta ** 2 * na * nb * inv
+    m3 = (m3a + m3b + delta ** 3 * na * nb * (na - nb) * inv ** 2
+          + 3 * delta * (na * m2b - nb * m2a) * inv)
+    m4 = (m4a + m4b + delta ** 4 * na * nb * (na ** 2 - na * nb + nb ** 2) * inv ** 3
+          + 6 * delta ** 2 * (na ** 2 * m2b + nb ** 2 * m2a) * inv ** 2
+          + 4 * delta * (na * m3b - nb * m3a) * inv)
+    return n, mean, m2, m3, m4
+
+def _block_scan(single, offset, step):
+    """Aggregate of each row and the rows before it (step=1) or after it (step=-1) in its block
+
+    Rows are visited by offset within their block, so each pass is one
+    vectorised merge over all blocks at once.
+    """
+    aggregate = tuple(np.empty_like(column) for column in single)
+    order = np.argsort(offset, kind='stable')
+    bounds = np.r_[0, np.cumsum(np.bincount(offset))]
+    for k in range(len(bounds) - 1):
+        rows = order[bounds[k]:bounds[k + 1]]
+        value = tuple(column[rows] for column in single)
+        if k:
+            value = _merge(tuple(column[rows - step] for column in aggregate), value)
+        for column, part in zip(aggregate, value):
+            column[rows] = part
+    return aggregate
+
+def _window_aggregates(values, window, starts, group_starts):
+    """(n, mean, M2, M3, M4) of values[starts[i]:i + 1] for every row i
+
+    Rows are cut into blocks of `window` rows, aligned on each group's first
+    row. A trailing window then covers the end of one block and the start of
+    the next, so it is the merge of a suffix and a prefix aggregate, both
+    built by stable one-value-at-a-time updates. Total work stays O(n).
+    """
+    n = len(values)
+    rows = np.arange(n)
+    valid = ~np.isnan(values)
+    zeros = np.zeros(n)
+    single = (valid.astype(np.float64), np.where(valid, values, 0.0), zeros, zeros, zeros)
+    group_starts = np.zeros(n, dtype=np.int64) if group_starts is None else group_starts
+    first_rows = np.unique(group_starts)
+    group_ends = np.r_[first_rows, n][np.searchsorted(first_rows, group_starts, side='right')]
+    block_starts = group_starts + (rows - group_starts) // window * window
+    block_ends = np.minimum(block_starts + window, group_ends)
+    prefix = _block_scan(single, rows - block_starts, 1)
+    suffix = _block_scan(single, block_ends - 1 - rows, -1)
+    # Windows never start after their block's first row, so the rest are prefix aggregates
+    split = starts < block_starts
+    aggregate = tuple(column.copy() for column in prefix)
+    merged = _merge(tuple(column[starts[split]] for column in suffix), tuple(column[split] for column in prefix))
+    for column, part in zip(aggregate, merged):
+        column[split] = part
+    return aggregate
+
+def _window_moments(aggregate, min_periods):
+    """mean/std/cv/skew/kurt from (n, mean, M2, M3, M4) window aggregates"""
+    n, mean, m2, m3, m4 = aggregate
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m2, m3, m4 = m2 / n, m3 / n, m4 / n
+        m2 = np.clip(m2, 0, None)
+        constant = m2 <= 1e-14 * np.maximum(1.0, mean ** 2)
+        std = np.sqrt(m2 * n / (n - 1))
+        result = {
+            'count': n.astype(np.int64),
+            'mean': np.where(n > 0, mean, np.nan),
+            'std': np.where(n > 1, std, np.nan),
+            # Biased (population) skewness and Fisher kurtosis, as scipy.stats.skew/kurtosis
+            'skew': np.where(constant, np.nan, m3 / m2 ** 1.5),
+            'kurt': np.where(constant, np.nan, m4 / m2 ** 2 - 3),
+        }
+        result['cv'] = result['std'] / result['mean']
+    short = n < min_periods
+    for name in STATISTICS[1:]:
+        result[name] = np.where(short, np.nan, result[name])
+    return result
+
+def _trailing_starts(n, window, group_starts):
+    starts = np.maximum(np.arange(1, n + 1) - window, 0)
+    return starts if group_starts is None else np.maximum(starts, group_starts)
+
+def rolling_moments(values, window, min_periods=None, group_starts=None):
+    """Trailing-window statistics for every position of values in O(n)
+
+    Windows never reach back past the start of a row's group when group_starts
+    (the index of the first row of each row's group) is given. Like pandas, a
+    window needs min_periods non-null values (default: the full window).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    starts = _trailing_starts(len(values), window, group_starts)
+    aggregate = _window_aggregates(values, window, starts, group_starts)
+    return _window_moments(aggregate, window if min_periods is None else min_periods)
+
+def rolling_statistics(df, value_col, windows=(30,), by=None, order_by='Time', min_periods=None):
+    """Rolling count/mean/std/cv/skew/kurt for several windows and groups in one pass
+
+    Rows are ordered by group and order_by once and shared by every window.
+    Returns one row per input row and window, with the group and order_by
+    columns and a 'window' column.
+    """
+    by = [by] if isinstance(by, str) else list(by or [])
+    keys = by + ([order_by] if order_by is not None else [])
+    ordered = df.sort_values(keys, kind='stable') if keys else df
+    values = ordered[value_col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    group_starts = None
+    if by:
+        codes = ordered.groupby(by, observed=True, sort=False).ngroup().to_numpy()
+        boundary = np.r_[True, codes[1:] != codes[:-1]]
+        group_starts = np.maximum.accumulate(np.where(boundary, np.arange(len(codes)), 0))
+
+    frames = []
+    for window in windows:
+        starts = _trailing_starts(len(values), window, group_starts)
+        aggregate = _window_aggregates(values, window, starts, group_starts)
+        moments = _window_moments(aggregate, window if min_periods is None else min_periods)
+        frame = ordered[keys].reset_index(drop=True)
+        frame['window'] = window
+        for name in STATISTICS:
+            frame[name] = moments[name]
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
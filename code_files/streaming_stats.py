@@ -0,0 +1,344 @@
+import tempfile
+from functools import cached_property
+import numpy as np
+import pandas as pd
+from quantile_engine import (KLLSketch, quantile_summary, sketch_summary, grouped_quantiles,
+                             sketch_group_table, DEFAULT_QUANTILES)
+from duplicate_detection import DuplicateDetector, find_duplicates
+from cadence_analysis import CadenceAccumulator, analyze_frame_cadence
+
+
+DATETIME_KEYWORDS = ['time', 'date', 'timestamp']
+
+def is_text_dtype(dtype):
+    """Columns the reports treat as categorical"""
+    return (pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)
+            or isinstance(dtype, pd.CategoricalDtype))
+
+class NumericAccumulator:
+    """Mergeable count/mean/variance/min/max plus quantiles
+
+    Mean and variance use Chan's parallel update so chunks can be merged in any
+    order. Quantiles come from a KLL sketch with rank error epsilon; with
+    epsilon=None the raw chunks are kept and quantiles are exact.
+    """
+
+    def __init__(self, epsilon=0.001):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.epsilon = epsilon
+        self.sketch = KLLSketch(epsilon) if epsilon is not None else None
+        self._chunks = []
+        self._summaries = {}
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        valid = values[~np.isnan(values)]
+        if len(valid) == 0:
+            return self
+        count = len(valid)
+        mean = valid.mean()
+        m2 = ((valid - mean) ** 2).sum()
+        self._merge_moments(count, mean, m2, valid.min(), valid.max())
+        if self.sketch is not None:
+            self.sketch.update(valid)
+        else:
+            self._chunks.append(valid)
+        return self
+
+    def _merge_moments(self, count, mean, m2, minimum, maximum):
+        total = self.count + count
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.mean += delta * count / total
+        self.count = total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+        self._summaries = {}
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        self._merge_moments(other.count, other.mean, other.m2, other.min, other.max)
+        if self.sketch is not None:
+            self.sketch.merge(other.sketch if other.sketch is not None
+                              else KLLSketch(self.epsilon).update(np.concatenate(other._chunks)))
+        else:
+            self._chunks.extend(other._chunks)
+        return self
+
+    @property
+    def exact(self):
+        return self.sketch is None
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    def quantile_summary(self, qs=DEFAULT_QUANTILES):
+        """Quantiles and IQR outlier count, memoized per set of quantiles"""
+        key = tuple(qs)
+        if key not in self._summaries:
+            if self.sketch is not None:
+                self._summaries[key] = sketch_summary(self.sketch, qs)
+            else:
+                values = self._chunks[0] if len(self._chunks) == 1 else np.concatenate(self._chunks or [[]])
+                self._summaries[key] = quantile_summary(values, qs)
+        return self._summaries[key]
+
+class ValueCounter:
+    """Mergeable value counts, pruned to the most frequent max_distinct values"""
+
+    def __init__(self, max_distinct=100_000):
+        self.max_distinct = max_distinct
+        self.counts = pd.Series(dtype='int64')
+        self.truncated = False
+
+    def update(self, series):
+        chunk_counts = series.value_counts(sort=False)
+        chunk_counts = chunk_counts[chunk_counts > 0]
+        if isinstance(chunk_counts.index, pd.CategoricalIndex):
+            chunk_counts.index = chunk_counts.index.astype(chunk_counts.index.categories.dtype)
+        self.counts = self.counts.add(chunk_counts, fill_value=0).astype('int64')
+        if self.max_distinct is not None and len(self.counts) > self.max_distinct:
+            self.counts = self.counts.nlargest(self.max_distinct)
+            self.truncated = True
+        return self
+
+    def most_common(self):
+        return self.counts.sort_values(ascending=False, kind='stable')
+
+class DatetimeAccumulator:
+    """Valid/invalid counts and range for a datetime-like column"""
+
+    def __init__(self):
+        self.valid = 0
+        self.invalid = 0
+        self.min = None
+        self.max = None
+
+    def update(self, series):
+        dt_series = pd.to_datetime(series, errors='coerce')
+        valid_dates = dt_series.dropna()
+        self.valid += len(valid_dates)
+        self.invalid += len(dt_series) - len(valid_dates)
+        if len(valid_dates) == 0:
+            return self
+
+        chunk_min, chunk_max = valid_dates.min(), valid_dates.max()
+        self.min = chunk_min if self.min is None else min(self.min, chunk_min)
+        self.max = chunk_max if self.max is None else max(self.max, chunk_max)
+        return self
+
+def classify_columns(dtypes):
+    """Split columns into numeric, categorical and datetime-like (by name) groups"""
+    numeric, categorical, datetime_like = [], [], []
+    for col, dtype in dtypes.items():
+        if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            numeric.append(col)
+        elif is_text_dtype(dtype):
+            categorical.append(col)
+        if any(keyword in col.lower() for keyword in DATETIME_KEYWORDS):
+            datetime_like.append(col)
+    return numeric, categorical, datetime_like
+
+def _coverage_sizes(df):
+    sizes = df.groupby(['year', 'building_type'], observed=True).size()
+    sizes.index = sizes.index.set_levels([level.astype(str) for level in sizes.index.levels])
+    return sizes
+
+class _SummaryQueries:
+    """Derived lookups shared by the streaming and in-memory summaries"""
+
+    @property
+    def duplicate_rows(self):
+        return self.duplicate_summary['duplicate_rows']
+
+    def duplicate_values(self, col):
+        counts = self.value_counts[col].counts
+        return int(counts.sum() - len(counts))
+
+    def distinct(self, col):
+        return len(self.value_counts[col].counts)
+
+    def sorted_values(self, col):
+        return sorted(self.value_counts[col].counts.index)
+
+class DatasetSummary(_SummaryQueries):
+    """One-pass, chunk-mergeable aggregates feeding every DataAnalyzer report
+
+    Memory is bounded by the chunk size rather than the row count: duplicate
+    hashes (24 bytes per row) are spilled under spill_dir, the system temp dir
+    by default, and only one bucket is read back at a time. Value counts keep
+    at most max_distinct values per text column.
+    """
+
+    def __init__(self, epsilon=0.001, max_distinct=100_000, head_rows=10, duplicate_key=None,
+                 spill_dir=None):
+        self.epsilon = epsilon
+        self.max_distinct = max_distinct
+        self.head_rows = head_rows
+        self.rows = 0
+        self.columns = []
+        self.dtypes = pd.Series(dtype=object)
+        self.null_counts = pd.Series(dtype='int64')
+        self.memory_bytes = 0
+        self.numeric = {}
+        self.value_counts = {}
+        self.datetimes = {}
+        self.coverage = None
+        self.head = pd.DataFrame()
+        self._group_sketches = {}
+        self.spill_dir = spill_dir if spill_dir is not None else tempfile.gettempdir()
+        self.duplicates = DuplicateDetector(key=duplicate_key, spill_dir=self.spill_dir)
+        self.cadence = None
+
+    def update(self, chunk):
+        if self.rows == 0:
+            self.columns = list(chunk.columns)
+            self.dtypes = chunk.dtypes
+            self.null_counts = pd.Series(0, index=self.columns, dtype='int64')
+            numeric, categorical, datetime_like = classify_columns(chunk.dtypes)
+            self.numeric = {col: NumericAccumulator(self.epsilon) for col in numeric}
+            self._group_sketches = {col: {} for col in numeric}
+            self.value_counts = {col: ValueCounter(self.max_distinct) for col in categorical}
+            self.datetimes = {col: DatetimeAccumulator() for col in datetime_like}
+
+        self.rows += len(chunk)
+        self.null_counts += chunk.isnull().sum()
+        self.memory_bytes += chunk.memory_usage(deep=True).sum()
+        for col, acc in self.numeric.items():
+            acc.update(chunk[col].to_numpy(dtype=np.float64, na_value=np.nan))
+        for col, counter in self.value_counts.items():
+            counter.update(chunk[col])
+        for col, acc in self.datetimes.items():
+            acc.update(chunk[col])
+
+        if 'year' in chunk.columns and 'building_type' in chunk.columns:
+            sizes = _coverage_sizes(chunk)
+            self.coverage = sizes if self.coverage is None else self.coverage.add(sizes, fill_value=0)
+            
+            # Per year x building_type sketches; merged across chunks by group key
+            for keys, group in chunk.groupby(['year', 'building_type'], observed=True):
+                keys = tuple(str(k) for k in keys)
+                for col, sketches in self._group_sketches.items():
+                    sketch = sketches.setdefault(keys, KLLSketch(self.epsilon or 0.001))
+                    sketch.update(group[col].to_numpy(dtype=np.float64, na_value=np.nan))
+
+        self.duplicates.update(chunk)
+        if 'Time' in chunk.columns:
+            self.cadence = (self.cadence or CadenceAccumulator()).update(chunk)
+        if self.head.empty:
+            self.head = chunk.head(self.head_rows)
+        elif len(self.head) < self.head_rows:
+            self.head = pd.concat([self.head, chunk.head(self.head_rows - len(self.head))])
+        return self
+
+    @property
+    def duplicate_summary(self):
+        return self.duplicates.result()
+
+    @property
+    def group_quantiles(self):
+        """Per year x building_type percentile tables for each numeric column"""
+        return {col: sketch_group_table(sketches) for col, sketches in self._group_sketches.items()
+                if sketches}
+
+    @classmethod
+    def from_chunks(cls, chunks, **kwargs):
+        summary = cls(**kwargs)
+        for chunk in chunks:
+            summary.update(chunk)
+        summary.duplicates.result()
+        summary.duplicates.close()
+        return summary
+
+class FrameSummary(_SummaryQueries):
+    """Memoized aggregates over an in-memory frame
+
+    Each aggregate is computed on first use and then shared by every report, so
+    null counts, memory usage or value counts cost one pass per loaded dataset.
+    Quantiles are exact unless epsilon is given. Build a new instance when the
+    frame changes.
+    """
+
+    def __init__(self, df, epsilon=None, head_rows=10, duplicate_key=None):
+        self.df = df
+        self.epsilon = epsilon
+        self.head_rows = head_rows
+        self.duplicate_key = duplicate_key
+
+    @cached_property
+    def _column_groups(self):
+        return classify_columns(self.df.dtypes)
+
+    @property
+    def rows(self):
+        return len(self.df)
+
+    @property
+    def columns(self):
+        return list(self.df.columns)
+
+    @property
+    def dtypes(self):
+        return self.df.dtypes
+
+    @cached_property
+    def null_counts(self):
+        return self.df.isnull().sum()
+
+    @cached_property
+    def memory_bytes(self):
+        return self.df.memory_usage(deep=True).sum()
+
+    @cached_property
+    def numeric(self):
+        return {col: NumericAccumulator(self.epsilon).update(
+                    self.df[col].to_numpy(dtype=np.float64, na_value=np.nan))
+                for col in self._column_groups[0]}
+
+    @cached_property
+    def group_quantiles(self):
+        if 'year' not in self.df.columns or 'building_type' not in self.df.columns:
+            return {}
+        tables = {}
+        for col in self._column_groups[0]:
+            if self.epsilon is None:
+                tables[col] = grouped_quantiles(self.df, col)
+            else:
+                sketches = {tuple(str(k) for k in keys): KLLSketch(self.epsilon).update(
+                                group[col].to_numpy(dtype=np.float64, na_value=np.nan))
+                            for keys, group in self.df.groupby(['year', 'building_type'], observed=True)}
+                tables[col] = sketch_group_table(sketches)
+        return tables
+
+    @cached_property
+    def value_counts(self):
+        return {col: ValueCounter(max_distinct=None).update(self.df[col])
+                for col in self._column_groups[1]}
+
+    @cached_property
+    def datetimes(self):
+        return {col: DatetimeAccumulator().update(self.df[col]) for col in self._column_groups[2]}
+
+    @cached_property
+    def coverage(self):
+        if 'year' in self.df.columns and 'building_type' in self.df.columns:
+            return _coverage_sizes(self.df)
+        return None
+
+    @cached_property
+    def cadence(self):
+        return analyze_frame_cadence(self.df) if 'Time' in self.df.columns else None
+
+    @cached_property
+    def duplicate_summary(self):
+        return find_duplicates(self.df, key=self.duplicate_key)
+
+    @property
+    def head(self):
+        return self.df.head(self.head_rows)
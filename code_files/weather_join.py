@@ -0,0 +1,122 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from power_storage import (load_power_frame, default_power_source, power_partitions, append_power_store)
+from weather_storage import WEATHER_CSV, default_weather_source, query_weather
+
+
+WEATHER_COLUMNS = ['Temperature (℃)', 'Humidity (%RH)']
+JOINED_PATH = "power_weather_data"
+JOIN_METHODS = ('backward', 'forward', 'nearest', 'linear')
+
+def load_weather_frame(path=None, columns=WEATHER_COLUMNS):
+    """Weather readings with datetime64 Time and float32 measurements, sorted and one row per Time
+
+    Reads the parsed weather store when present, else the combined CSV.
+    Rows without a timestamp or without any measurement are dropped, and
+    duplicate timestamps are averaged.
+    """
+    path = path or default_weather_source()
+    if os.path.isdir(path):
+        df = query_weather(columns=columns, store_path=path)
+    else:
+        df = pd.read_csv(path, usecols=['Time'] + list(columns), dtype={col: 'float32' for col in columns})
+        df['Time'] = pd.to_datetime(df['Time'], errors='coerce')
+    df = df.dropna(subset=['Time']).dropna(subset=list(columns), how='all')
+    df = df.groupby('Time', sort=True)[list(columns)].mean().reset_index()
+    return df.astype({col: 'float32' for col in columns})
+
+def _align_column(times, reading_times, readings, tolerance, method):
+    """One weather column at the given times from its sorted non-null readings"""
+    result = np.full(len(times), np.nan, dtype=np.float32)
+    if len(reading_times) == 0:
+        return result
+    # Index of the last reading at or before, and the first reading at or after, each time
+    after = np.searchsorted(reading_times, times, side='left')
+    before = np.searchsorted(reading_times, times, side='right') - 1
+    has_before = before >= 0
+    has_after = after < len(reading_times)
+    before_gap = np.where(has_before, times - reading_times[np.maximum(before, 0)], np.iinfo(np.int64).max)
+    after_gap = np.where(has_after, reading_times[np.minimum(after, len(reading_times) - 1)] - times,
+                         np.iinfo(np.int64).max)
+    use_before = has_before & (before_gap <= tolerance)
+    use_after = has_after & (after_gap <= tolerance)
+    before_values = readings[np.maximum(before, 0)]
+    after_values = readings[np.minimum(after, len(reading_times) - 1)]
+
+    if method == 'backward':
+        result[use_before] = before_values[use_before]
+    elif method == 'forward':
+        result[use_after] = after_values[use_after]
+    else:
+        nearest_before = use_before & (~use_after | (before_gap <= after_gap))
+        nearest_after = use_after & ~nearest_before
+        result[nearest_before] = before_values[nearest_before]
+        result[nearest_after] = after_values[nearest_after]
+        if method == 'linear':
+            bracketed = use_before & use_after & (before_gap > 0)
+            span = (before_gap + after_gap)[bracketed].astype(np.float64)
+            weight = before_gap[bracketed] / span
+            result[bracketed] = (before_values[bracketed] * (1 - weight) + after_values[bracketed] * weight)
+    return result
+
+def align_weather(times, weather, columns=WEATHER_COLUMNS, tolerance='1h', method='linear'):
+    """{column: float32 array} of weather values aligned to times by a sorted as-of lookup
+
+    backward/forward take the last/next reading within tolerance, nearest
+    the closer of the two, and linear interpolates between them when both
+    lie within tolerance (falling back to nearest). Each column uses its own
+    non-null readings, so a gap in humidity does not blank temperature.
+    """
+    if method not in JOIN_METHODS:
+        raise ValueError(f"Unknown join method: {method}")
+    times = np.asarray(times, dtype='datetime64[ns]').view(np.int64)
+    tolerance = pd.Timedelta(tolerance).value
+    weather_times = weather['Time'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    aligned = {}
+    for col in columns:
+        readings = weather[col].to_numpy(dtype=np.float32, na_value=np.nan)
+        valid = ~np.isnan(readings)
+        aligned[col] = _align_column(times, weather_times[valid], readings[valid], tolerance, method)
+    return aligned
+
+def join_weather(power_df, weather, columns=WEATHER_COLUMNS, tolerance='1h', method='linear'):
+    """power_df with the aligned weather columns appended"""
+    aligned = align_weather(power_df['Time'].to_numpy(), weather, columns, tolerance, method)
+    return pd.concat([power_df, pd.DataFrame(aligned, index=power_df.index)], axis=1)
+
+def iter_joined_partitions(source=None, weather=None, columns=None, tolerance='1h', method='linear'):
+    """Yield ((year, building_type), joined frame) one power partition at a time
+
+    Weather is loaded once; only one year/building_type slice of the power
+    data is in memory at any time.
+    """
+    source = source or default_power_source()
+    weather = load_weather_frame() if weather is None else weather
+    weather_columns = [col for col in WEATHER_COLUMNS if col in weather.columns]
+    for year, building_type in power_partitions(source):
+        power_df = load_power_frame(source, columns=columns, years=[year], building_types=[building_type])
+        yield (year, building_type), join_weather(power_df, weather, weather_columns, tolerance, method)
+
+def write_joined_dataset(output_path=JOINED_PATH, source=None, weather=None, tolerance='1h', method='linear'):
+    """Write power rows with aligned weather as a year/building_type partitioned Parquet dataset"""
+    print("\n" + "="*50)
+    print("JOINING WEATHER TO POWER DATA")
+    print("="*50)
+
+    if os.path.exists(output_path):
+        shutil.rmtree(output_path)
+    rows = matched = 0
+    for (year, building_type), joined in iter_joined_partitions(source, weather, tolerance=tolerance,
+                                                                method=method):
+        append_power_store(joined, output_path)
+        covered = joined[WEATHER_COLUMNS[0]].notna().sum() if WEATHER_COLUMNS[0] in joined.columns else 0
+        rows += len(joined)
+        matched += covered
+        print(f"  {year}/{building_type}: {len(joined)} rows, {covered} with weather")
+    print(f"Joined {rows} rows ({matched / rows * 100 if rows else 0:.1f}% with weather) to: {output_path}")
+    return output_path
+
+if __name__ == "__main__":
+    write_joined_dataset()
@@ -0,0 +1,125 @@
+import os
+import re
+import shutil
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+
+# Year-partitioned Parquet store of parsed weather measurements, sorted by Time
+WEATHER_STORE = "weather_data"
+WEATHER_CSV = "combined_weather_data.csv"
+MEASUREMENT_COLUMNS = ['Temperature (℃)', 'Humidity (%RH)']
+DATE_IN_NAME = re.compile(r'(20\d{2})[-_]?(\d{2})[-_]?(\d{2})')
+
+def _partitioning():
+    return ds.partitioning(pa.schema([('year', pa.dictionary(pa.int32(), pa.string()))]), flavor='hive')
+
+def _match_column(columns, keywords):
+    for col in columns:
+        if any(keyword in str(col).lower() for keyword in keywords):
+            return col
+    return None
+
+def _file_date(file_path):
+    """yyyymmdd date embedded in a weather file name, if any"""
+    match = DATE_IN_NAME.search(os.path.basename(file_path))
+    if match is None:
+        return None
+    try:
+        return pd.Timestamp(f"{match.group(1)}-{match.group(2)}-{match.group(3)}")
+    except ValueError:
+        return None
+
+def normalize_weather_frame(df, file_path=None):
+    """Map a raw weather sheet onto Time (datetime64) plus float32 measurement columns
+
+    Column names are matched loosely (anything containing 'temp' or 'humid').
+    Sheets that only carry a time of day get the date from the file name.
+    """
+    time_col = _match_column(df.columns, ('time', 'date', 'timestamp'))
+    if time_col is None:
+        raise ValueError("No time column found")
+    sources = {'Temperature (℃)': _match_column(df.columns, ('temp',)),
+               'Humidity (%RH)': _match_column(df.columns, ('humid', '%rh'))}
+
+    raw_times = df[time_col].astype(str).str.strip()
+    if raw_times.str.fullmatch(r'\d{1,2}:\d{2}(:\d{2}(\.\d+)?)?').all():
+        # Time-of-day only: anchor it to the date in the file name
+        file_date = _file_date(file_path) if file_path else None
+        if file_date is None:
+            raise ValueError("Time of day without a date in the file name")
+        raw_times = raw_times.where(raw_times.str.count(':') == 2, raw_times + ':00')
+        times = file_date + pd.to_timedelta(raw_times, errors='coerce')
+    else:
+        times = pd.to_datetime(raw_times, errors='coerce')
+
+    frame = pd.DataFrame({'Time': times.to_numpy(dtype='datetime64[ns]')})
+    for target, source in sources.items():
+        frame[target] = (pd.to_numeric(df[source], errors='coerce').to_numpy(dtype=np.float32)
+                         if source is not None else np.full(len(df), np.nan, dtype=np.float32))
+    return frame.dropna(subset=['Time'])
+
+def prepare_weather_frame(df):
+    """Storage schema: sorted by Time, year partition key, file_path categorical"""
+    df = df.sort_values('Time', kind='stable').reset_index(drop=True)
+    df['year'] = df['Time'].dt.year.astype(str).astype('category')
+    if 'file_path' in df.columns:
+        df['file_path'] = df['file_path'].astype('category')
+    return df
+
+def write_weather_years(df, store_path=WEATHER_STORE):
+    """Replace the year partitions present in df"""
+    if df.empty:
+        return store_path
+    table = pa.Table.from_pandas(prepare_weather_frame(df), preserve_index=False)
+    ds.write_dataset(table, store_path, format='parquet', partitioning=_partitioning(),
+                     basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                     existing_data_behavior='delete_matching')
+    return store_path
+
+def write_weather_store(df, store_path=WEATHER_STORE):
+    """Write the full weather store, replacing any existing one"""
+    if os.path.exists(store_path):
+        shutil.rmtree(store_path)
+    write_weather_years(df, store_path)
+    print(f"Weather data store written to: {store_path}")
+    return store_path
+
+def drop_weather_years(years, store_path=WEATHER_STORE):
+    for year in years:
+        year_dir = os.path.join(store_path, f"year={year}")
+        if os.path.isdir(year_dir):
+            shutil.rmtree(year_dir)
+
+def query_weather(start=None, end=None, columns=MEASUREMENT_COLUMNS, store_path=WEATHER_STORE):
+    """Measurements with start <= Time < end, read with year pruning and Time row-group filters"""
+    dataset = ds.dataset(store_path, format='parquet', partitioning=ds.HivePartitioning.discover())
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    conditions = []
+    if start is not None and end is not None:
+        conditions.append(ds.field('year').isin([str(y) for y in range(start.year, end.year + 1)]))
+    if start is not None:
+        conditions.append(ds.field('Time') >= pa.scalar(start.value, type=pa.timestamp('ns')))
+    if end is not None:
+        conditions.append(ds.field('Time') < pa.scalar(end.value, type=pa.timestamp('ns')))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    table = dataset.to_table(columns=['Time'] + list(columns), filter=expression)
+    return table.to_pandas().sort_values('Time', kind='stable').reset_index(drop=True)
+
+def read_weather_store(store_path=WEATHER_STORE, columns=None):
+    """Every stored row, including the file_path each came from"""
+    dataset = ds.dataset(store_path, format='parquet', partitioning=ds.HivePartitioning.discover())
+    df = dataset.to_table(columns=columns).to_pandas()
+    if 'year' in df.columns:
+        df = df.drop(columns='year')
+    return df.sort_values('Time', kind='stable').reset_index(drop=True)
+
+def default_weather_source():
+    """Prefer the parsed weather store, falling back to the legacy combined CSV"""
+    return WEATHER_STORE if os.path.isdir(WEATHER_STORE) else WEATHER_CSV
@@ -0,0 +1,252 @@
+import re
+import sys
+import time
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+import numpy as np
+import pandas as pd
+
+try:
+    import python_calamine
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = None
+
+
+POWER_COLUMNS = ('Time', 'Power (kW)')
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+# Built-in number formats that Excel renders as dates or times
+DATE_FORMAT_IDS = set(range(14, 23)) | {45, 46, 47}
+CELL_REF = re.compile(r'([A-Z]+)(\d+)')
+DIMENSION = re.compile(rb'<(?:\w+:)?dimension ref="[A-Z]+\d+:[A-Z]+(\d+)"')
+
+class UnexpectedLayout(ValueError):
+    """The workbook is not a plain header-plus-rows sheet the fast reader understands"""
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+def _first_sheet(archive):
+    """Path of the first worksheet and whether the workbook uses the 1904 date system"""
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    pr = workbook.find(f'{MAIN_NS}workbookPr')
+    date1904 = pr is not None and pr.get('date1904') in ('1', 'true')
+    sheet = workbook.find(f'{MAIN_NS}sheets/{MAIN_NS}sheet')
+    if sheet is None:
+        raise UnexpectedLayout("Workbook has no sheets")
+    relations = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for relation in relations.iter(f'{PACKAGE_REL_NS}Relationship'):
+        if relation.get('Id') == sheet.get(f'{REL_NS}id'):
+            target = relation.get('Target')
+            path = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+            return path, date1904
+    raise UnexpectedLayout("First sheet has no relationship target")
+
+def _shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    root = ET.fromstring(archive.read('xl/sharedStrings.xml'))
+    return [''.join(t.text or '' for t in si.iter(f'{MAIN_NS}t')) for si in root.iter(f'{MAIN_NS}si')]
+
+def _date_styles(archive):
+    """Indices of cell styles whose number format shows a date or time"""
+    if 'xl/styles.xml' not in archive.namelist():
+        return set()
+    root = ET.fromstring(archive.read('xl/styles.xml'))
+    date_formats = set(DATE_FORMAT_IDS)
+    for fmt in root.iter(f'{MAIN_NS}numFmt'):
+        # Drop quoted literals and [colour]/[locale] sections before looking for date tokens
+        code = re.sub(r'"[^"]*"|\[[^\]]*\]', '', fmt.get('formatCode', '')).lower()
+        if re.search(r'[dmyhs]', code):
+            date_formats.add(int(fmt.get('numFmtId')))
+    cell_xfs = root.find(f'{MAIN_NS}cellXfs')
+    if cell_xfs is None:
+        return set()
+    return {i for i, xf in enumerate(cell_xfs.findall(f'{MAIN_NS}xf')) if int(xf.get('numFmtId', 0)) in date_formats}
+
+def read_xlsx_columns(file_path, columns=POWER_COLUMNS):
+    """Read the named columns of the first sheet by streaming its XML
+
+    Only the header row and the requested columns are decoded; values go
+    straight into arrays preallocated from the sheet's dimension. Numbers in
+    date-formatted cells become datetime64, text stays as text (as with
+    pd.read_excel). Anything else - a missing column, booleans, error cells,
+    numbers in a non-date time column - raises UnexpectedLayout.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        sheet_path, date1904 = _first_sheet(archive)
+        strings = _shared_strings(archive)
+        date_styles = _date_styles(archive)
+        with archive.open(sheet_path) as f:
+            head = f.read(2048)
+        match = DIMENSION.search(head)
+        capacity = max(int(match.group(1)) - 1, 0) if match else 64
+
+        header = {}
+        wanted = None
+        values = times = texts = None
+        last_row = 0
+        with archive.open(sheet_path) as f:
+            for _, cell in ET.iterparse(f):
+                if cell.tag == f'{MAIN_NS}row':
+                    cell.clear()
+                    continue
+                if cell.tag != f'{MAIN_NS}c':
+                    continue
+                ref = CELL_REF.fullmatch(cell.get('r', ''))
+                if ref is None:
+                    raise UnexpectedLayout("Cell without a reference")
+                row = int(ref.group(2)) - 2
+                col = _column_index(ref.group(1))
+                kind = cell.get('t', 'n')
+                v = cell.find(f'{MAIN_NS}v')
+                if kind == 'inlineStr':
+                    text = ''.join(t.text or '' for t in cell.iter(f'{MAIN_NS}t'))
+                elif v is None or v.text is None:
+                    continue
+                elif kind == 's':
+                    text = strings[int(v.text)]
+                elif kind in ('str', 'n'):
+                    text = v.text
+                else:
+                    raise UnexpectedLayout(f"Unsupported cell type {kind}")
+
+                if row < 0:
+                    header[text] = col
+                    continue
+                if text == '':
+                    # pd.read_excel reads empty text (pandas' default na_rep) as missing
+                    continue
+                if wanted is None:
+                    if any(name not in header for name in columns):
+                        raise UnexpectedLayout(f"Missing columns: {[c for c in columns if c not in header]}")
+                    wanted = {header[name]: name for name in columns}
+                    values = {name: np.full(capacity, np.nan) for name in columns[1:]}
+                    times = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[us]')
+                    texts = {}
+                name = wanted.get(col)
+                if name is None:
+                    continue
+                if row >= len(times):
+                    grown = max(2 * len(times), row + 1)
+                    times = np.concatenate([times, np.full(grown - len(times), np.datetime64('NaT'), dtype=times.dtype)])
+                    values = {key: np.concatenate([array, np.full(grown - len(array), np.nan)])
+                              for key, array in values.items()}
+                last_row = max(last_row, row + 1)
+
+                if name == columns[0]:
+                    if kind in ('s', 'str', 'inlineStr'):
+                        texts[row] = text
+                    elif int(cell.get('s', 0)) in date_styles:
+                        days = float(text) + (1462 if date1904 else 0)
+                        # Rounded to the millisecond like openpyxl, which absorbs float error in the serial
+                        times[row] = np.datetime64('1899-12-30') + np.timedelta64(round(days * 86_400_000), 'ms')
+                    else:
+                        raise UnexpectedLayout("Numeric time cell without a date format")
+                elif kind == 'n':
+                    values[name][row] = float(text)
+                else:
+                    try:
+                        values[name][row] = float(text)
+                    except ValueError:
+                        raise UnexpectedLayout(f"Text in numeric column {name}")
+
+    if wanted is None:
+        if any(name not in header for name in columns):
+            raise UnexpectedLayout("Sheet has no header row with the requested columns")
+        return pd.DataFrame({name: pd.Series(dtype='float64') for name in columns})
+    if texts:
+        # Text timestamps are kept as text, like pd.read_excel; compact_power_frame parses them later
+        time_values = times[:last_row].astype(object)
+        time_values[np.isnat(times[:last_row])] = np.nan
+        for row, text in texts.items():
+            time_values[row] = text
+    else:
+        time_values = times[:last_row].astype('datetime64[ns]')
+    frame = {columns[0]: time_values}
+    frame.update({name: values[name][:last_row] for name in columns[1:]})
+    return pd.DataFrame(frame)
+
+def read_excel_file(file_path):
+    """pd.read_excel with the calamine engine when python-calamine is installed"""
+    return pd.read_excel(file_path, engine=EXCEL_ENGINE)
+
+def project_power_columns(df, columns=POWER_COLUMNS):
+    """Only the named columns, in order, so every reader yields the read_xlsx_columns schema
+
+    Headers are matched ignoring case and surrounding whitespace and renamed
+    to the canonical name; a column the sheet lacks comes back all-NaN.
+    """
+    headers = {str(col).strip().lower(): col for col in reversed(df.columns)}
+    renamed = {headers[name.lower()]: name for name in columns if name.lower() in headers}
+    return df[list(renamed)].rename(columns=renamed).reindex(columns=list(columns))
+
+def read_power_workbook(file_path, columns=POWER_COLUMNS):
+    """Fast xlsx path for the fixed power layout, falling back to pd.read_excel
+
+    Both paths return only the requested columns.
+    """
+    if file_path.endswith('.xlsx'):
+        try:
+            return read_xlsx_columns(file_path, columns)
+        except (UnexpectedLayout, zipfile.BadZipFile, KeyError, ET.ParseError):
+            pass
+    return project_power_columns(read_excel_file(file_path), columns)
+
+def benchmark_readers(files, columns=POWER_COLUMNS, repeats=3):
+    """Per-file read time of read_xlsx_columns against pd.read_excel, with a result check"""
+    rows = []
+    for file_path in files:
+        timings = {}
+        results = {}
+        for name, reader in (('fast', lambda p: read_xlsx_columns(p, columns)),
+                             ('read_excel', lambda p: pd.read_excel(p)[list(columns)])):
+            best = np.inf
+            for _ in range(repeats):
+                began = time.perf_counter()
+                try:
+                    results[name] = reader(file_path)
+                except Exception as e:
+                    results[name] = e
+                best = min(best, time.perf_counter() - began)
+            timings[name] = best
+        fast, reference = results['fast'], results['read_excel']
+        if isinstance(fast, Exception) or isinstance(reference, Exception):
+            same = False
+        else:
+            fast_times = pd.to_datetime(fast[columns[0]], errors='coerce')
+            reference_times = pd.to_datetime(reference[columns[0]], errors='coerce')
+            same = (len(fast) == len(reference) and fast_times.equals(reference_times)
+                    and all(np.allclose(pd.to_numeric(fast[c], errors='coerce'),
+                                        pd.to_numeric(reference[c], errors='coerce'), equal_nan=True)
+                            for c in columns[1:]))
+        rows.append({'file_path': file_path, 'fast_ms': timings['fast'] * 1000,
+                     'read_excel_ms': timings['read_excel'] * 1000, 'identical': same})
+    result = pd.DataFrame(rows)
+    if not result.empty:
+        result['speedup'] = result['read_excel_ms'] / result['fast_ms']
+    return result
+
+if __name__ == "__main__":
+    print("\n" + "="*50)
+    print("XLSX READER BENCHMARK")
+    print("="*50)
+    if len(sys.argv) > 1:
+        sample = sys.argv[1:]
+    else:
+        from power_load import find_all_excel_files
+        sample = [f for f in find_all_excel_files(verbose=False) if f.endswith('.xlsx')][:50]
+    timings = benchmark_readers(sample)
+    if timings.empty:
+        print("No .xlsx files to benchmark")
+    else:
+        print(f"Files: {len(timings)}, identical results: {int(timings['identical'].sum())}")
+        print(f"Median per file: fast {timings['fast_ms'].median():.2f} ms, "
+              f"read_excel {timings['read_excel_ms'].median():.2f} ms "
+              f"({timings['speedup'].median():.1f}x)")
@@ -0,0 +1,101 @@
+import os
+import sys
+import shutil
+import importlib.util
+import numpy as np
+import pandas as pd
+import pytest
+
+CODE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'code_files')
+sys.path.insert(0, CODE_DIR)
+
+
+BUILDING_TYPES = ('Office', 'Commercial', 'Public', 'Residential')
+YEARS = ('2016', '2017')
+DAYS = 3
+
+def load_script(file_name):
+    """Import one of the numbered report scripts (e.g. 02_power_data_report.py) as a module"""
+    spec = importlib.util.spec_from_file_location(os.path.splitext(file_name)[0][3:],
+                                                  os.path.join(CODE_DIR, file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def write_power_file(path, day, seed):
+    """One hourly daily workbook shaped like the raw archive, with ~15% missing readings"""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range(day, periods=24, freq='h')
+    power = 300 + 100 * np.sin(np.arange(24) / 24 * 2 * np.pi) + rng.normal(0, 10, 24)
+    power[rng.random(24) < 0.15] = np.nan
+    frame = pd.DataFrame({'Time': times.strftime('%Y-%m-%d %H:%M:%S'), 'Power (kW)': power.round(2)})
+    if path.endswith('.csv'):
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_excel(path, index=False)
+
+def write_power_tree(root, years=YEARS, building_types=BUILDING_TYPES, days=DAYS):
+    """<root>/<year>/1_hour/<year>_1hour_<type>/<yyyymmdd>_1hour_<type>.xlsx, as in the archive"""
+    seed = 0
+    for year in years:
+        for building_type in building_types:
+            directory = os.path.join(root, year, '1_hour', f'{year}_1hour_{building_type}')
+            os.makedirs(directory, exist_ok=True)
+            for day in pd.date_range(f'{year}-01-01', periods=days, freq='D'):
+                write_power_file(os.path.join(directory, f'{day:%Y%m%d}_1hour_{building_type}.xlsx'), day, seed)
+                seed += 1
+    return root
+
+def read_power_tree(root):
+    """pandas reference for the whole tree: every workbook read with read_excel, in path order"""
+    frames = []
+    for directory, dirs, files in os.walk(root):
+        dirs.sort()
+        for file in sorted(files):
+            path = os.path.join(directory, file)
+            frame = pd.read_excel(path) if file.endswith('.xlsx') else pd.read_csv(path)
+            frame['file_path'] = path
+            frames.append(frame)
+    df = pd.concat(frames, ignore_index=True)
+    df['Time'] = pd.to_datetime(df['Time'])
+    return df
+
+def make_power_frame(years=YEARS, building_types=BUILDING_TYPES, days=DAYS, seed=0):
+    """Combined frame with the columns load_all_data_flexible produces, as plain object/float64 columns"""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for year in years:
+        for building_type in building_types:
+            for day in pd.date_range(f'{year}-01-01', periods=days, freq='D'):
+                name = f'{day:%Y%m%d}_1hour_{building_type}.xlsx'
+                power = 300 + 100 * np.sin(np.arange(24) / 24 * 2 * np.pi) + rng.normal(0, 10, 24)
+                power[rng.random(24) < 0.15] = np.nan
+                frames.append(pd.DataFrame({
+                    'Time': pd.date_range(day, periods=24, freq='h'), 'Power (kW)': power,
+                    'file_path': f'data/{year}/1_hour/{year}_1hour_{building_type}/{name}', 'file_name': name,
+                    'year': year, 'building_type': building_type}))
+    return pd.concat(frames, ignore_index=True)
+
+def plain(df):
+    """Categoricals back to strings and float32 to float64, for comparisons with pandas references"""
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(str)
+        elif df[col].dtype == np.float32:
+            df[col] = df[col].astype(np.float64)
+    return df
+
+@pytest.fixture(scope='session')
+def power_tree_template(tmp_path_factory):
+    return write_power_tree(str(tmp_path_factory.mktemp('template') / 'data'))
+
+@pytest.fixture
+def power_tree(power_tree_template, tmp_path, monkeypatch):
+    """A private copy of the workbook tree as power_load.base_path, with outputs written under tmp_path"""
+    import power_load
+    root = str(tmp_path / 'data')
+    shutil.copytree(power_tree_template, root)
+    monkeypatch.setattr(power_load, 'base_path', root)
+    monkeypatch.chdir(tmp_path)
+    return root
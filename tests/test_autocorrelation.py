@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.stattools import acf, pacf
+from autocorrelation import (acf_fft, pacf_levinson, acf_confint, pacf_confint, hourly_matrix,
+                             compute_correlograms, significant_lags, Z_95)
+
+
+def _daily_series(n, seed):
+    rng = np.random.default_rng(seed)
+    hours = np.arange(n)
+    noise = np.zeros(n)
+    for i in range(1, n):
+        noise[i] = 0.6 * noise[i - 1] + rng.normal()
+    return 300 + 80 * np.sin(hours / 24 * 2 * np.pi) + 20 * noise
+
+def test_acf_matches_statsmodels_for_rows_of_different_lengths():
+    series = [_daily_series(500, 0), _daily_series(320, 1)]
+    matrix = np.full((2, 500), np.nan)
+    matrix[0], matrix[1, :320] = series[0], series[1]
+    result = acf_fft(matrix, 400)
+    np.testing.assert_allclose(result[0], acf(series[0], nlags=400, fft=True), atol=1e-10)
+    np.testing.assert_allclose(result[1, :320], acf(series[1], nlags=319, fft=True), atol=1e-10)
+    assert np.isnan(result[1, 320:]).all()
+
+def test_missing_values_add_nothing_to_the_autocovariance():
+    values = _daily_series(300, 2)
+    values[np.random.default_rng(3).random(300) < 0.1] = np.nan
+    centred = np.nan_to_num(values - np.nanmean(values))
+    reference = np.array([centred[:300 - k] @ centred[k:] for k in range(51)])
+    np.testing.assert_allclose(acf_fft(values, 50)[0], reference / reference[0], atol=1e-10)
+
+def test_levinson_pacf_matches_statsmodels_ywm():
+    series = [_daily_series(600, seed) for seed in (4, 5, 6)]
+    result = pacf_levinson(acf_fft(np.vstack(series), 60), 48)
+    for row, values in zip(result, series):
+        np.testing.assert_allclose(row, pacf(values, nlags=48, method='ywm'), atol=1e-8)
+
+@pytest.mark.filterwarnings('ignore::FutureWarning')
+def test_bands_match_statsmodels_confidence_intervals():
+    values = _daily_series(400, 7)
+    reference, confint = acf(values, nlags=30, fft=True, alpha=0.05)
+    np.testing.assert_allclose(acf_confint(acf_fft(values, 30), [400])[0], confint[:, 1] - reference, atol=1e-8)
+    reference, confint = pacf(values, nlags=30, method='ywm', alpha=0.05)
+    np.testing.assert_allclose(pacf_confint([400])[0], (confint[1:, 1] - reference[1:]), atol=1e-8)
+
+def test_hourly_matrix_places_missing_periods_on_the_grid():
+    periods = pd.date_range('2016-01-01', periods=10, freq='h')
+    table = pd.DataFrame({'building_type': ['A'] * 10 + ['B'] * 4,
+                          'period': periods.append(periods[[2, 3, 6, 7]]),
+                          'mean': np.arange(14, dtype=np.float64)})
+    table = table.drop(index=[4, 5])
+    keys, starts, matrix = hourly_matrix(table)
+    assert keys == [('A',), ('B',)]
+    np.testing.assert_array_equal(starts, periods[[0, 2]].to_numpy())
+    np.testing.assert_array_equal(matrix[0], [0, 1, 2, 3, np.nan, np.nan, 6, 7, 8, 9])
+    np.testing.assert_array_equal(matrix[1], [10, 11, np.nan, np.nan, 12, 13] + [np.nan] * 4)
+
+def test_daily_cycle_is_the_strongest_significant_lag():
+    correlograms = compute_correlograms([('A',)], _daily_series(24 * 30, 8)[None, :], nlags=72, pacf_lags=24)
+    lags = significant_lags(correlograms['acf'][0], correlograms['acf_band'][0], min_lag=2)
+    assert 24 in lags[:3]
+    assert np.isclose(correlograms['pacf_band'][0], Z_95 / np.sqrt(24 * 30))
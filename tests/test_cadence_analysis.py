@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from cadence_analysis import CadenceAccumulator, analyze_frame_cadence, modal_intervals
+
+
+def _series_frame():
+    """Hourly series with dropped readings, repeated timestamps and a 15 minute series"""
+    rng = np.random.default_rng(0)
+    frames = []
+    for i, (building_type, freq) in enumerate([('Office', 'h'), ('Public', 'h'), ('Residential', '15min')]):
+        times = pd.date_range('2016-01-01', periods=400, freq=freq)
+        keep = rng.random(len(times)) > 0.1
+        times = times[keep]
+        repeated = rng.choice(len(times), 5, replace=False)
+        times = np.sort(np.r_[times.to_numpy(), times.to_numpy()[repeated]])
+        frames.append(pd.DataFrame({'Time': times, 'Power (kW)': rng.normal(size=len(times)),
+                                    'building_type': building_type, 'file_path': f'data/{i}.xlsx'}))
+    return pd.concat(frames, ignore_index=True)
+
+def _reference(df, gap_factor=1.5):
+    gaps = missing = overlaps = out_of_order = 0
+    gap_time = 0
+    for _, group in df.groupby(['building_type', 'file_path']):
+        raw = group['Time'].to_numpy('datetime64[ns]').view(np.int64)
+        out_of_order += int((np.diff(raw) < 0).sum())
+        steps = np.diff(np.sort(raw))
+        overlaps += int((steps == 0).sum())
+        values, counts = np.unique(steps[steps > 0], return_counts=True)
+        modal = values[np.argmax(counts)]
+        is_gap = steps > gap_factor * modal
+        gaps += int(is_gap.sum())
+        missing += int((np.rint(steps[is_gap] / modal) - 1).sum())
+        gap_time += int(steps[is_gap].sum())
+    return {'gaps': gaps, 'missing_samples': missing, 'gap_time': pd.Timedelta(gap_time),
+            'overlaps': overlaps, 'out_of_order': out_of_order}
+
+def _summary(acc):
+    return {'gaps': acc.gaps, 'missing_samples': acc.missing_samples, 'gap_time': acc.gap_time,
+            'overlaps': acc.overlaps, 'out_of_order': acc.out_of_order}
+
+def test_frame_cadence_matches_numpy_reference():
+    df = _series_frame()
+    acc = analyze_frame_cadence(df)
+    assert _summary(acc) == _reference(df)
+    assert len(acc.series) == 3
+    steps = df.groupby(['building_type', 'file_path'])['Time'].diff().dropna()
+    expected = steps[steps > pd.Timedelta(0)].value_counts()
+    assert acc.intervals.sort_index().to_dict() == expected.sort_index().to_dict()
+    assert acc.modal_interval == pd.Timedelta('1h')
+
+@pytest.mark.parametrize('chunk_size', [13, 250, 5000])
+def test_chunked_cadence_matches_whole_frame(chunk_size):
+    df = _series_frame()
+    acc = CadenceAccumulator(top_n=5)
+    for start in range(0, len(df), chunk_size):
+        acc.update(df.iloc[start:start + chunk_size])
+    whole = analyze_frame_cadence(df, top_n=5)
+    assert _summary(acc) == _summary(whole)
+    pd.testing.assert_series_equal(acc.intervals.sort_index(), whole.intervals.sort_index())
+    pd.testing.assert_frame_equal(acc.largest_gaps(), whole.largest_gaps())
+
+def test_chunk_made_only_of_gap_steps():
+    steps = np.r_[[1] * 20, [3, 3, 3], [1] * 20]
+    times = pd.Timestamp('2016-01-01') + pd.to_timedelta(np.r_[0, np.cumsum(steps)], unit='h')
+    df = pd.DataFrame({'Time': times, 'building_type': 'Office', 'file_path': 'a.xlsx'})
+    acc = CadenceAccumulator()
+    for start in (0, 21, 24):
+        acc.update(df.iloc[start:{0: 21, 21: 24, 24: len(df)}[start]])
+    assert (acc.gaps, acc.missing_samples, acc.gap_time) == (3, 6, pd.Timedelta('9h'))
+
+def test_out_of_order_rows_are_counted_per_series():
+    df = _series_frame()
+    office = df.index[df['building_type'] == 'Office']
+    df.loc[office[10:20], 'Time'] = df.loc[office[10:20], 'Time'].to_numpy()[::-1]
+    acc = analyze_frame_cadence(df)
+    assert acc.out_of_order == _reference(df)['out_of_order'] > 0
+    assert acc.out_of_order_runs == 1
+
+def test_modal_intervals_prefers_the_shorter_step_on_ties():
+    series = np.array([0, 0, 0, 0, 1, 1, 1])
+    steps = np.array([2, 2, 5, 5, 0, 3, 3])
+    np.testing.assert_array_equal(modal_intervals(series, steps, 3), [2, 3, 0])
@@ -0,0 +1,36 @@
+import os
+import numpy as np
+import pandas as pd
+import power_load
+from power_storage import compact_power_frame
+from conftest import make_power_frame, plain
+
+
+def test_compact_frame_keeps_values_and_shrinks_memory():
+    df = make_power_frame()
+    df['Time'] = df['Time'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    compact = compact_power_frame(df.copy())
+
+    assert compact['Power (kW)'].dtype == np.float32
+    assert compact['Time'].dtype == 'datetime64[ns]'
+    for col in power_load.METADATA_COLUMNS:
+        assert isinstance(compact[col].dtype, pd.CategoricalDtype)
+    expected = df.assign(Time=pd.to_datetime(df['Time']),
+                         **{'Power (kW)': df['Power (kW)'].astype(np.float32).astype(np.float64)})
+    pd.testing.assert_frame_equal(plain(compact), expected)
+    assert compact.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum() / 3
+
+def test_attached_metadata_matches_per_row_strings(monkeypatch):
+    base = os.path.join('archive', 'data')
+    monkeypatch.setattr(power_load, 'base_path', base)
+    paths = [os.path.join(base, '2016', '1_hour', '2016_1hour_Office', '20160101_1hour_Office.xlsx'),
+             os.path.join(base, '2017', '1_hour', '2017_1hour_Public', '20170101_1hour_Public.xlsx'),
+             os.path.join(base, 'misc', 'loose.csv')]
+    lengths = [3, 0, 2]
+    df = power_load.attach_file_metadata(pd.DataFrame({'Power (kW)': np.arange(5.0)}), paths, lengths)
+
+    rows = np.repeat(paths, lengths)
+    assert df['file_path'].astype(str).tolist() == rows.tolist()
+    assert df['file_name'].astype(str).tolist() == [os.path.basename(path) for path in rows]
+    assert df['year'].astype(str).tolist() == ['2016'] * 3 + ['Unknown'] * 2
+    assert df['building_type'].astype(str).tolist() == ['Office'] * 3 + ['Unknown'] * 2
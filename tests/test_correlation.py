@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+from correlation import rank_column, correlation_matrix, grouped_correlation, indicator_columns
+from conftest import make_power_frame
+
+
+def _columns(seed=0, n=3000):
+    rng = np.random.default_rng(seed)
+    hour = rng.integers(0, 24, n)
+    power = 300 + 5 * hour + rng.normal(0, 20, n)
+    power[rng.random(n) < 0.05] = np.nan
+    times = pd.Timestamp('2016-01-01') + pd.to_timedelta(rng.integers(0, 10 ** 7, n), unit='s')
+    return {'hour': hour, 'is_weekend': rng.random(n) < 0.3, 'Power (kW)': power,
+            'big': rng.integers(0, 10 ** 9, n), 'Time': times.to_numpy()}
+
+@pytest.mark.parametrize('values', [np.array([3, 1, 2, 2, 9, 1, 1]), np.array([0.5, np.inf, -1.0, 0.5, 2.0]),
+                                    np.random.default_rng(0).integers(0, 10 ** 9, 500)])
+def test_doubled_ranks_match_rankdata(values):
+    np.testing.assert_array_equal(rank_column(values), 2 * stats.rankdata(values))
+
+def test_grouped_ranks_restart_in_every_group():
+    rng = np.random.default_rng(1)
+    values, groups = rng.integers(0, 5, 200), rng.integers(0, 3, 200)
+    ranks = rank_column(values, groups, 3)
+    for group in range(3):
+        np.testing.assert_array_equal(ranks[groups == group], 2 * stats.rankdata(values[groups == group]))
+
+@pytest.mark.parametrize('method', ['spearman', 'pearson'])
+def test_matrix_matches_dataframe_corr(method):
+    columns = _columns()
+    frame = pd.DataFrame(columns).dropna()
+    frame['Time'] = frame['Time'].astype(np.int64)
+    reference = frame.astype(np.float64).corr(method)
+    result = correlation_matrix(columns, method, block_size=700)
+    np.testing.assert_allclose(result.to_numpy(), reference.to_numpy(), atol=1e-10)
+    assert list(result.columns) == list(columns)
+
+def test_constant_columns_give_nan():
+    result = correlation_matrix({'a': np.arange(10), 'b': np.ones(10)})
+    assert np.isnan(result.loc['a', 'b']) and np.isnan(result.loc['b', 'b']) and result.loc['a', 'a'] == 1
+
+@pytest.mark.parametrize('method', ['spearman', 'pearson'])
+def test_grouped_matrices_match_groupby_corr(method):
+    df = make_power_frame(days=10)
+    df['hour'] = df['Time'].dt.hour
+    df.loc[df.sample(50, random_state=0).index, 'building_type'] = None
+    columns = {'hour': df['hour'].to_numpy(), 'Power (kW)': df['Power (kW)'].to_numpy()}
+    result = grouped_correlation(columns, (df['building_type'].to_numpy(), df['year'].to_numpy()), method)
+    reference = df.dropna(subset=['building_type']).groupby(['building_type', 'year'])
+    assert sorted(result) == sorted(reference.groups)
+    for key, group in reference:
+        np.testing.assert_allclose(result[key].to_numpy(), group[['hour', 'Power (kW)']].corr(method).to_numpy(),
+                                   atol=1e-10)
+
+    single = grouped_correlation(columns, df['building_type'].to_numpy(), method)
+    assert set(single) == {'Office', 'Commercial', 'Public', 'Residential'}
+    assert set(grouped_correlation(columns, (df['building_type'].to_numpy(),), method)) == \
+        {('Office',), ('Commercial',), ('Public',), ('Residential',)}
+
+def test_indicator_columns_match_get_dummies():
+    categories = np.array(['Office', 'Public', 'Office', 'Residential'])
+    indicators = indicator_columns(categories, 'building')
+    reference = pd.get_dummies(categories, prefix='building')
+    assert list(indicators) == list(reference.columns)
+    for name, values in indicators.items():
+        np.testing.assert_array_equal(values, reference[name].astype(np.int8))
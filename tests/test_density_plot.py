@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from density_plot import density_grid, histogram_counts
+
+
+def _points(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(0, 3, n)
+    y = 0.5 * x + rng.gamma(2.0, 1.0, n)
+    x[rng.random(n) < 0.01] = np.nan
+    y[rng.random(n) < 0.01] = np.nan
+    return x, y
+
+@pytest.mark.parametrize('x_range, y_range', [(None, None), ((-2.0, 4.0), (0.0, 3.0))])
+def test_density_grid_matches_histogram2d(x_range, y_range):
+    x, y = _points()
+    grid = density_grid(x, y, width=80, height=50, x_range=x_range, y_range=y_range)
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    x_range = x_range or (np.nanmin(x[valid]), np.nanmax(x[valid]))
+    y_range = y_range or (np.nanmin(y[valid]), np.nanmax(y[valid]))
+    reference, _, _ = np.histogram2d(y[valid], x[valid], bins=[50, 80], range=[y_range, x_range])
+    np.testing.assert_array_equal(grid['counts'], reference)
+    assert grid['points'] == reference.sum()
+    assert grid['x_range'] == pytest.approx(x_range) and grid['y_range'] == pytest.approx(y_range)
+
+def test_datetime_axis_bins_like_epoch_nanoseconds():
+    rng = np.random.default_rng(1)
+    times = pd.Timestamp('2016-01-01') + pd.to_timedelta(rng.integers(0, 10 ** 6, 5000), unit='s')
+    times = times.to_numpy().copy()
+    times[:10] = np.datetime64('NaT')
+    power = rng.normal(300, 40, 5000)
+    grid = density_grid(times, power, width=40, height=30)
+    valid = ~np.isnat(times)
+    ns = times[valid].view(np.int64).astype(np.float64)
+    reference, _, _ = np.histogram2d(power[valid], ns, bins=[30, 40])
+    np.testing.assert_array_equal(grid['counts'], reference)
+    assert grid['x_dates']
+
+@pytest.mark.parametrize('bins, value_range', [(30, None), (17, (250.0, 330.0))])
+def test_histogram_counts_match_np_histogram(bins, value_range):
+    values = np.random.default_rng(2).normal(300, 30, 50000)
+    values[::97] = np.nan
+    counts, edges = histogram_counts(values, bins, value_range)
+    reference, reference_edges = np.histogram(values[~np.isnan(values)], bins, range=value_range)
+    np.testing.assert_array_equal(counts, reference)
+    np.testing.assert_allclose(edges, reference_edges)
+
+def test_constant_and_empty_inputs():
+    counts, edges = histogram_counts(np.full(10, 5.0), bins=4)
+    np.testing.assert_array_equal(counts, np.histogram(np.full(10, 5.0), bins=4)[0])
+    np.testing.assert_allclose(edges, np.histogram(np.full(10, 5.0), bins=4)[1])
+    grid = density_grid(np.array([]), np.array([]), width=5, height=4)
+    assert grid['points'] == 0 and grid['counts'].shape == (4, 5)
@@ -0,0 +1,94 @@
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from drift_detection import Cusum, PageHinkley, DriftMonitor, detect_drift, _SeasonalResidual
+
+
+def _loop_reference(values, name, threshold, drift, warmup, holdoff):
+    """Textbook one-value-at-a-time CUSUM / Page-Hinkley with the same warmup and holdoff rules"""
+    alarms, reference, skip = [], [], 0
+    state = dict(up=0.0, down=0.0, count=0, total=0.0, m_up=0.0, min_up=0.0, m_down=0.0, min_down=0.0)
+    for position, x in enumerate(values):
+        if skip:
+            skip -= 1
+            continue
+        if len(reference) < warmup:
+            reference.append(x)
+            continue
+        mean, std = np.mean(reference), np.std(reference)
+        z = (x - mean) / (std if std > 0 else 1.0)
+        if name == 'cusum':
+            state['up'] = up = max(0.0, state['up'] + z - drift)
+            state['down'] = down = max(0.0, state['down'] - z - drift)
+        else:
+            state['count'] += 1
+            state['total'] += z
+            running_mean = state['total'] / state['count']
+            state['m_up'] += z - running_mean - drift
+            state['m_down'] += running_mean - z - drift
+            state['min_up'] = min(state['min_up'], state['m_up'])
+            state['min_down'] = min(state['min_down'], state['m_down'])
+            up, down = state['m_up'] - state['min_up'], state['m_down'] - state['min_down']
+        if up > threshold or down > threshold:
+            alarms.append((position, 'up' if up > threshold else 'down', max(up, down), mean, std))
+            reference, skip = [], holdoff
+            state = {key: 0 * value for key, value in state.items()}
+    return alarms
+
+def _shifted_values(seed=0):
+    rng = np.random.default_rng(seed)
+    levels = np.repeat([0.0, 3.0, 3.0, -2.0, 0.5], 400)
+    return 100 + levels + rng.normal(0, 1, len(levels))
+
+@pytest.mark.parametrize('detector, params', [(Cusum, dict(threshold=8.0, drift=0.5, warmup=100, holdoff=50)),
+                                              (PageHinkley, dict(threshold=40.0, drift=0.25, warmup=100,
+                                                                 holdoff=50))])
+@pytest.mark.parametrize('chunk_size', [1, 37, 5000])
+def test_vectorized_detectors_match_a_python_loop(detector, params, chunk_size):
+    values = _shifted_values()
+    scanned = detector(**params)
+    alarms = []
+    for start in range(0, len(values), chunk_size):
+        alarms += [(start + position, *rest) for position, *rest in scanned.update(values[start:start + chunk_size])]
+    reference = _loop_reference(values, detector.name, **params)
+    assert len(reference) >= 3
+    assert [alarm[:2] for alarm in alarms] == [alarm[:2] for alarm in reference]
+    np.testing.assert_allclose([alarm[2:] for alarm in alarms], [alarm[2:] for alarm in reference], rtol=1e-6)
+
+def test_seasonal_residual_matches_a_week_shift():
+    rng = np.random.default_rng(1)
+    times = pd.date_range('2016-01-01', periods=24 * 30, freq='h')
+    times = times[rng.random(len(times)) > 0.05]
+    series = pd.Series(rng.normal(size=len(times)), index=times)
+    residual = _SeasonalResidual('7D')
+    result = np.concatenate([residual.update(times[i:i + 100].to_numpy(), series.to_numpy()[i:i + 100])
+                             for i in range(0, len(times), 100)])
+    reference = series - series.reindex(times - pd.Timedelta('7D')).to_numpy()
+    np.testing.assert_allclose(result, reference.to_numpy())
+    assert len(residual.times) <= 7 * 24
+
+def test_monitor_finds_a_level_shift_and_resumes_after_pickling():
+    times = pd.date_range('2016-01-01', periods=24 * 60, freq='h')
+    frames = []
+    for building_type, shift_day in [('Office', 30), ('Public', None)]:
+        rng = np.random.default_rng(len(building_type))
+        power = 300 + 50 * np.sin(np.arange(len(times)) / 24 * 2 * np.pi) + rng.normal(0, 5, len(times))
+        if shift_day is not None:
+            power[shift_day * 24:] += 60
+        frames.append(pd.DataFrame({'building_type': building_type, 'Time': times, 'Power (kW)': power}))
+    df = pd.concat(frames, ignore_index=True)
+    params = dict(warmup=24 * 7, holdoff=24 * 7)
+
+    whole = detect_drift(df, **params).events_frame()
+    assert set(whole['building_type']) == {'Office'}
+    first = whole.iloc[0]
+    assert first['direction'] == 'up'
+    assert pd.Timestamp('2016-01-31') <= first['Time'] < pd.Timestamp('2016-02-01')
+
+    monitor = DriftMonitor(**params)
+    half = df['Time'] < pd.Timestamp('2016-02-10')
+    monitor.update(df[half])
+    monitor = pickle.loads(pickle.dumps(monitor))
+    monitor.update(df)
+    pd.testing.assert_frame_equal(monitor.events_frame(), whole)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+from duplicate_detection import DuplicateDetector, find_duplicates
+from conftest import make_power_frame
+
+
+def _frame_with_duplicates():
+    df = make_power_frame(days=4)
+    rng = np.random.default_rng(1)
+    # Exact copies of some rows, and same Time/building_type with another reading
+    copies = df.sample(150, random_state=1)
+    conflicts = df[df['Power (kW)'].notna()].sample(60, random_state=2).copy()
+    conflicts['Power (kW)'] += rng.integers(1, 5, len(conflicts))
+    conflicts['file_name'] = 'conflict.xlsx'
+    missing = df.sample(40, random_state=3).copy()
+    missing['Power (kW)'] = np.nan
+    return pd.concat([df, copies, conflicts, missing], ignore_index=True).sample(frac=1, random_state=4)
+
+def _reference(df, key=None):
+    measured = df[df['Power (kW)'].notna()]
+    groups = measured.groupby(['Time', 'building_type'])
+    sizes, distinct = groups.size(), groups['Power (kW)'].nunique()
+    return {'rows': len(df), 'duplicate_rows': int(df.duplicated(subset=key).sum()),
+            'duplicate_keys': int((sizes > 1).sum()), 'conflicting_keys': int((distinct > 1).sum()),
+            'conflicting_rows': int(sizes[distinct > 1].sum())}
+
+def test_find_duplicates_matches_pandas():
+    df = _frame_with_duplicates()
+    result = find_duplicates(df)
+    assert result == _reference(df)
+    assert result['duplicate_rows'] > 0 and result['conflicting_keys'] > 0
+    assert find_duplicates(df, key=['Time', 'building_type']) == _reference(df, key=['Time', 'building_type'])
+
+@pytest.mark.parametrize('n_buckets, chunk_size, spill', [(1, 97, False), (16, 500, False), (7, 1000, True),
+                                                          (64, 50, True)])
+def test_chunked_detector_matches_pandas(tmp_path, n_buckets, chunk_size, spill):
+    df = _frame_with_duplicates()
+    detector = DuplicateDetector(n_buckets=n_buckets, spill_dir=str(tmp_path) if spill else None)
+    for start in range(0, len(df), chunk_size):
+        detector.update(df.iloc[start:start + chunk_size])
+    assert detector.result() == _reference(df)
+    detector.close()
+    assert list(tmp_path.iterdir()) == []
+
+def test_categorical_columns_hash_like_plain_strings():
+    df = _frame_with_duplicates()
+    compact = df.astype({'file_path': 'category', 'file_name': 'category', 'building_type': 'category'})
+    assert find_duplicates(compact) == find_duplicates(df)
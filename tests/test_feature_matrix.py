@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from feature_matrix import FeatureSpec, calendar_features, build_feature_matrix, forecast_features
+
+
+def _hourly_values(n, seed=0):
+    rng = np.random.default_rng(seed)
+    values = 300 + 80 * np.sin(np.arange(n) / 24 * 2 * np.pi) + rng.normal(0, 10, n)
+    values[rng.random(n) < 0.05] = np.nan
+    return values
+
+def test_calendar_features_match_pandas_dt_with_missing_times():
+    times = pd.Series(pd.date_range('2015-12-25', '2017-03-02', freq='7h')).sample(frac=1, random_state=0)
+    times.iloc[[3, 50]] = pd.NaT
+    names = ('hour', 'day_of_week', 'day_of_month', 'month', 'year', 'day_of_year', 'is_weekend')
+    features = calendar_features(times.to_numpy(), names)
+    dt = times.dt
+    reference = {'hour': dt.hour, 'day_of_week': dt.dayofweek, 'day_of_month': dt.day, 'month': dt.month,
+                 'year': dt.year, 'day_of_year': dt.dayofyear, 'is_weekend': (dt.dayofweek >= 5).where(times.notna())}
+    for name in names:
+        np.testing.assert_array_equal(features[name], reference[name].to_numpy(np.float64), err_msg=name)
+
+    complete = calendar_features(times.dropna().to_numpy(), ('hour', 'is_weekend'))
+    assert complete['hour'].dtype.kind == 'i' and complete['is_weekend'].dtype == bool
+
+def test_holidays_need_a_country():
+    holidays = pytest.importorskip('holidays')
+    times = pd.date_range('2016-01-01', '2017-12-31', freq='D')
+    features = calendar_features(times.to_numpy(), ('is_holiday',), country='US')
+    reference = [day in holidays.country_holidays('US', years=[2016, 2017]) for day in times.date]
+    np.testing.assert_array_equal(features['is_holiday'], reference)
+    with pytest.raises(ValueError):
+        calendar_features(times.to_numpy(), ('is_holiday',))
+    with pytest.raises(ValueError):
+        FeatureSpec(calendar=('hour', 'is_holiday'))
+
+@pytest.mark.parametrize('horizon, block_size', [(1, 8760), (6, 100)])
+def test_feature_matrix_matches_pandas_shift_and_rolling(horizon, block_size):
+    values = _hourly_values(1500)
+    start = pd.Timestamp('2016-01-01')
+    spec = FeatureSpec(lags=(1, 24), rolling_windows=(6, 24), calendar=('hour', 'day_of_week'), horizon=horizon)
+    X, y, times = build_feature_matrix(values, start, spec, block_size=block_size)
+
+    series = pd.Series(values, index=pd.date_range(start, periods=len(values), freq='h'))
+    reference = pd.DataFrame({'y': series})
+    for lag in spec.lags:
+        reference[f"lag_{lag}"] = series.shift(horizon - 1 + lag)
+    for window in spec.rolling_windows:
+        rolling = series.rolling(window, min_periods=1)
+        reference[f"rolling_mean_{window}"] = rolling.mean().shift(horizon)
+        reference[f"rolling_std_{window}"] = rolling.std().shift(horizon)
+    reference['hour'] = series.index.hour
+    reference['day_of_week'] = series.index.dayofweek
+    reference = reference.iloc[spec.history:].dropna()
+
+    np.testing.assert_array_equal(times, reference.index.to_numpy())
+    np.testing.assert_allclose(y, reference['y'], rtol=1e-6)
+    np.testing.assert_allclose(X, reference[spec.feature_names].to_numpy(), rtol=1e-5, atol=1e-4)
+    assert X.dtype == np.float32 and X.flags['C_CONTIGUOUS']
+
+def test_forecast_rows_match_the_training_rows_for_the_same_targets():
+    values = _hourly_values(1000, seed=1)
+    start = np.datetime64('2016-01-01T00:00', 'ns')
+    spec = FeatureSpec(lags=(1, 24), rolling_windows=(24,), calendar=('hour',), horizon=3)
+    X, times = forecast_features(values, start, spec)
+    padded = np.r_[values, np.full(3, np.nan)]
+    full_X, _, full_times = build_feature_matrix(padded, start, spec, dropna=False)
+    np.testing.assert_array_equal(times, full_times[-3:])
+    np.testing.assert_array_equal(X, full_X[-3:])
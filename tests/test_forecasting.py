@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from forecasting import (RidgeModel, horizon_spec, building_hourly_series, train_forecasters, forecast,
+                         SEASON)
+from feature_matrix import build_feature_matrix
+from conftest import make_power_frame
+
+
+def _ridge_reference(X, y, alpha):
+    """Closed-form ridge on features standardized with the population std, intercept unpenalized"""
+    means, scale = X.mean(axis=0), X.std(axis=0)
+    Z = (X - means) / scale
+    weights = np.linalg.solve(Z.T @ Z + alpha * np.eye(X.shape[1]), Z.T @ (y - y.mean()))
+    coef = weights / scale
+    return coef, y.mean() - means @ coef
+
+@pytest.mark.parametrize('alpha', [0.0, 1.0, 50.0])
+def test_gram_sum_ridge_matches_the_closed_form(alpha):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, 5)) * [1, 10, 100, 0.1, 1000] + [0, 5, 1e4, 0, -300]
+    y = X @ [2.0, -0.5, 0.01, 30.0, 0.001] + 7 + rng.normal(size=3000)
+    model = RidgeModel(alpha)
+    for start in range(0, len(y), 700):
+        model.partial_fit(X[start:start + 700].astype(np.float32), y[start:start + 700])
+    model.solve()
+    coef, intercept = _ridge_reference(X.astype(np.float32).astype(np.float64), y, alpha)
+    np.testing.assert_allclose(model.coef_, coef, rtol=1e-6, atol=1e-9)
+    np.testing.assert_allclose(model.intercept_, intercept, rtol=1e-6)
+    if alpha == 0.0:
+        design = np.c_[X.astype(np.float32), np.ones(len(y))]
+        np.testing.assert_allclose(np.r_[model.coef_, model.intercept_],
+                                   np.linalg.lstsq(design, y, rcond=None)[0], rtol=1e-5, atol=1e-7)
+
+@pytest.mark.parametrize('horizon', [1, 6, 24, 30])
+def test_seasonal_column_is_the_value_one_season_back(horizon):
+    spec, column = horizon_spec(horizon, lags=(1, 2), rolling_windows=(), calendar=())
+    values = np.arange(500, dtype=np.float64)
+    X, y, _ = build_feature_matrix(values, '2016-01-01', spec)
+    seasons = int(np.ceil(horizon / SEASON))
+    np.testing.assert_array_equal(y - X[:, column], SEASON * seasons)
+
+def test_building_hourly_series_matches_resample_mean():
+    df = make_power_frame(days=5)
+    series = building_hourly_series(df)
+    assert sorted(series) == sorted(df['building_type'].unique())
+    for building_type, group in df.groupby('building_type'):
+        start, values = series[building_type]
+        reference = group.set_index('Time')['Power (kW)'].resample('h').mean()
+        reference = reference.loc[:reference.last_valid_index()]
+        assert start == reference.index[0]
+        np.testing.assert_allclose(values, reference.to_numpy(), rtol=1e-12)
+
+def test_parallel_training_and_batched_forecasts_match_serial_models():
+    df = make_power_frame(years=('2016',), days=60)
+    series = building_hourly_series(df)
+    horizons = {'hour-ahead': 1}
+    serial, serial_metrics = train_forecasters(series, horizons, ['seasonal_naive', 'ridge'], test_days=7)[:2]
+    parallel, parallel_metrics = train_forecasters(series, horizons, ['seasonal_naive', 'ridge'], test_days=7,
+                                                   n_workers=2)[:2]
+    columns = ['building_type', 'horizon', 'model', 'mae', 'rmse', 'rows']
+    pd.testing.assert_frame_equal(serial_metrics[columns], parallel_metrics[columns])
+
+    batched = forecast(parallel, series, 'hour-ahead')
+    for building_type, fitted in serial.items():
+        spec, models = fitted['hour-ahead']
+        start, values = series[building_type]
+        X = build_feature_matrix(np.r_[values, np.nan], start, spec, dropna=False)[0][-1:]
+        expected = models['ridge'].predict(X)
+        np.testing.assert_allclose(batched.loc[batched['building_type'] == building_type, 'forecast'], expected)
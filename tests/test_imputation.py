@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+from imputation import impute_power, summarize_imputation, _weather_regression, WEEK_ORIGIN
+
+
+def _quarter_hourly(building_type, periods, seed):
+    rng = np.random.default_rng(seed)
+    times = pd.date_range('2016-01-04', periods=periods, freq='15min')
+    power = 300 + 50 * np.sin(np.arange(periods) / 96 * 2 * np.pi) + rng.normal(0, 5, periods)
+    return pd.DataFrame({'building_type': building_type, 'Time': times, 'Power (kW)': power})
+
+def test_grid_keeps_measured_values_and_interpolates_short_gaps_like_pandas():
+    frames = []
+    for seed, building_type in enumerate(['Office', 'Public']):
+        frame = _quarter_hourly(building_type, 96 * 10, seed)
+        rng = np.random.default_rng(10 + seed)
+        # Short gaps: dropped rows and NaN readings; plus a duplicated reading
+        frame = frame.drop(index=rng.choice(len(frame), 40, replace=False))
+        frame.loc[frame.sample(30, random_state=seed).index, 'Power (kW)'] = np.nan
+        frames.append(pd.concat([frame, frame.iloc[[5]].assign(**{'Power (kW)': 0.0})]))
+    df = pd.concat(frames, ignore_index=True).sample(frac=1, random_state=0)
+    result = impute_power(df)
+
+    for building_type, group in df.groupby('building_type'):
+        grid = group.set_index('Time')['Power (kW)'].resample('15min').mean()
+        series = result[result['building_type'] == building_type].set_index('Time')
+        np.testing.assert_array_equal(series.index, grid.index)
+        measured = series['imputation_method'] == 'measured'
+        np.testing.assert_array_equal(measured.to_numpy(), grid.notna().to_numpy())
+        np.testing.assert_allclose(series.loc[measured, 'Power (kW)'], grid[grid.notna()])
+        assert not series.loc[measured, 'imputed'].any()
+
+        reference = grid.interpolate(method='time', limit_area='inside')
+        linear = series['imputation_method'] == 'linear'
+        assert linear.sum() > 0
+        np.testing.assert_allclose(series.loc[linear, 'Power (kW)'], reference[linear.to_numpy()])
+
+def test_day_long_gap_in_a_weekly_pattern_is_filled_exactly():
+    times = pd.date_range('2016-01-04', periods=24 * 7 * 4, freq='h')
+    slot = ((times.asi8 - WEEK_ORIGIN) % pd.Timedelta('7D').value) // pd.Timedelta('1h').value
+    power = 200 + 3.0 * slot
+    df = pd.DataFrame({'building_type': 'Office', 'Time': times, 'Power (kW)': power})
+    gap = (times >= '2016-01-20') & (times < '2016-01-21 06:00')
+    result = impute_power(df[~gap])
+    filled = result.set_index('Time').loc[times[gap]]
+    assert (filled['imputation_method'] == 'seasonal').all()
+    np.testing.assert_allclose(filled['Power (kW)'], power[gap])
+
+def test_gaps_longer_than_max_gap_stay_missing():
+    df = _quarter_hourly('Office', 96 * 20, 0)
+    gap = (df['Time'] >= '2016-01-08') & (df['Time'] < '2016-01-12')
+    result = impute_power(df[~gap], max_gap='2D')
+    methods = result.set_index('Time').loc[df.loc[gap, 'Time'], 'imputation_method']
+    assert (methods == 'missing').all()
+    counts = summarize_imputation(result)
+    assert counts.loc['Office', 'missing'] == gap.sum()
+    assert counts.loc['Office'].sum() == len(df)
+
+def test_weather_regression_matches_lstsq_per_series():
+    rng = np.random.default_rng(3)
+    codes = np.repeat([0, 1, 2], [500, 400, 50])
+    design = np.column_stack([np.ones(len(codes)), rng.normal(10, 5, len(codes)), rng.uniform(20, 90, len(codes))])
+    residuals = design @ [1.0, 2.0, -0.1] + codes * design[:, 1] + rng.normal(0, 0.1, len(codes))
+    residuals[rng.random(len(codes)) < 0.05] = np.nan
+    design[rng.random(len(codes)) < 0.05, 2] = np.nan
+    coefficients = _weather_regression(codes, residuals, design, 3, alpha=0.0)
+    for series in (0, 1):
+        usable = (codes == series) & ~np.isnan(residuals) & ~np.isnan(design).any(axis=1)
+        expected = np.linalg.lstsq(design[usable], residuals[usable], rcond=None)[0]
+        np.testing.assert_allclose(coefficients[series], expected, rtol=1e-8)
+    assert np.isnan(coefficients[2]).all()
@@ -0,0 +1,71 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import power_load
+from power_storage import read_power_store
+from ingest_manifest import load_ingest_manifest, find_changed_files
+from conftest import read_power_tree, write_power_file
+
+
+def _refresh():
+    power_load.update_combined_data('store', 'manifest.csv', error_manifest='errors.csv', cube_path='cube',
+                                    drift_state='drift.pkl', peak_index_path='peaks', sorted_path='sorted')
+    return find_changed_files(power_load.find_all_excel_files(verbose=False), load_ingest_manifest('manifest.csv'))
+
+def _assert_store_matches_tree(root):
+    store = read_power_store('store', columns=['Time', 'Power (kW)', 'file_path'])
+    store = store.astype({'file_path': str}).sort_values(['file_path', 'Time']).reset_index(drop=True)
+    reference = read_power_tree(root).sort_values(['file_path', 'Time']).reset_index(drop=True)
+    assert len(store) == len(reference)
+    assert store['file_path'].tolist() == reference['file_path'].tolist()
+    np.testing.assert_array_equal(store['Time'].to_numpy('datetime64[ns]'), reference['Time'].to_numpy('datetime64[ns]'))
+    np.testing.assert_allclose(store['Power (kW)'].to_numpy(np.float64), reference['Power (kW)'], rtol=1e-6)
+
+def test_refresh_picks_up_only_new_changed_and_removed_files(power_tree):
+    directory = os.path.join(power_tree, '2017', '1_hour', '2017_1hour_Office')
+    assert _refresh() == ([], [], [], {})
+    _assert_store_matches_tree(power_tree)
+
+    # Added, rewritten with other readings, and removed files
+    write_power_file(os.path.join(directory, '20170201_1hour_Office.xlsx'), '2017-02-01', seed=100)
+    new_files, changed_files, removed_files, _ = find_changed_files(
+        power_load.find_all_excel_files(verbose=False), load_ingest_manifest('manifest.csv'))
+    assert [os.path.basename(path) for path in new_files] == ['20170201_1hour_Office.xlsx']
+    assert changed_files == [] and removed_files == []
+    assert _refresh()[:3] == ([], [], [])
+    _assert_store_matches_tree(power_tree)
+
+    write_power_file(os.path.join(directory, '20170101_1hour_Office.xlsx'), '2017-01-01', seed=101)
+    changed = find_changed_files(power_load.find_all_excel_files(verbose=False),
+                                 load_ingest_manifest('manifest.csv'))[1]
+    assert [os.path.basename(path) for path in changed] == ['20170101_1hour_Office.xlsx']
+    _refresh()
+    _assert_store_matches_tree(power_tree)
+
+    os.remove(os.path.join(directory, '20170102_1hour_Office.xlsx'))
+    assert len(find_changed_files(power_load.find_all_excel_files(verbose=False),
+                                  load_ingest_manifest('manifest.csv'))[2]) == 1
+    _refresh()
+    _assert_store_matches_tree(power_tree)
+
+def test_touched_file_with_same_content_is_not_reloaded(power_tree):
+    _refresh()
+    path = os.path.join(power_tree, '2016', '1_hour', '2016_1hour_Public', '20160102_1hour_Public.xlsx')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+    assert _refresh() == ([], [], [], {})
+    _assert_store_matches_tree(power_tree)
+
+def test_full_load_manifest_makes_the_next_refresh_a_no_op(power_tree):
+    power_load.load_all_data_flexible(manifest_file='manifest.csv')
+    manifest = load_ingest_manifest('manifest.csv')
+    reference = read_power_tree(power_tree)
+    assert len(manifest) == reference['file_path'].nunique()
+    assert {path: entry['rows'] for path, entry in manifest.items()} == reference['file_path'].value_counts().to_dict()
+    assert find_changed_files(power_load.find_all_excel_files(verbose=False), manifest) == ([], [], [], {})
+
+    # A full build stores no content hash, so a later stat change counts as changed
+    path = sorted(manifest)[0]
+    shutil.copy(sorted(manifest)[1], path)
+    assert find_changed_files(power_load.find_all_excel_files(verbose=False), manifest)[1] == [path]
@@ -0,0 +1,34 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import power_load
+from conftest import read_power_tree
+
+
+def _as_reference(df):
+    return pd.DataFrame({'Time': pd.to_datetime(df['Time']).astype('datetime64[ns]'),
+                         'Power (kW)': df['Power (kW)'].astype(np.float64),
+                         'file_path': df['file_path'].astype(str)}).reset_index(drop=True)
+
+@pytest.mark.parametrize('n_workers, chunk_by, chunk_size', [(1, 'directory', None), (2, 'directory', None),
+                                                             (2, 'year', 2)])
+def test_parallel_ingest_matches_read_excel(power_tree, n_workers, chunk_by, chunk_size):
+    df = power_load.load_all_data_flexible(n_workers=n_workers, chunk_by=chunk_by, chunk_size=chunk_size)
+    pd.testing.assert_frame_equal(_as_reference(df), _as_reference(read_power_tree(power_tree)),
+                                  check_exact=False, rtol=1e-6)
+    assert set(df['building_type'].astype(str)) == {'Office', 'Commercial', 'Public', 'Residential'}
+    assert set(df['year'].astype(str)) == {'2016', '2017'}
+
+def test_failed_files_go_to_the_error_manifest(power_tree):
+    bad = os.path.join(power_tree, '2016', '1_hour', '2016_1hour_Office', 'broken.xlsx')
+    with open(bad, 'w') as f:
+        f.write('not a workbook')
+    serial = power_load.load_all_data_flexible(n_workers=1, error_manifest='serial_errors.csv')
+    parallel = power_load.load_all_data_flexible(n_workers=2, error_manifest='parallel_errors.csv')
+
+    pd.testing.assert_frame_equal(serial, parallel)
+    errors = pd.read_csv('parallel_errors.csv')
+    assert errors['file_path'].tolist() == [bad]
+    assert errors[['year', 'building_type']].values.tolist() == [[2016, 'Office']]
+    assert bad not in set(serial['file_path'].astype(str))
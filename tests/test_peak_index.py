@@ -0,0 +1,91 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from peak_index import build_peak_index, PeakIndex, index_partition
+from power_storage import write_power_store
+from conftest import make_power_frame
+
+
+@pytest.fixture
+def index(tmp_path):
+    df = make_power_frame(days=20)
+    # Whole kW values give ties; a repeated reading is averaged with the original
+    df['Power (kW)'] = df['Power (kW)'].round()
+    repeated = df.iloc[[10, 500]].assign(**{'Power (kW)': lambda frame: frame['Power (kW)'] + 2})
+    df = pd.concat([df, repeated], ignore_index=True)
+    write_power_store(df, str(tmp_path / 'store'))
+    build_peak_index(str(tmp_path / 'store'), str(tmp_path / 'peaks'))
+    reference = (df.dropna(subset=['Power (kW)']).groupby(['building_type', 'year', 'Time'])['Power (kW)']
+                 .mean().astype(np.float32).reset_index())
+    return PeakIndex(str(tmp_path / 'peaks')), reference, tmp_path
+
+def _in_range(reference, start=None, end=None):
+    if start is not None:
+        reference = reference[reference['Time'] >= pd.Timestamp(start)]
+    if end is not None:
+        reference = reference[reference['Time'] < pd.Timestamp(end)]
+    return reference
+
+@pytest.mark.parametrize('n, start, end', [(5, None, None), (40, '2016-01-03', '2017-01-07 12:00'),
+                                           (3, '2017-01-05', None)])
+def test_top_peaks_match_sorted_pandas(index, n, start, end):
+    peaks, reference, _ = index
+    result = peaks.top_peaks(n, start=start, end=end, block=16)
+    expected = (_in_range(reference, start, end)
+                .sort_values(['building_type', 'Power (kW)', 'Time'], ascending=[True, False, True])
+                .groupby('building_type').head(n).reset_index(drop=True))
+    pd.testing.assert_frame_equal(result[['building_type', 'Time', 'Power (kW)']],
+                                  expected[['building_type', 'Time', 'Power (kW)']], check_dtype=False)
+
+@pytest.mark.parametrize('start, end', [(None, None), ('2016-01-05', '2016-01-09')])
+def test_exceedance_matches_pandas_counts(index, start, end):
+    peaks, reference, _ = index
+    selected = _in_range(reference, start, end)
+    for threshold in (300.0, 350.5, float(selected['Power (kW)'].max())):
+        result = peaks.exceedance(threshold, start=start, end=end).set_index('building_type')
+        counts = (selected['Power (kW)'] > threshold).groupby(selected['building_type']).sum()
+        assert result['readings'].to_dict() == counts.to_dict()
+        np.testing.assert_allclose(result['hours'], result['readings'])
+
+def test_maxima_and_exceedance_by_period_match_groupby(index):
+    peaks, reference, _ = index
+    maxima = peaks.maxima('daily')
+    reference = reference.assign(period=reference['Time'].dt.floor('D'))
+    expected = reference.groupby(['building_type', 'period'])['Power (kW)'].max().reset_index()
+    pd.testing.assert_frame_equal(maxima[['building_type', 'period', 'Power (kW)']], expected, check_dtype=False)
+    at_peak = maxima.merge(reference, on=['building_type', 'Time'], suffixes=('', '_reading'))
+    np.testing.assert_array_equal(at_peak['Power (kW)'], at_peak['Power (kW)_reading'])
+
+    above = reference[reference['Power (kW)'] > 330].groupby(['building_type', 'period']).size()
+    result = peaks.exceedance_by_period(330, 'daily').set_index(['building_type', 'period'])['readings']
+    assert result.to_dict() == above.to_dict()
+
+def test_load_duration_curve_counts_readings_at_or_above_each_level(index):
+    peaks, reference, _ = index
+    curve = peaks.load_duration_curve(points=50)
+    for building_type, rows in curve.groupby('building_type'):
+        values = reference.loc[reference['building_type'] == building_type, 'Power (kW)'].to_numpy()
+        expected = [(values >= level).sum() for level in rows['Power (kW)']]
+        np.testing.assert_array_equal(rows['hours'], expected)
+        assert rows['fraction_of_time'].iloc[-1] == 1.0
+        assert rows['Power (kW)'].iloc[0] == values.max()
+
+def test_old_format_partitions_are_rebuilt(index):
+    _, _, tmp_path = index
+    store, peaks = str(tmp_path / 'store'), str(tmp_path / 'peaks')
+    assert build_peak_index(store, peaks) == 0
+    meta_file = os.path.join(peaks, 'building_type=Office', 'year=2016', 'meta.json')
+    with open(meta_file) as f:
+        meta = json.load(f)
+    del meta['format']
+    with open(meta_file, 'w') as f:
+        json.dump(meta, f)
+    assert build_peak_index(store, peaks) == 1
+
+def test_index_partition_orders_ties_for_top_down_walks():
+    times = pd.date_range('2016-01-01', periods=6, freq='h').to_numpy()
+    arrays = index_partition(times, [5.0, 7.0, 7.0, np.nan, 1.0, 7.0])
+    np.testing.assert_array_equal(arrays['sorted_power'], np.sort(arrays['power']))
+    np.testing.assert_array_equal(arrays['order'][::-1][:3], [1, 2, 4])
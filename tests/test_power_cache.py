@@ -0,0 +1,61 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import power_load
+from power_cache import convert_to_cache, cache_status, cache_file_path, read_cached_frame
+from xlsx_reader import read_power_workbook, project_power_columns
+from conftest import read_power_tree, write_power_file
+
+
+def _files(root):
+    return power_load.find_all_excel_files(verbose=False)
+
+def _reference(path):
+    """read_excel projection, with the text timestamps parsed as the cache stores them"""
+    df = project_power_columns(pd.read_excel(path))
+    return df.assign(Time=pd.to_datetime(df['Time']))
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_cache_round_trip_matches_read_excel(power_tree, n_workers):
+    files = _files(power_tree)
+    assert convert_to_cache(files, read_power_workbook, power_tree, 'cache', n_workers=n_workers) == \
+        (len(files), 0, [])
+    assert cache_status(files, power_tree, 'cache') == (len(files), 0, 0)
+    for path in files:
+        cached = read_cached_frame(path, cache_file_path(path, power_tree, 'cache'))
+        pd.testing.assert_frame_equal(cached, _reference(path))
+    assert convert_to_cache(files, read_power_workbook, power_tree, 'cache', n_workers=n_workers) == \
+        (0, len(files), [])
+
+def test_stale_entries_are_reconverted_and_orphans_pruned(power_tree):
+    files = _files(power_tree)
+    convert_to_cache(files, read_power_workbook, power_tree, 'cache')
+    changed, removed = files[0], files[1]
+    write_power_file(changed, '2016-01-01', seed=500)
+    os.remove(removed)
+    # Non-cache files and entries under a source directory that is gone are left alone
+    notes = os.path.join('cache', 'notes.txt')
+    with open(notes, 'w') as f:
+        f.write('keep')
+    unmounted = os.path.join('cache', '2015', '1_hour', 'old.xlsx.arrow')
+    os.makedirs(os.path.dirname(unmounted))
+    with open(unmounted, 'wb') as f:
+        f.write(b'')
+
+    files = _files(power_tree)
+    assert cache_status(files, power_tree, 'cache') == (len(files) - 1, 1, 0)
+    assert convert_to_cache(files, read_power_workbook, power_tree, 'cache') == (1, len(files) - 1, [])
+    pd.testing.assert_frame_equal(read_cached_frame(changed, cache_file_path(changed, power_tree, 'cache')),
+                                  _reference(changed))
+    assert not os.path.exists(cache_file_path(removed, power_tree, 'cache'))
+    assert os.path.exists(notes) and os.path.exists(unmounted)
+
+def test_cached_load_matches_uncached_load(power_tree, monkeypatch):
+    monkeypatch.setattr(power_load, 'cache_path', 'cache')
+    power_load.build_power_cache()
+    cached = power_load.load_all_data_flexible(n_workers=1)
+    monkeypatch.setattr(power_load, 'cache_path', None)
+    pd.testing.assert_frame_equal(cached, power_load.load_all_data_flexible(n_workers=1))
+    reference = read_power_tree(power_tree)
+    np.testing.assert_allclose(cached['Power (kW)'].to_numpy(np.float64), reference['Power (kW)'], rtol=1e-6)
@@ -0,0 +1,80 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import power_load
+from power_cube import (rollup, build_cube, save_cube, load_rollup, update_cube, replace_building_types,
+                        with_moments, combine_buildings, LEVELS)
+from power_storage import read_power_store
+from conftest import make_power_frame, write_power_file
+
+
+def _reference(df, level):
+    freq = {'5min': '5min', 'hourly': 'h', 'daily': 'D', 'monthly': 'MS'}[level]
+    frames = []
+    for building_type, group in df.groupby('building_type'):
+        values = group.set_index('Time')['Power (kW)'].astype('float64')
+        resampled = values.resample(freq)
+        table = pd.DataFrame({'count': resampled.count(), 'sum': resampled.sum(),
+                              'sumsq': (values ** 2).resample(freq).sum(),
+                              'min': resampled.min(), 'max': resampled.max(),
+                              'mean': resampled.mean(), 'std': resampled.std()})
+        table = table[table['count'] > 0].rename_axis('period').reset_index()
+        table.insert(0, 'building_type', str(building_type))
+        frames.append(table)
+    return pd.concat(frames, ignore_index=True)
+
+def _assert_rollup_matches(table, reference):
+    table = with_moments(table).sort_values(['building_type', 'period']).reset_index(drop=True)
+    reference = reference.sort_values(['building_type', 'period']).reset_index(drop=True)
+    assert table['building_type'].tolist() == reference['building_type'].tolist()
+    np.testing.assert_array_equal(table['period'].to_numpy('datetime64[ns]'),
+                                  reference['period'].to_numpy('datetime64[ns]'))
+    for col in ['count', 'sum', 'sumsq', 'min', 'max', 'mean', 'std']:
+        np.testing.assert_allclose(table[col].to_numpy(np.float64), reference[col].to_numpy(np.float64),
+                                   rtol=1e-6, err_msg=col)
+
+@pytest.mark.parametrize('level', list(LEVELS))
+def test_rollup_matches_pandas_resample(level):
+    df = make_power_frame(days=40)
+    _assert_rollup_matches(rollup(df, level), _reference(df, level))
+
+def test_update_and_replace_match_a_full_rebuild(tmp_path):
+    df = make_power_frame(days=10)
+    cube_path = str(tmp_path / 'cube')
+    first, second = df.iloc[:1000], df.iloc[1000:]
+    save_cube(build_cube(first), cube_path)
+    update_cube(second, cube_path)
+    for level in LEVELS:
+        _assert_rollup_matches(load_rollup(level, cube_path), _reference(df, level))
+
+    # Office rows rewritten with other readings
+    changed = df.copy()
+    office = changed['building_type'] == 'Office'
+    changed.loc[office, 'Power (kW)'] = changed.loc[office, 'Power (kW)'] * 2
+    replace_building_types(changed[office], ['Office'], cube_path)
+    for level in LEVELS:
+        _assert_rollup_matches(load_rollup(level, cube_path), _reference(changed, level))
+
+def test_combine_buildings_matches_pandas():
+    df = make_power_frame(days=5)
+    combined = combine_buildings(rollup(df, 'daily'))
+    values = df.set_index('Time')['Power (kW)'].resample('D')
+    np.testing.assert_allclose(combined['mean'], values.mean().dropna(), rtol=1e-9)
+    np.testing.assert_allclose(combined['std'], values.std().dropna(), rtol=1e-6)
+
+def test_incremental_refresh_keeps_cube_in_step_with_store(power_tree):
+    refresh = lambda: power_load.update_combined_data(
+        'store', 'manifest.csv', error_manifest='errors.csv', cube_path='cube', drift_state='drift.pkl',
+        peak_index_path='peaks', sorted_path='sorted')
+    refresh()
+    directory = os.path.join(power_tree, '2016', '1_hour', '2016_1hour_Public')
+    write_power_file(os.path.join(directory, '20160301_1hour_Public.xlsx'), '2016-03-01', seed=200)
+    write_power_file(os.path.join(directory, '20160101_1hour_Public.xlsx'), '2016-01-01', seed=201)
+    os.remove(os.path.join(directory, '20160102_1hour_Public.xlsx'))
+    refresh()
+
+    store = read_power_store('store')
+    store['building_type'] = store['building_type'].astype(str)
+    for level in LEVELS:
+        _assert_rollup_matches(load_rollup(level, 'cube'), _reference(store, level))
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from power_storage import write_power_store, replace_power_partitions, STORE_PATH
+from power_query import (build_sorted_store, write_sorted_partition, PowerStore, load_sorted_power,
+                         load_building_power, _partition_dir)
+from conftest import make_power_frame, plain
+
+
+@pytest.fixture
+def sorted_store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    df = make_power_frame(days=15).sample(frac=1, random_state=0).reset_index(drop=True)
+    df['Power (kW)'] = df['Power (kW)'].astype(np.float32).astype(np.float64)
+    df.loc[df.sample(5, random_state=1).index, 'Time'] = pd.NaT
+    write_power_store(df, STORE_PATH)
+    build_sorted_store(STORE_PATH, 'sorted')
+    return df
+
+def _expected(df, building_types=None, start=None, end=None, years=None):
+    if building_types is not None:
+        df = df[df['building_type'].isin(building_types)]
+    if start is not None:
+        df = df[df['Time'] >= pd.Timestamp(start)]
+    if end is not None:
+        # Missing times sort first, so they stay in ranges without a start
+        df = df[(df['Time'] < pd.Timestamp(end)) | (df['Time'].isna() & (start is None))]
+    if years is not None:
+        df = df[df['year'].isin(years)]
+    return df.sort_values(['building_type', 'Time'], kind='stable', na_position='first')
+
+@pytest.mark.parametrize('building_types, start, end, years', [
+    (None, None, None, None),
+    (['Office'], '2016-01-03 05:00', '2017-01-02 13:30', None),
+    (['Public', 'Residential'], '2016-01-10', None, ['2017']),
+    (None, None, '2016-01-04', None),
+    (['Commercial'], '2018-01-01', '2019-01-01', None),
+])
+def test_query_matches_pandas_filtering(sorted_store, building_types, start, end, years):
+    store = PowerStore('sorted')
+    columns = ['building_type', 'Time', 'Power (kW)', 'year']
+    result = plain(store.query(building_types, start, end, columns=columns, years=years))
+    expected = _expected(sorted_store, building_types, start, end, years)
+    assert len(result) == len(expected)
+    # Rows sharing a Time come from different files, so compare them as sorted multisets
+    keys = ['building_type', 'Time', 'Power (kW)']
+    pd.testing.assert_frame_equal(result.sort_values(keys, na_position='first').reset_index(drop=True),
+                                  expected[columns].sort_values(keys, na_position='first').reset_index(drop=True),
+                                  check_dtype=False)
+
+def test_row_range_with_small_blocks_matches_searchsorted(sorted_store, tmp_path):
+    office = sorted_store[sorted_store['building_type'] == 'Office'].drop(columns='building_type')
+    write_sorted_partition(office, _partition_dir('small', 'Office'), block_rows=7)
+    store = PowerStore('small')
+    times = np.sort(office['Time'].to_numpy('datetime64[ns]'))
+    valid = times[~np.isnat(times)]
+    for start, end in [(valid[0], valid[-1]), (valid[13], valid[14]), (valid[100] + 1, valid[200] - 1),
+                       (valid[-1] + 1, None), (None, valid[0])]:
+        first, stop = store.row_range('Office', start, end)
+        expected_first = np.searchsorted(times.view(np.int64), pd.Timestamp(start).value) if start is not None else 0
+        expected_stop = (np.searchsorted(times.view(np.int64), pd.Timestamp(end).value) if end is not None
+                         else len(times))
+        assert (first, stop) == (expected_first, max(expected_stop, expected_first))
+
+def test_store_goes_stale_and_only_changed_building_types_rebuild(sorted_store):
+    assert load_sorted_power(STORE_PATH, 'sorted') is not None
+    changed = sorted_store[(sorted_store['building_type'] == 'Public') & (sorted_store['year'] == '2016')]
+    replace_power_partitions(changed.assign(**{'Power (kW)': changed['Power (kW)'] + 1}), STORE_PATH)
+    assert load_sorted_power(STORE_PATH, 'sorted') is None
+    assert build_sorted_store(STORE_PATH, 'sorted') == 1
+    assert load_sorted_power(STORE_PATH, 'sorted') is not None
+
+def test_load_building_power_is_the_same_with_or_without_the_sorted_store(sorted_store):
+    served = load_building_power(years=['2016'], sorted_path='sorted')
+    fallback = load_building_power(years=['2016'], sorted_path='missing')
+    pd.testing.assert_frame_equal(plain(served), plain(fallback)[list(served.columns)])
+    expected = _expected(sorted_store.dropna(subset=['Power (kW)']), years=['2016'])
+    assert len(served) == len(expected)
+    ordered = served.groupby('building_type', observed=True)['Time'].apply(
+        lambda times: times.isna().iloc[:times.isna().sum()].all() and times.dropna().is_monotonic_increasing)
+    assert ordered.all()
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from power_storage import (write_power_store, read_power_store, replace_power_partitions, load_power_frame,
+                           iter_power_chunks, power_partitions)
+from conftest import make_power_frame, plain
+
+
+KEYS = ['file_path', 'Time']
+
+def _sorted(df):
+    return plain(df).sort_values(KEYS).reset_index(drop=True)
+
+def _expected(df, columns=None, years=None, building_types=None):
+    if years is not None:
+        df = df[df['year'].isin(years)]
+    if building_types is not None:
+        df = df[df['building_type'].isin(building_types)]
+    return df[columns] if columns is not None else df
+
+@pytest.fixture
+def sources(tmp_path):
+    df = make_power_frame()
+    # Values as float32 round-trips them, matching what the store holds
+    df['Power (kW)'] = df['Power (kW)'].astype(np.float32).astype(np.float64)
+    write_power_store(df, str(tmp_path / 'store'))
+    df.to_csv(tmp_path / 'legacy.csv', index=False)
+    return df, {'store': str(tmp_path / 'store'), 'csv': str(tmp_path / 'legacy.csv')}
+
+@pytest.mark.parametrize('source', ['store', 'csv'])
+@pytest.mark.parametrize('columns, years, building_types', [
+    (None, None, None),
+    (['Time', 'Power (kW)', 'file_path'], ['2017'], None),
+    (['Time', 'Power (kW)', 'file_path'], None, ['Office', 'Public']),
+    (None, ['2016'], ['Residential']),
+])
+def test_load_matches_pandas_filtering(sources, source, columns, years, building_types):
+    df, paths = sources
+    loaded = load_power_frame(paths[source], columns=columns, years=years, building_types=building_types)
+    expected = _expected(df, columns, years, building_types)
+    if columns is not None:
+        assert list(loaded.columns) == columns
+    assert set(loaded.columns) == set(expected.columns)
+    pd.testing.assert_frame_equal(_sorted(loaded)[list(expected.columns)], _sorted(expected), check_dtype=False)
+
+@pytest.mark.parametrize('source', ['store', 'csv'])
+def test_chunks_concatenate_to_the_full_frame(sources, source):
+    df, paths = sources
+    chunks = list(iter_power_chunks(paths[source], chunksize=50, years=['2017']))
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    pd.testing.assert_frame_equal(_sorted(pd.concat([plain(c) for c in chunks]))[list(df.columns)],
+                                  _sorted(_expected(df, years=['2017'])), check_dtype=False)
+
+def test_compact_schema_and_partitions(sources):
+    df, paths = sources
+    loaded = read_power_store(paths['store'])
+    assert loaded['Power (kW)'].dtype == np.float32
+    assert str(loaded['Time'].dtype).startswith('datetime64')
+    for col in ('file_path', 'file_name', 'year', 'building_type'):
+        assert isinstance(loaded[col].dtype, pd.CategoricalDtype)
+    expected = sorted(set(zip(df['year'], df['building_type'])))
+    assert power_partitions(paths['store']) == expected == power_partitions(paths['csv'])
+
+def test_replace_partitions_leaves_the_others_untouched(sources):
+    df, paths = sources
+    replacement = df[(df['year'] == '2017') & (df['building_type'] == 'Office')].copy()
+    replacement['Power (kW)'] = 1.0
+    replace_power_partitions(replacement, paths['store'])
+    expected = pd.concat([df[~df.index.isin(replacement.index)], replacement])
+    pd.testing.assert_frame_equal(_sorted(read_power_store(paths['store']))[list(df.columns)], _sorted(expected),
+                                  check_dtype=False)
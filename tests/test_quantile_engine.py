@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from quantile_engine import KLLSketch, exact_quantiles, quantile_summary, grouped_quantiles
+
+
+QS = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+def _rank_errors(values, sketch, qs=QS):
+    ordered = np.sort(values)
+    estimates = sketch.quantiles(qs)
+    # Normalised rank of each estimate; any rank within its run of ties is acceptable
+    low = np.searchsorted(ordered, estimates, side='left') / len(ordered)
+    high = np.searchsorted(ordered, estimates, side='right') / len(ordered)
+    return np.maximum(np.maximum(low - np.asarray(qs), np.asarray(qs) - high), 0)
+
+def test_exact_quantiles_match_numpy_and_pandas():
+    rng = np.random.default_rng(0)
+    values = np.r_[rng.lognormal(3, 1, 10_001), np.nan, np.nan]
+    by_q, outliers, count = exact_quantiles(values, QS)
+    clean = values[~np.isnan(values)]
+    np.testing.assert_allclose([by_q[q] for q in QS], np.quantile(clean, QS), rtol=1e-12)
+    q1, q3 = np.quantile(clean, [0.25, 0.75])
+    assert outliers == int(((clean < q1 - 1.5 * (q3 - q1)) | (clean > q3 + 1.5 * (q3 - q1))).sum())
+    assert count == len(clean)
+    summary = quantile_summary(pd.Series(values), (0.5,))
+    assert summary['exact'] and summary['quantiles'][0.5] == pd.Series(values).median()
+
+@pytest.mark.parametrize('epsilon', [0.01, 0.002])
+def test_kll_rank_error_stays_within_epsilon(epsilon):
+    rng = np.random.default_rng(1)
+    values = np.r_[rng.normal(0, 1, 150_000), rng.exponential(5, 50_000), np.repeat(2.5, 5_000)]
+    rng.shuffle(values)
+    sketch = KLLSketch(epsilon)
+    for chunk in np.array_split(values, 37):
+        sketch.update(chunk)
+    assert sketch.count == len(values)
+    assert sketch.quantiles([0, 1]) == [values.min(), values.max()]
+    # epsilon holds per quantile with high probability, so allow the rare excursion on one of seven
+    errors = _rank_errors(values, sketch)
+    assert errors.max() <= 1.5 * epsilon and errors.mean() <= epsilon / 2
+    # Retained items stay O(1/epsilon), far below the input size
+    assert sum(len(level) for level in sketch._levels) < 20 / epsilon
+
+def test_merged_sketches_keep_the_bound():
+    rng = np.random.default_rng(2)
+    parts = [rng.gamma(2 + i, 10, 20_000) for i in range(8)]
+    merged = KLLSketch(0.01)
+    for part in parts:
+        merged.merge(KLLSketch(0.01, seed=len(part)).update(part))
+    values = np.concatenate(parts)
+    assert _rank_errors(values, merged).max() <= 1.5 * 0.01
+    q1, q3 = np.quantile(values, [0.25, 0.75])
+    exact_outside = ((values < q1 - 1.5 * (q3 - q1)) | (values > q3 + 1.5 * (q3 - q1))).sum()
+    summary = quantile_summary(values, epsilon=0.01)
+    assert abs(summary['outliers'] - exact_outside) <= 0.02 * len(values)
+
+def test_grouped_quantiles_match_pandas_groupby():
+    rng = np.random.default_rng(4)
+    df = pd.DataFrame({'year': rng.choice(['2016', '2017', '2018'], 5_000),
+                       'building_type': pd.Categorical(rng.choice(['Office', 'Public'], 5_000),
+                                                       categories=['Office', 'Public', 'Unused']),
+                       'Power (kW)': rng.normal(300, 50, 5_000).astype(np.float32)})
+    df.loc[rng.random(5_000) < 0.1, 'Power (kW)'] = np.nan
+    df.loc[rng.random(5_000) < 0.05, 'year'] = None
+    table = grouped_quantiles(df, 'Power (kW)', qs=(0.05, 0.5, 0.95))
+    grouped = df.groupby(['year', 'building_type'], observed=True)['Power (kW)']
+    expected = grouped.quantile([0.05, 0.5, 0.95]).unstack()
+    np.testing.assert_allclose(table[['p05', 'p50', 'p95']].to_numpy(), expected.to_numpy(), rtol=1e-6)
+    assert table['count'].tolist() == grouped.count().tolist()
+    assert list(table.index) == list(expected.index)
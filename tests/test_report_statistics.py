@@ -0,0 +1,48 @@
+import streaming_stats
+from power_storage import write_power_store, compact_power_frame
+from conftest import make_power_frame, load_script
+
+
+def _counting(monkeypatch, module, name):
+    calls = []
+    original = getattr(module, name)
+    def wrapper(*args, **kwargs):
+        calls.append(name)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(module, name, wrapper)
+    return calls
+
+def test_reports_share_one_pass_per_aggregate(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_power_store(make_power_frame(), 'store')
+    report = load_script('02_power_data_report.py')
+    duplicates = _counting(monkeypatch, streaming_stats, 'find_duplicates')
+    cadence = _counting(monkeypatch, streaming_stats, 'analyze_frame_cadence')
+    classified = _counting(monkeypatch, streaming_stats, 'classify_columns')
+
+    analyzer = report.DataAnalyzer('store')
+    assert analyzer.run_complete_analysis()
+    assert (len(duplicates), len(cadence), len(classified)) == (1, 1, 1)
+    assert set(analyzer.report_timings) == {'load_data', 'generate_summary_dashboard', 'generate_basic_report',
+                                            'generate_statistical_report', 'generate_data_quality_report',
+                                            'generate_time_series_report'}
+
+def test_replacing_the_frame_drops_cached_statistics(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    report = load_script('02_power_data_report.py')
+    analyzer = report.DataAnalyzer('unused')
+    df = compact_power_frame(make_power_frame())
+    analyzer.df = df
+    first = analyzer.summary
+    assert analyzer.summary is first
+    assert first.null_counts['Power (kW)'] == df['Power (kW)'].isna().sum()
+
+    analyzer.df = df.dropna(subset=['Power (kW)'])
+    assert analyzer.summary is not first
+    assert analyzer.summary.null_counts['Power (kW)'] == 0
+    assert analyzer.summary.rows == df['Power (kW)'].notna().sum()
+
+    # In-place edits need an explicit invalidation
+    analyzer.df.loc[analyzer.df.index[0], 'Power (kW)'] = float('nan')
+    analyzer.invalidate_statistics()
+    assert analyzer.summary.null_counts['Power (kW)'] == 1
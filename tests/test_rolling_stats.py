@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+from rolling_stats import rolling_moments, rolling_statistics
+from conftest import make_power_frame
+
+
+def _moment(function):
+    def apply(window):
+        window = window[~np.isnan(window)]
+        if len(window) == 0 or np.ptp(window) == 0:
+            return np.nan
+        return function(window)
+    return apply
+
+def _reference(values, window, min_periods):
+    rolling = pd.Series(values).rolling(window, min_periods=min_periods)
+    return {'count': rolling.count().to_numpy(), 'mean': rolling.mean().to_numpy(), 'std': rolling.std().to_numpy(),
+            'skew': rolling.apply(_moment(stats.skew), raw=True).to_numpy(),
+            'kurt': rolling.apply(_moment(stats.kurtosis), raw=True).to_numpy()}
+
+def _assert_moments(result, reference, min_periods):
+    valid = ~np.isnan(reference['mean'])
+    np.testing.assert_array_equal(result['count'][valid], reference['count'][valid])
+    for name in ['mean', 'std', 'skew', 'kurt']:
+        np.testing.assert_allclose(result[name], reference[name], rtol=1e-7, atol=1e-8, err_msg=name)
+    np.testing.assert_allclose(result['cv'], reference['std'] / reference['mean'], rtol=1e-7)
+
+@pytest.mark.parametrize('window, min_periods', [(5, None), (24, 12), (100, 1)])
+def test_rolling_moments_match_pandas_and_scipy(window, min_periods):
+    rng = np.random.default_rng(0)
+    values = 1000 + rng.gamma(2.0, 50.0, 1500)
+    values[rng.random(len(values)) < 0.1] = np.nan
+    values[300:330] = 1250.0
+    result = rolling_moments(values, window, min_periods)
+    _assert_moments(result, _reference(values, window, window if min_periods is None else min_periods), min_periods)
+
+def test_quiet_window_after_a_noisy_stretch_keeps_exact_moments():
+    rng = np.random.default_rng(1)
+    values = np.r_[1e6 + rng.normal(0, 1e5, 500), 5.0 + rng.normal(0, 1e-2, 500)]
+    result = rolling_moments(values, 50)
+    # Exact per-window reference: pandas' own online update loses the quiet variance here
+    windows = np.lib.stride_tricks.sliding_window_view(values, 50)[550:]
+    np.testing.assert_allclose(result['std'][599:], windows.std(axis=1, ddof=1), rtol=1e-6)
+    np.testing.assert_allclose(result['skew'][599:], stats.skew(windows, axis=1), rtol=1e-5, atol=1e-8)
+    np.testing.assert_allclose(result['kurt'][599:], stats.kurtosis(windows, axis=1), rtol=1e-5, atol=1e-8)
+
+def test_windows_restart_in_every_group():
+    values = np.arange(20, dtype=np.float64) ** 1.5
+    group_starts = np.repeat([0, 7, 15], [7, 8, 5])
+    result = rolling_moments(values, 4, min_periods=2, group_starts=group_starts)
+    reference = {name: [] for name in ['count', 'mean', 'std', 'skew', 'kurt']}
+    for start, stop in [(0, 7), (7, 15), (15, 20)]:
+        for name, column in _reference(values[start:stop], 4, 2).items():
+            reference[name].append(column)
+    _assert_moments(result, {name: np.concatenate(parts) for name, parts in reference.items()}, 2)
+
+def test_rolling_statistics_matches_groupby_rolling():
+    df = make_power_frame(days=5).sample(frac=1, random_state=0)
+    result = rolling_statistics(df, 'Power (kW)', windows=(6, 24), by='building_type', min_periods=3)
+    ordered = df.sort_values(['building_type', 'Time'], kind='stable')
+    for window in (6, 24):
+        rows = result[result['window'] == window].reset_index(drop=True)
+        rolling = ordered.groupby('building_type')['Power (kW)'].rolling(window, min_periods=3)
+        np.testing.assert_array_equal(rows['Time'], ordered['Time'])
+        np.testing.assert_allclose(rows['mean'], rolling.mean().to_numpy(), rtol=1e-9)
+        np.testing.assert_allclose(rows['std'], rolling.std().to_numpy(), rtol=1e-7)
+        np.testing.assert_allclose(rows['skew'], rolling.apply(_moment(stats.skew), raw=True).to_numpy(),
+                                   rtol=1e-6, atol=1e-9)
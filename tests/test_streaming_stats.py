@@ -0,0 +1,67 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from streaming_stats import DatasetSummary, FrameSummary, NumericAccumulator
+from power_storage import compact_power_frame, write_power_store
+from conftest import make_power_frame, load_script
+
+
+@pytest.fixture
+def frame():
+    df = make_power_frame()
+    # An exact duplicate and a conflicting reading next to their originals, as a re-exported file would give
+    df = pd.concat([df.iloc[:30], df.iloc[[5]], df.iloc[[6]].assign(**{'Power (kW)': 1.0}), df.iloc[30:]],
+                   ignore_index=True)
+    return compact_power_frame(df)
+
+def _chunks(df, size):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+@pytest.mark.parametrize('chunk_size', [7, 100, 10_000])
+def test_chunked_summary_matches_the_in_memory_one(frame, chunk_size):
+    streamed = DatasetSummary.from_chunks(_chunks(frame, chunk_size))
+    full = FrameSummary(frame)
+
+    assert streamed.rows == full.rows == len(frame)
+    pd.testing.assert_series_equal(streamed.null_counts, full.null_counts, check_dtype=False)
+    for col, acc in full.numeric.items():
+        values = frame[col].to_numpy(np.float64)
+        values = values[~np.isnan(values)]
+        assert streamed.numeric[col].count == acc.count == len(values)
+        np.testing.assert_allclose([streamed.numeric[col].mean, streamed.numeric[col].std],
+                                   [values.mean(), values.std(ddof=1)], rtol=1e-12)
+        assert (streamed.numeric[col].min, streamed.numeric[col].max) == (values.min(), values.max())
+    for col, counter in full.value_counts.items():
+        pd.testing.assert_series_equal(streamed.value_counts[col].counts.sort_index(),
+                                       counter.counts.sort_index(), check_names=False)
+    for col, acc in full.datetimes.items():
+        got = streamed.datetimes[col]
+        assert (got.valid, got.invalid, got.min, got.max) == (acc.valid, acc.invalid, acc.min, acc.max)
+    pd.testing.assert_series_equal(streamed.coverage.sort_index(), full.coverage.sort_index(), check_dtype=False)
+    assert streamed.duplicate_summary == full.duplicate_summary
+    assert streamed.duplicate_summary['duplicate_rows'] == int(frame.duplicated().sum()) == 1
+    assert streamed.head.equals(full.head)
+
+def test_numeric_accumulators_merge_in_any_order():
+    rng = np.random.default_rng(3)
+    parts = [rng.normal(1e6, 5, size) for size in (1, 50, 999)]
+    merged = NumericAccumulator(None)
+    for part in parts[::-1]:
+        merged.merge(NumericAccumulator(None).update(part))
+    values = np.concatenate(parts)
+    np.testing.assert_allclose([merged.mean, merged.std], [values.mean(), values.std(ddof=1)], rtol=1e-12)
+    assert merged.count == len(values)
+
+def test_streaming_reports_run_from_the_store(frame, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_power_store(frame, 'store')
+    report = load_script('02_power_data_report.py')
+
+    analyzer = report.DataAnalyzer('store', streaming=True, chunksize=64)
+    assert analyzer.run_complete_analysis()
+    assert isinstance(analyzer.summary, DatasetSummary) and analyzer.summary.rows == len(frame)
+    assert len(os.listdir('outputs')) == 5
+    basic = next(open(os.path.join('outputs', name), encoding='utf-8').read()
+                 for name in os.listdir('outputs') if name.startswith('01_basic_report'))
+    assert f"Total Records: {len(frame):,}" in basic
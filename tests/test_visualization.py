@@ -0,0 +1,50 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+from power_cube import build_cube, combine_buildings
+from conftest import load_script, make_power_frame
+
+
+@pytest.fixture
+def visualization(monkeypatch):
+    module = load_script('04_visualization.py')
+    # Worker processes unpickle the renderers by module name
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    return module
+
+def _jobs(visualization):
+    df = make_power_frame(days=20)
+    daily = combine_buildings(build_cube(df, levels={'daily': 'D'})['daily']).rename(columns={'period': 'Time'})
+    grids = visualization.power_density_data(df, width=60, height=20)
+    corr = df[['Power (kW)']].assign(hour=df['Time'].dt.hour).corr('spearman')
+    return [(visualization.render_rolling_statistics, visualization.rolling_statistics_data(daily), 'rolling'),
+            (visualization.render_power_density, grids, 'density'),
+            (visualization.render_heatmap, (corr, 'Heatmap'), 'heatmap')]
+
+def test_rolling_statistics_data_matches_pandas_rolling(visualization):
+    df = make_power_frame(days=60)
+    daily = combine_buildings(build_cube(df, levels={'daily': 'D'})['daily']).rename(columns={'period': 'Time'})
+    data = visualization.rolling_statistics_data(daily)
+    rolling_mean = daily['mean'].rolling(30).mean()
+    np.testing.assert_allclose(data['rolling_mean'], rolling_mean, rtol=1e-9)
+    np.testing.assert_allclose(data['rolling_std'], daily['std'].rolling(30).mean(), rtol=1e-9)
+    np.testing.assert_allclose(data['rolling_skew'], daily['mean'].rolling(30).apply(stats.skew, raw=True),
+                               rtol=1e-6)
+
+def test_headless_parallel_render_writes_the_same_figures(visualization, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(plt, 'show', lambda: pytest.fail("headless rendering must not block on show"))
+    jobs = _jobs(visualization)
+    serial = visualization.render_figures(jobs, dpi=20, headless=True, n_workers=1)
+    sizes = {name: os.path.getsize(name) for name, _ in serial}
+    for name, _ in serial:
+        os.remove(name)
+    parallel = visualization.render_figures(jobs, dpi=20, headless=True, n_workers=3)
+    assert [name for name, _ in parallel] == ['rolling.png', 'density.png', 'heatmap.png']
+    assert {name: os.path.getsize(name) for name, _ in parallel} == sizes
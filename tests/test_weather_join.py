@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+from weather_join import align_weather, join_weather, load_weather_frame, WEATHER_COLUMNS
+
+
+def _weather(seed=0):
+    rng = np.random.default_rng(seed)
+    seconds = np.sort(rng.choice(30 * 24 * 3600, 900, replace=False))
+    weather = pd.DataFrame({'Time': pd.Timestamp('2016-01-01') + pd.to_timedelta(seconds, unit='s'),
+                            'Temperature (℃)': rng.normal(10, 5, 900).astype(np.float32),
+                            'Humidity (%RH)': rng.uniform(20, 90, 900).astype(np.float32)})
+    weather.loc[rng.random(900) < 0.2, 'Humidity (%RH)'] = np.nan
+    return weather
+
+def _power_times(seed=1):
+    rng = np.random.default_rng(seed)
+    seconds = rng.choice(31 * 24 * 3600, 2000, replace=False) - 12 * 3600
+    return pd.DataFrame({'Time': pd.Timestamp('2016-01-01') + pd.to_timedelta(seconds, unit='s')})
+
+@pytest.mark.parametrize('method', ['backward', 'forward', 'nearest'])
+@pytest.mark.parametrize('tolerance', ['20min', '2h'])
+def test_as_of_methods_match_merge_asof(method, tolerance):
+    weather, power = _weather(), _power_times()
+    aligned = align_weather(power['Time'].to_numpy(), weather, tolerance=tolerance, method=method)
+    ordered = power.reset_index().sort_values('Time')
+    for col in WEATHER_COLUMNS:
+        readings = weather[['Time', col]].dropna()
+        merged = pd.merge_asof(ordered, readings, on='Time', direction=method,
+                               tolerance=pd.Timedelta(tolerance)).set_index('index').sort_index()
+        np.testing.assert_array_equal(aligned[col], merged[col].to_numpy(np.float32), err_msg=col)
+
+def test_linear_matches_np_interp_between_readings_in_tolerance():
+    weather, power = _weather(), _power_times()
+    aligned = align_weather(power['Time'].to_numpy(), weather, tolerance='2h', method='linear')
+    nearest = align_weather(power['Time'].to_numpy(), weather, tolerance='2h', method='nearest')
+    for col in WEATHER_COLUMNS:
+        readings = weather[['Time', col]].dropna()
+        reading_times = readings['Time'].to_numpy('datetime64[ns]').view(np.int64)
+        times = power['Time'].to_numpy('datetime64[ns]').view(np.int64)
+        after = np.searchsorted(reading_times, times)
+        inside = (after > 0) & (after < len(reading_times))
+        bracketed = inside.copy()
+        bracketed[inside] = ((times[inside] - reading_times[after[inside] - 1] <= pd.Timedelta('2h').value)
+                             & (reading_times[after[inside]] - times[inside] <= pd.Timedelta('2h').value))
+        expected = np.interp(times, reading_times, readings[col].to_numpy(np.float64))
+        np.testing.assert_allclose(aligned[col][bracketed], expected[bracketed], rtol=1e-5)
+        np.testing.assert_array_equal(aligned[col][~bracketed], nearest[col][~bracketed])
+    with pytest.raises(ValueError):
+        align_weather(power['Time'].to_numpy(), weather, method='cubic')
+
+def test_join_weather_keeps_the_power_rows(tmp_path):
+    weather = _weather()
+    csv = str(tmp_path / 'weather.csv')
+    doubled = pd.concat([weather, weather.assign(**{'Temperature (℃)': weather['Temperature (℃)'] + 2})])
+    doubled.sample(frac=1, random_state=0).to_csv(csv, index=False)
+    loaded = load_weather_frame(csv)
+    assert loaded['Time'].is_monotonic_increasing and loaded['Time'].is_unique
+    np.testing.assert_allclose(loaded['Temperature (℃)'], weather['Temperature (℃)'] + 1, rtol=1e-5)
+
+    power = _power_times().assign(**{'Power (kW)': 1.0})
+    joined = join_weather(power, loaded, method='backward')
+    pd.testing.assert_frame_equal(joined[['Time', 'Power (kW)']], power)
+    assert list(joined.columns) == ['Time', 'Power (kW)'] + WEATHER_COLUMNS
@@ -0,0 +1,102 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+import pytest
+import Weather_load
+from weather_storage import normalize_weather_frame, read_weather_store, query_weather
+from conftest import load_script
+
+
+def _write_weather_file(path, day, seed):
+    """Half-hourly readings carrying only the time of day, as some loggers write them"""
+    rng = np.random.default_rng(seed)
+    times = pd.date_range(day, periods=48, freq='30min')
+    pd.DataFrame({'Time': times.strftime('%H:%M'), 'Outdoor Temp (C)': rng.normal(10, 3, 48).round(2),
+                  'Humidity %RH': rng.uniform(30, 90, 48).round(1)}).to_csv(path, index=False)
+
+def _reference(root):
+    """Every weather file parsed with pandas alone, dates taken from the file names"""
+    frames = []
+    for directory, dirs, files in os.walk(root):
+        dirs.sort()
+        for file in sorted(files):
+            path = os.path.join(directory, file)
+            raw = pd.read_csv(path)
+            frames.append(pd.DataFrame({'Time': pd.to_datetime(file[:8]) + pd.to_timedelta(raw['Time'] + ':00'),
+                                        'Temperature (℃)': raw['Outdoor Temp (C)'].astype(np.float32),
+                                        'Humidity (%RH)': raw['Humidity %RH'].astype(np.float32),
+                                        'file_path': path}))
+    return pd.concat(frames, ignore_index=True).sort_values('Time', kind='stable').reset_index(drop=True)
+
+@pytest.fixture
+def weather_tree(tmp_path, monkeypatch):
+    root = tmp_path / 'weather'
+    for year in ('2017', '2018'):
+        os.makedirs(root / year)
+        for i, day in enumerate(pd.date_range(f'{year}-03-01', periods=3, freq='D')):
+            _write_weather_file(str(root / year / f'{day:%Y%m%d}_weather.csv'), day, seed=int(year) + i)
+    monkeypatch.setattr(Weather_load, 'weather_base', str(root))
+    monkeypatch.chdir(tmp_path)
+    return str(root)
+
+def _assert_store_matches(root):
+    store = read_weather_store('weather_data')
+    store['file_path'] = store['file_path'].astype(str)
+    pd.testing.assert_frame_equal(store[['Time', 'Temperature (℃)', 'Humidity (%RH)', 'file_path']],
+                                  _reference(root), check_dtype=False)
+
+def test_normalize_matches_pandas_parsing():
+    raw = pd.DataFrame({'Date/Time': ['2017-03-01 00:00', '2017-03-01 00:30', 'bad'],
+                        'TEMP': ['1.5', 'x', '3'], 'Relative humid.': [50, 60, 70]})
+    frame = normalize_weather_frame(raw)
+    assert frame['Time'].tolist() == [pd.Timestamp('2017-03-01 00:00'), pd.Timestamp('2017-03-01 00:30')]
+    np.testing.assert_array_equal(frame['Temperature (℃)'], np.array([1.5, np.nan], dtype=np.float32))
+    np.testing.assert_array_equal(frame['Humidity (%RH)'], np.array([50, 60], dtype=np.float32))
+    with pytest.raises(ValueError):
+        normalize_weather_frame(pd.DataFrame({'Time': ['10:00']}), 'no_date.csv')
+
+def test_incremental_weather_ingest_matches_pandas(weather_tree):
+    Weather_load.update_weather_store()
+    _assert_store_matches(weather_tree)
+
+    year_2018 = os.path.join(weather_tree, '2018')
+    _write_weather_file(os.path.join(year_2018, '20180401_weather.csv'), '2018-04-01', seed=1)
+    _write_weather_file(os.path.join(year_2018, '20180301_weather.csv'), '2018-03-01', seed=2)
+    os.remove(os.path.join(weather_tree, '2017', '20170302_weather.csv'))
+    new_df = Weather_load.update_weather_store()
+    assert sorted(new_df['file_path'].unique()) == [os.path.join(year_2018, '20180301_weather.csv'),
+                                                    os.path.join(year_2018, '20180401_weather.csv')]
+    _assert_store_matches(weather_tree)
+
+    # Nothing changed: nothing parsed, store untouched
+    assert Weather_load.update_weather_store().empty
+    _assert_store_matches(weather_tree)
+    manifest = pd.read_csv('weather_manifest.csv')
+    assert manifest.set_index('file_path')['rows'].to_dict() == _reference(weather_tree)['file_path'].value_counts().to_dict()
+
+def test_query_weather_matches_pandas_filtering(weather_tree):
+    Weather_load.update_weather_store()
+    reference = _reference(weather_tree)
+    for start, end in [('2017-03-01 12:00', '2018-03-02 06:00'), ('2018-01-01', None), (None, '2017-03-02')]:
+        selected = reference
+        if start is not None:
+            selected = selected[selected['Time'] >= pd.Timestamp(start)]
+        if end is not None:
+            selected = selected[selected['Time'] < pd.Timestamp(end)]
+        result = query_weather(start, end, store_path='weather_data')
+        pd.testing.assert_frame_equal(result, selected[['Time', 'Temperature (℃)', 'Humidity (%RH)']]
+                                      .reset_index(drop=True), check_dtype=False)
+
+def test_report_summarises_the_parsed_readings(weather_tree):
+    Weather_load.update_weather_store()
+    pd.DataFrame({'File_Name': ['a.csv'], 'File_Size_MB': [1.0]}).to_csv('weather_files_list.csv', index=False)
+    analyzer = load_script('03_weather_data_report.py').WeatherAnalyzer('weather_files_list.csv')
+    assert analyzer.weather_source == 'weather_data'
+    report = io.StringIO()
+    analyzer.write_measurement_summary(report)
+    reference = _reference(weather_tree)
+    text = report.getvalue()
+    assert f"Readings: {len(reference):,}" in text
+    assert f"Files ingested: {reference['file_path'].nunique():,}" in text
+    assert f"  Mean: {reference['Temperature (℃)'].mean():.2f}" in text
@@ -0,0 +1,60 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from xlsx_reader import read_xlsx_columns, read_power_workbook, project_power_columns, UnexpectedLayout
+
+
+def _reference(path):
+    return project_power_columns(pd.read_excel(path))
+
+def _sheet(times, seed=0):
+    rng = np.random.default_rng(seed)
+    power = rng.normal(300, 50, len(times)).round(3)
+    power[rng.random(len(times)) < 0.2] = np.nan
+    return pd.DataFrame({'Note': 'x', 'Time': times, 'Power (kW)': power, 'Extra': np.arange(len(times))})
+
+@pytest.mark.parametrize('times', [
+    pd.date_range('2016-01-01', periods=300, freq='5min'),
+    pd.date_range('2016-01-01 00:00:00.250', periods=50, freq='37s'),
+    pd.date_range('2016-01-01', periods=48, freq='h').strftime('%Y-%m-%d %H:%M:%S'),
+])
+def test_fast_reader_matches_read_excel(tmp_path, times):
+    path = str(tmp_path / 'sheet.xlsx')
+    _sheet(times).to_excel(path, index=False)
+    pd.testing.assert_frame_equal(read_xlsx_columns(path), _reference(path))
+    pd.testing.assert_frame_equal(read_power_workbook(path), _reference(path))
+
+def test_missing_times_and_trailing_empty_rows_match_read_excel(tmp_path):
+    path = str(tmp_path / 'sheet.xlsx')
+    frame = _sheet(pd.date_range('2016-01-01', periods=30, freq='h'))
+    frame.loc[[3, 29], 'Time'] = pd.NaT
+    frame.loc[29, 'Power (kW)'] = 5.0
+    frame.to_excel(path, index=False)
+    pd.testing.assert_frame_equal(read_xlsx_columns(path), _reference(path))
+
+def test_unexpected_layouts_fall_back_to_read_excel(tmp_path):
+    relabelled = str(tmp_path / 'relabelled.xlsx')
+    frame = _sheet(pd.date_range('2016-01-01', periods=24, freq='h'))
+    frame.rename(columns={'Power (kW)': ' power (kw) '}).to_excel(relabelled, index=False)
+    with pytest.raises(UnexpectedLayout):
+        read_xlsx_columns(relabelled)
+    result = read_power_workbook(relabelled)
+    assert list(result.columns) == ['Time', 'Power (kW)']
+    np.testing.assert_array_equal(result['Power (kW)'], frame['Power (kW)'])
+
+    flags = str(tmp_path / 'flags.xlsx')
+    frame.assign(**{'Power (kW)': frame['Power (kW)'] > 300}).to_excel(flags, index=False)
+    with pytest.raises(UnexpectedLayout):
+        read_xlsx_columns(flags)
+    pd.testing.assert_frame_equal(read_power_workbook(flags), _reference(flags))
+
+    no_power = str(tmp_path / 'no_power.xlsx')
+    frame.drop(columns='Power (kW)').to_excel(no_power, index=False)
+    result = read_power_workbook(no_power)
+    assert result['Power (kW)'].isna().all() and len(result) == len(frame)
+
+def test_project_power_columns_matches_selection():
+    frame = pd.DataFrame({' TIME': [1, 2], 'Power (kW)': [3.0, 4.0], 'other': [5, 6]})
+    projected = project_power_columns(frame)
+    pd.testing.assert_frame_equal(projected, frame[[' TIME', 'Power (kW)']].rename(columns={' TIME': 'Time'}))